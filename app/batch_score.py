@@ -0,0 +1,221 @@
+"""
+app/batch_score.py — Batch scoring offline (tanpa HTTP API)
+
+Re-score seluruh database kandidat (jutaan baris) langsung dari file CSV:
+
+    python -m app.batch_score in.csv out.npy --model ml/gaji_model_v2.pkl --workers 4
+    python -m app.batch_score in.csv out.csv --workers 8 --chunk-size 50000
+
+Input  : CSV dengan header years_experience,city,job_level (urutan bebas).
+Output : .npy → array float64 (NaN untuk baris tidak valid), ditulis via memmap
+         .csv → row,estimated_salary_million,error
+
+File input dibaca per chunk, chunk disebar ke worker process (validasi +
+konversi Y.M + scoring, aturan sama dengan SalaryInputV2), dan hasilnya
+ditulis sesuai urutan input.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+
+# Windows CMD Unicode patch
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding="utf-8")
+
+from app.services.scorer import build_scorer
+from app.services.validation import csv_column_index, pick_csv_columns, validate_rows
+
+DEFAULT_CHUNK_SIZE = 20_000
+
+# --- State di sisi worker process ---
+_scorer = None
+
+
+def _init_worker(model_path: str, use_lookup_table: bool) -> None:
+    global _scorer
+    _scorer = build_scorer(joblib.load(model_path), use_lookup_table=use_lookup_table)
+
+
+def score_lines(start_row: int, lines: list[str], column_index: list[int]) -> tuple[int, np.ndarray, list]:
+    """Parse, validasi, dan skor satu chunk baris CSV mentah."""
+    raw_rows = [pick_csv_columns(fields, column_index) for fields in csv.reader(lines)]
+    chunk = validate_rows(start_row, raw_rows)
+
+    predictions = np.full(len(chunk), np.nan)
+    valid = chunk.valid
+    if valid.any():
+        scored = _scorer.predict_codes(chunk.converted[valid], chunk.city_codes[valid], chunk.level_codes[valid])
+        predictions[valid] = np.round(scored, 2)
+    return start_row, predictions, chunk.errors
+
+
+def _data_lines(f):
+    """Baris tidak kosong dari file CSV yang dibuka dengan newline="" (termasuk header)."""
+    return (line for line in f if line.strip())
+
+
+def count_data_rows(path: str) -> int:
+    """
+    Hitung baris data (tanpa header & baris kosong).
+
+    Dibaca dengan pemisah baris yang sama persis dengan iter_line_chunks
+    (\n, \r\n, dan \r saja) agar ukuran .npy selalu sama dengan jumlah baris
+    yang diskor — file CR-only (ekspor Mac lama) juga terhitung benar.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = sum(1 for _ in _data_lines(f))
+    return max(rows - 1, 0)
+
+
+def iter_line_chunks(path: str, chunk_size: int):
+    """
+    Baca CSV per chunk. Yield (column_index, start_row, lines).
+    Baris kosong dilewati dan tidak dihitung sebagai baris data.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        column_index = None
+        lines: list[str] = []
+        start_row = 0
+        for line in _data_lines(f):
+            if column_index is None:
+                column_index = csv_column_index(next(csv.reader([line])))
+                continue
+            lines.append(line)
+            if len(lines) >= chunk_size:
+                yield column_index, start_row, lines
+                start_row += len(lines)
+                lines = []
+
+        if lines:
+            yield column_index, start_row, lines
+
+
+class NpyWriter:
+    """Tulis prediksi ke .npy lewat memmap — ukuran file diketahui dari count_data_rows."""
+
+    def __init__(self, path: str, total_rows: int):
+        self.array = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(total_rows,))
+
+    def write(self, start_row: int, predictions: np.ndarray, errors: list) -> None:
+        self.array[start_row:start_row + len(predictions)] = predictions
+
+    def close(self) -> None:
+        self.array.flush()
+        del self.array
+
+
+class CsvWriter:
+    def __init__(self, path: str):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["row", "estimated_salary_million", "error"])
+
+    def write(self, start_row: int, predictions: np.ndarray, errors: list) -> None:
+        self.writer.writerows(
+            [start_row + i, "" if error else predictions[i], error or ""]
+            for i, error in enumerate(errors)
+        )
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def run_batch_score(
+    input_path: str,
+    output_path: str,
+    model_path: str,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    use_lookup_table: bool = False,
+) -> dict:
+    """
+    Jalankan scoring offline.
+
+    Returns:
+        dict ringkasan: jumlah baris, baris tidak valid, durasi, rows/sec
+    """
+    started = time.perf_counter()
+
+    if output_path.endswith(".npy"):
+        writer = NpyWriter(output_path, count_data_rows(input_path))
+    elif output_path.endswith(".csv"):
+        writer = CsvWriter(output_path)
+    else:
+        raise ValueError(f"Format output tidak didukung: '{output_path}' (gunakan .npy atau .csv)")
+
+    total_rows = 0
+    invalid_rows = 0
+
+    def handle(result):
+        nonlocal total_rows, invalid_rows
+        start_row, predictions, errors = result
+        writer.write(start_row, predictions, errors)
+        total_rows += len(errors)
+        invalid_rows += sum(1 for e in errors if e)
+
+    try:
+        if workers <= 1:
+            _init_worker(model_path, use_lookup_table)
+            for column_index, start_row, lines in iter_line_chunks(input_path, chunk_size):
+                handle(score_lines(start_row, lines, column_index))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(model_path, use_lookup_table),
+            ) as pool:
+                # Batasi chunk yang "in flight" agar memori tetap terkendali;
+                # hasil diambil dari depan antrean → urutan output = urutan input
+                pending = deque()
+                for column_index, start_row, lines in iter_line_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(score_lines, start_row, lines, column_index))
+                    if len(pending) >= workers * 2:
+                        handle(pending.popleft().result())
+                while pending:
+                    handle(pending.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": total_rows,
+        "invalid_rows": invalid_rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(total_rows / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.batch_score",
+        description="Batch scoring offline dari file CSV kandidat.",
+    )
+    parser.add_argument("input", help="File CSV input (header: years_experience,city,job_level)")
+    parser.add_argument("output", help="File output .npy atau .csv")
+    parser.add_argument("--model", default="ml/gaji_model_v2.pkl", help="Path model .pkl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Jumlah worker process")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Baris per chunk")
+    parser.add_argument("--lookup-table", action="store_true", help="Pakai tabel lookup full-domain")
+    args = parser.parse_args(argv)
+
+    print(f"🔄 Scoring '{args.input}' → '{args.output}' ({args.workers} worker, chunk {args.chunk_size})")
+    summary = run_batch_score(
+        args.input, args.output, args.model,
+        workers=args.workers, chunk_size=args.chunk_size, use_lookup_table=args.lookup_table,
+    )
+    print(
+        f"✅ Selesai: {summary['rows']:,} baris ({summary['invalid_rows']:,} tidak valid) "
+        f"dalam {summary['seconds']} detik — {summary['rows_per_sec']:,.0f} rows/sec"
+    )
+
+
+if __name__ == "__main__":
+    main()
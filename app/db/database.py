@@ -3,6 +3,8 @@ from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
+from app.db.telemetry import EngineTelemetry
+
 load_dotenv()
 
 # Bangun connection string dari variabel .env
@@ -11,14 +13,81 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set")
 
+# Replica baca (opsional). Jika kosong, engine baca tetap memakai primary
+# tapi dengan pool sendiri — scan berat /history & retrain tidak menghabiskan
+# koneksi yang dibutuhkan /predict dan auth
+DATABASE_READ_URL = os.getenv('DATABASE_READ_URL') or DATABASE_URL
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ('true', '1')
+
+
+def build_engine(
+    url: str,
+    pool_size: int,
+    max_overflow: int,
+    pool_timeout: int = 30,
+    telemetry: EngineTelemetry | None = None,
+):
+    """
+    Engine async dengan parameter pool & cache statement asyncpg dari env:
+    - DB_POOL_RECYCLE                : detik sebelum koneksi dibuka ulang (default -1 = tidak pernah)
+    - DB_POOL_PRE_PING               : cek koneksi sebelum dipakai (default false)
+    - DB_PREPARED_STATEMENT_CACHE_SIZE: cache prepared statement SQLAlchemy per koneksi (default 100)
+    - DB_STATEMENT_CACHE_SIZE        : cache statement internal asyncpg (default 100)
+    - DB_STATEMENT_CACHE_LIFETIME    : detik statement boleh tinggal di cache asyncpg (default 300)
+    Set kedua cache ke 0 jika lewat PgBouncer mode transaction.
+    """
+    options = {}
+    if telemetry is not None:
+        options["poolclass"] = telemetry.pool_class()
+
+    # echo=True → tampilkan SQL yang dieksekusi di terminal (berguna saat development)
+    engine = create_async_engine(
+        url,
+        pool_size=pool_size,
+        echo=_env_bool('SQL_ECHO', False),
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=_env_int('DB_POOL_RECYCLE', -1),
+        pool_pre_ping=_env_bool('DB_POOL_PRE_PING', False),
+        connect_args={
+            "prepared_statement_cache_size": _env_int('DB_PREPARED_STATEMENT_CACHE_SIZE', 100),
+            "statement_cache_size": _env_int('DB_STATEMENT_CACHE_SIZE', 100),
+            "max_cached_statement_lifetime": _env_int('DB_STATEMENT_CACHE_LIFETIME', 300),
+        },
+        **options,
+    )
+    if telemetry is not None:
+        telemetry.attach(engine)
+    return engine
+
+
+# Telemetri pool & statement per engine — dilaporkan di /admin/metrics
+write_telemetry = EngineTelemetry()
+read_telemetry = EngineTelemetry()
+
 # Engine = "mesin" koneksi ke database
-# echo=True → tampilkan SQL yang dieksekusi di terminal (berguna saat development)
-engine = create_async_engine(
+# engine      → primary: semua penulisan, auth, migrasi, maintenance
+# read_engine → replica: query read-only (riwayat, statistik, export, retrain)
+engine = build_engine(
     DATABASE_URL,
-    pool_size=10,
-    echo=os.getenv('SQL_ECHO', 'False').lower() in ('true', '1'),
-    max_overflow=20,
-    pool_timeout=30
+    pool_size=_env_int('DB_POOL_SIZE', 10),
+    max_overflow=_env_int('DB_MAX_OVERFLOW', 20),
+    pool_timeout=_env_int('DB_POOL_TIMEOUT', 30),
+    telemetry=write_telemetry,
+)
+read_engine = build_engine(
+    DATABASE_READ_URL,
+    pool_size=_env_int('DB_READ_POOL_SIZE', 5),
+    max_overflow=_env_int('DB_READ_MAX_OVERFLOW', 10),
+    pool_timeout=_env_int('DB_POOL_TIMEOUT', 30),
+    telemetry=read_telemetry,
 )
 
 AsyncSessionLocal = sessionmaker(
@@ -27,6 +96,12 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False  # Objek tetap bisa diakses setelah commit
 )
 
+ReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 # Base class untuk semua tabel — semua model DB akan inherit dari ini
 class Base(DeclarativeBase):
     pass
@@ -44,4 +119,17 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+async def get_read_db():
+    """
+    Sama seperti get_db, tapi session ke engine baca (replica).
+    Hanya untuk endpoint read-only — replica bisa tertinggal sedikit dari
+    primary, jadi query yang harus melihat tulisan terbaru (mis. sebelum
+    UPDATE ... FOR UPDATE) tetap memakai get_db.
+    """
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
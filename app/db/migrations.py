@@ -0,0 +1,542 @@
+"""
+app/db/migrations.py — Runner migrasi database berversi
+
+Setiap migrasi punya nomor versi dan dicatat di tabel schema_version setelah
+SEMUA langkahnya selesai. Jenis langkah:
+
+- SQL / callable  : dijalankan dalam transaksi biasa
+- ConcurrentIndex : CREATE INDEX CONCURRENTLY (autocommit, tanpa lock tulis).
+                    Index INVALID sisa percobaan gagal di-drop lalu dibuat ulang;
+                    index yang sudah ada & valid (mis. dari create_all) dilewati
+- PartitionedIndex: index baru di tabel partitioned (CONCURRENTLY tidak didukung
+                    di parent): index parent ON ONLY, index tiap partisi dibuat
+                    CONCURRENTLY lalu di-ATTACH — parent valid setelah semuanya
+- Backfill        : UPDATE/INSERT per chunk ID, satu transaksi per chunk.
+                    Progres disimpan di schema_backfill_progress di transaksi
+                    yang sama → bisa dilanjutkan persis dari chunk terakhir
+
+verify_query_plans() menjalankan EXPLAIN untuk query utama /history dan
+retrain, lalu mengecek index yang diharapkan benar-benar dipakai (index
+partisi dihitung sebagai index parent-nya).
+
+Migrasi 7 mengubah prediction_history / prediction_items menjadi tabel
+partitioned tanpa menyalin data: tabel lama diberi CHECK (created_at < cutover)
+yang divalidasi online, di-rename menjadi <tabel>_legacy, lalu di-ATTACH sebagai
+partisi MINVALUE..cutover dari tabel partitioned baru (tanpa scan ulang karena
+CHECK sudah tervalidasi). Partisi bulanan dimulai dari cutover.
+
+CLI: python migrate_db.py (lihat file tersebut)
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateTable
+
+from app.db.database import Base
+from app.db.models import ApiKey, PredictionDailyStats, PredictionItem, RetainedFeedbackItem
+from app.db.partitions import (
+    PARTITIONED_TABLES, add_months, bound_literal, ensure_partitions, month_start, parse_bound, relkind,
+)
+from app.services.stats import rebuild_rollup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5_000
+
+
+@dataclass
+class ConcurrentIndex:
+    """skip_if: (opsional) query yang mengembalikan true jika langkah ini tidak perlu."""
+    name: str
+    sql: str
+    skip_if: str | None = None
+
+
+@dataclass
+class PartitionedIndex:
+    """definition: bagian setelah nama tabel, mis. "(request_id) WHERE request_id IS NOT NULL"."""
+    name: str
+    table: str
+    definition: str
+
+
+@dataclass
+class Backfill:
+    """
+    sql dijalankan per chunk dengan parameter :after_id dan :until_id
+    (rentang id pada `table`, after_id < id <= until_id).
+    """
+    table: str
+    sql: str
+
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    steps: list = field(default_factory=list)
+
+
+BOOTSTRAP_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS schema_backfill_progress (
+        version INTEGER PRIMARY KEY,
+        last_id BIGINT NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+]
+
+BACKFILL_ITEMS_SQL = """
+INSERT INTO prediction_items (
+    history_id, position, input_years, converted_years, city, job_level,
+    predicted_salary, actual_salary, created_at
+)
+SELECT h.id, u.ord - 1, u.input_years, u.converted_years, u.city, u.job_level,
+       u.predicted_salary, h.actual_salaries[u.ord], h.created_at
+FROM prediction_history h
+CROSS JOIN LATERAL unnest(h.input_years, h.converted_years, h.city, h.job_level, h.predicted_salaries)
+    WITH ORDINALITY AS u(input_years, converted_years, city, job_level, predicted_salary, ord)
+WHERE h.id > :after_id AND h.id <= :until_id AND u.ord <= h.data_count
+ON CONFLICT DO NOTHING
+"""
+
+# Bulan cutover partisi legacy = awal bulan ini + N. Diberi jarak agar insert
+# baru tetap lolos CHECK selama validasi & build index berjalan
+LEGACY_CUTOVER_MONTHS = 2
+
+
+def _create_prediction_items(sync_conn) -> None:
+    # Tabel baru sudah partitioned → butuh partisi untuk backfill record lama
+    PredictionItem.__table__.create(sync_conn, checkfirst=True)
+    ensure_partitions(sync_conn)
+
+
+def _create_daily_stats(sync_conn) -> None:
+    PredictionDailyStats.__table__.create(sync_conn, checkfirst=True)
+
+
+def _create_retained_feedback(sync_conn) -> None:
+    RetainedFeedbackItem.__table__.create(sync_conn, checkfirst=True)
+
+
+def _create_api_keys(sync_conn) -> None:
+    ApiKey.__table__.create(sync_conn, checkfirst=True)
+
+
+def _legacy_tables(sync_conn) -> list[str]:
+    return [table for table in PARTITIONED_TABLES if relkind(sync_conn, table) == "r"]
+
+
+def _add_legacy_bounds(sync_conn) -> None:
+    """CHECK (created_at < cutover) NOT VALID: hanya berlaku untuk insert baru, tanpa scan."""
+    sync_conn.execute(text("SET LOCAL lock_timeout = '10s'"))
+    cutover = add_months(month_start(datetime.now(timezone.utc).date()), LEGACY_CUTOVER_MONTHS)
+    for table in _legacy_tables(sync_conn):
+        exists = sync_conn.execute(text(
+            "SELECT 1 FROM pg_constraint WHERE conname = :name AND conrelid = to_regclass(:table)"
+        ), {"name": f"{table}_legacy_bound", "table": table}).scalar()
+        if not exists:
+            sync_conn.execute(text(
+                f"ALTER TABLE {table} ADD CONSTRAINT {table}_legacy_bound "
+                f"CHECK (created_at < {bound_literal(cutover)}) NOT VALID"
+            ))
+
+
+def _validate_legacy_bounds(sync_conn) -> None:
+    # VALIDATE hanya butuh SHARE UPDATE EXCLUSIVE — insert/update tetap jalan
+    for table in _legacy_tables(sync_conn):
+        sync_conn.execute(text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_legacy_bound"))
+
+
+def _legacy_cutover(sync_conn, table: str):
+    definition = sync_conn.execute(text(
+        "SELECT pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conname = :name AND conrelid = to_regclass(:table)"
+    ), {"name": f"{table}_legacy_bound", "table": table}).scalar()
+    return parse_bound(re.search(r"'[^']+'", definition).group(0))
+
+
+# Unique constraint parent hanya mau memakai index partisi yang juga berupa
+# constraint: (constraint lama yang diganti, index unik baru yang dipromosikan)
+_LEGACY_UNIQUE = {
+    "prediction_items": ("uq_prediction_items_history_position", "uq_prediction_items_history_position_created_legacy"),
+}
+
+
+def _swap_to_partitioned(sync_conn) -> None:
+    """
+    Satu transaksi singkat (ACCESS EXCLUSIVE): rename tabel lama → <tabel>_legacy,
+    buat parent partitioned dari model, lanjutkan sequence id, lalu ATTACH
+    tabel lama sebagai partisi MINVALUE..cutover.
+    """
+    tables = _legacy_tables(sync_conn)
+    if not tables:
+        return
+
+    sync_conn.execute(text("SET LOCAL TimeZone = 'UTC'"))
+    sync_conn.execute(text("SET LOCAL lock_timeout = '10s'"))
+    for table in tables:
+        sync_conn.execute(text(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE"))
+
+    # FK prediction_items → prediction_history tidak dipakai lagi (lihat models.PredictionItem)
+    tables_sql = ", ".join(f"to_regclass('{table}')" for table in PARTITIONED_TABLES)
+    foreign_keys = sync_conn.execute(text(
+        "SELECT conname, conrelid::regclass::text FROM pg_constraint WHERE contype = 'f' "
+        f"AND (conrelid IN ({tables_sql}) OR confrelid IN ({tables_sql}))"
+    )).all()
+    for constraint, owner in foreign_keys:
+        sync_conn.execute(text(f"ALTER TABLE {owner} DROP CONSTRAINT {constraint}"))
+
+    for table in tables:
+        legacy = f"{table}_legacy"
+        cutover = _legacy_cutover(sync_conn, table)
+        sync_conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+
+        # Nama index & sequence dibebaskan untuk parent baru
+        index_names = sync_conn.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = :t"), {"t": legacy},
+        ).scalars().all()
+        for index_name in index_names:
+            if not index_name.endswith("_legacy"):
+                sync_conn.execute(text(f"ALTER INDEX {index_name} RENAME TO {index_name}_legacy"))
+        # Partisi tidak boleh punya primary key lain: PK (id) diganti index unik
+        # (id, created_at) yang sudah dibangun CONCURRENTLY — tanpa scan
+        sync_conn.execute(text(f"ALTER TABLE {legacy} DROP CONSTRAINT {table}_pkey_legacy"))
+        sync_conn.execute(text(
+            f"ALTER TABLE {legacy} ADD CONSTRAINT {table}_pkey_legacy PRIMARY KEY USING INDEX {table}_id_created_legacy"
+        ))
+        if table in _LEGACY_UNIQUE:
+            old_unique, new_index = _LEGACY_UNIQUE[table]
+            sync_conn.execute(text(f"ALTER TABLE {legacy} DROP CONSTRAINT IF EXISTS {old_unique}_legacy"))
+            sync_conn.execute(text(f"ALTER TABLE {legacy} ADD CONSTRAINT {new_index} UNIQUE USING INDEX {new_index}"))
+        sequence = sync_conn.execute(text("SELECT pg_get_serial_sequence(:t, 'id')"), {"t": legacy}).scalar()
+        sync_conn.execute(text(f"ALTER SEQUENCE {sequence} RENAME TO {table}_id_seq_legacy"))
+
+        # Parent dari model tanpa index yang dibangun migrasi berikutnya lewat
+        # PartitionedIndex: ATTACH akan membangunnya di seluruh partisi legacy
+        # di bawah ACCESS EXCLUSIVE
+        definition = Base.metadata.tables[table]
+        sync_conn.execute(CreateTable(definition))
+        for index in definition.indexes:
+            if index.name not in _partitioned_index_names():
+                index.create(sync_conn)
+        sync_conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT last_value FROM {table}_id_seq_legacy))"
+        ))
+        sync_conn.execute(text(
+            f"ALTER TABLE {table} ATTACH PARTITION {legacy} "
+            f"FOR VALUES FROM (MINVALUE) TO ({bound_literal(cutover)})"
+        ))
+        logger.info(f"✅ {table} → partitioned (legacy < {cutover})")
+
+
+def _partitioned_index_names() -> set[str]:
+    return {step.name for m in MIGRATIONS for step in m.steps if isinstance(step, PartitionedIndex)}
+
+
+def _skip_if_partitioned(table: str) -> str:
+    return f"SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('{table}')"
+
+
+MIGRATIONS = [
+    Migration(1, "Tambah kolom actual_salaries ke prediction_history", [
+        "ALTER TABLE prediction_history ADD COLUMN IF NOT EXISTS actual_salaries FLOAT[] DEFAULT NULL",
+    ]),
+    Migration(2, "Tabel prediction_items (satu baris per kandidat)", [
+        _create_prediction_items,
+    ]),
+    # Array paralel → satu baris per kandidat. unnest() multi-array mengisi NULL
+    # untuk array yang lebih pendek / NULL (mis. city pada record lama).
+    Migration(3, "Backfill prediction_items dari kolom array prediction_history", [
+        Backfill("prediction_history", BACKFILL_ITEMS_SQL),
+    ]),
+    Migration(4, "Partial index histori yang sudah punya feedback", [
+        ConcurrentIndex(
+            "idx_prediction_history_feedback",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_prediction_history_feedback "
+            "ON prediction_history (created_at) WHERE actual_salaries IS NOT NULL",
+        ),
+    ]),
+    Migration(5, "Covering partial index data retrain di prediction_items", [
+        ConcurrentIndex(
+            "idx_prediction_items_feedback",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_prediction_items_feedback "
+            "ON prediction_items (id) INCLUDE (converted_years, city, job_level, actual_salary) "
+            "WHERE actual_salary IS NOT NULL",
+        ),
+    ]),
+    # Rebuild (bukan backfill per chunk): tabel bisa sudah dibuat create_all dan
+    # terisi oleh write path, jadi dihitung ulang total di bawah LOCK
+    Migration(6, "Rollup harian prediction_daily_stats (hari × kota × level)", [
+        _create_daily_stats,
+        rebuild_rollup,
+    ]),
+    # Index unik (…, created_at) dibuat dulu secara CONCURRENTLY agar ATTACH
+    # bisa langsung memakainya sebagai partisi primary key / unique parent
+    Migration(7, "Partisi bulanan (created_at) prediction_history & prediction_items", [
+        _create_retained_feedback,
+        _add_legacy_bounds,
+        _validate_legacy_bounds,
+        ConcurrentIndex(
+            "prediction_history_id_created_legacy",
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS prediction_history_id_created_legacy "
+            "ON prediction_history (id, created_at)",
+            skip_if=_skip_if_partitioned("prediction_history"),
+        ),
+        ConcurrentIndex(
+            "prediction_items_id_created_legacy",
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS prediction_items_id_created_legacy "
+            "ON prediction_items (id, created_at)",
+            skip_if=_skip_if_partitioned("prediction_items"),
+        ),
+        ConcurrentIndex(
+            "uq_prediction_items_history_position_created_legacy",
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_prediction_items_history_position_created_legacy "
+            "ON prediction_items (history_id, position, created_at)",
+            skip_if=_skip_if_partitioned("prediction_items"),
+        ),
+        # Kolom dari migrasi berikutnya yang sudah ada di model (parent baru):
+        # partisi legacy wajib punya kolom yang sama saat ATTACH. Nullable
+        # tanpa default → hanya ubah katalog
+        "ALTER TABLE prediction_history ADD COLUMN IF NOT EXISTS request_id VARCHAR(32)",
+        _swap_to_partitioned,
+        ensure_partitions,
+    ]),
+    Migration(8, "Tabel api_keys (SHA-256 API key service-to-service)", [
+        _create_api_keys,
+    ]),
+    # Kolom nullable tanpa default: hanya ubah katalog, tanpa rewrite tabel
+    Migration(9, "Kolom request_id (correlation ID /predict) di prediction_history", [
+        "ALTER TABLE prediction_history ADD COLUMN IF NOT EXISTS request_id VARCHAR(32)",
+        PartitionedIndex(
+            "idx_prediction_history_request_id", "prediction_history",
+            "(request_id) WHERE request_id IS NOT NULL",
+        ),
+    ]),
+]
+
+LATEST_VERSION = max(m.version for m in MIGRATIONS)
+
+
+# Query utama aplikasi → index yang harus dipakai
+QUERY_PLAN_CHECKS = [
+    (
+        "/history terbaru",
+        "SELECT id FROM prediction_history ORDER BY created_at DESC, id DESC LIMIT 11",
+        "idx_prediction_created_at",
+    ),
+    (
+        "/history halaman berikutnya (cursor)",
+        "SELECT id FROM prediction_history WHERE created_at <= now() "
+        "AND (created_at < now() OR id < 0) ORDER BY created_at DESC, id DESC LIMIT 11",
+        "idx_prediction_created_at",
+    ),
+    (
+        "/history filter kota + level",
+        "SELECT history_id FROM prediction_items WHERE city = 'jakarta' AND job_level = 'mid'",
+        "idx_prediction_items_city_level_created",
+    ),
+    (
+        "/history filter level",
+        "SELECT history_id FROM prediction_items WHERE job_level = 'mid'",
+        "idx_prediction_items_level_created",
+    ),
+    (
+        "retrain: data feedback",
+        "SELECT converted_years, city, job_level, actual_salary FROM prediction_items "
+        "WHERE actual_salary IS NOT NULL",
+        "idx_prediction_items_feedback",
+    ),
+    (
+        "histori dengan feedback",
+        "SELECT id FROM prediction_history WHERE actual_salaries IS NOT NULL ORDER BY created_at DESC LIMIT 10",
+        "idx_prediction_history_feedback",
+    ),
+    (
+        "/stats rentang hari",
+        "SELECT * FROM prediction_daily_stats WHERE day >= current_date - 30 AND day <= current_date",
+        "prediction_daily_stats_pkey",
+    ),
+]
+
+
+async def applied_versions(engine: AsyncEngine) -> set[int]:
+    async with engine.begin() as conn:
+        for sql in BOOTSTRAP_SQL:
+            await conn.execute(text(sql))
+        result = await conn.execute(text("SELECT version FROM schema_version"))
+        return {row[0] for row in result}
+
+
+async def pending_migrations(engine: AsyncEngine) -> list[Migration]:
+    applied = await applied_versions(engine)
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+async def _run_concurrent_index(engine: AsyncEngine, step: ConcurrentIndex) -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if step.skip_if and (await conn.execute(text(step.skip_if))).scalar():
+            return
+        # CONCURRENTLY yang gagal meninggalkan index INVALID; IF NOT EXISTS akan melewatinya
+        valid = (await conn.execute(text(
+            "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name"
+        ), {"name": step.name})).scalar()
+        # Sudah ada (mis. dari create_all pada tabel partitioned, yang tidak mendukung CONCURRENTLY)
+        if valid:
+            return
+        if valid is False:
+            logger.warning(f"⚠️  Index {step.name} INVALID, dibuat ulang")
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {step.name}"))
+        await conn.execute(text(step.sql))
+
+
+async def _run_partitioned_index(engine: AsyncEngine, step: PartitionedIndex) -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        # Parent ON ONLY: instan, INVALID sampai index semua partisi ter-ATTACH.
+        # Partisi yang dibuat setelah ini langsung mendapat index dari parent
+        await conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {step.name} ON ONLY {step.table} {step.definition}"
+        ))
+        partitions = (await conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+        ), {"table": step.table})).scalars().all()
+
+        for partition in partitions:
+            attached = (await conn.execute(text(
+                "SELECT 1 FROM pg_inherits i JOIN pg_class p ON p.oid = i.inhparent "
+                "JOIN pg_index x ON x.indexrelid = i.inhrelid "
+                "WHERE p.relname = :name AND x.indrelid = to_regclass(:partition)"
+            ), {"name": step.name, "partition": partition})).scalar()
+            if attached:
+                continue
+            child = f"{partition}_{step.name}"[:63]
+            await _run_concurrent_index(engine, ConcurrentIndex(
+                child, f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {child} ON {partition} {step.definition}",
+            ))
+            await conn.execute(text(f"ALTER INDEX {step.name} ATTACH PARTITION {child}"))
+
+
+async def _run_backfill(engine: AsyncEngine, version: int, step: Backfill, chunk_size: int) -> None:
+    async with engine.begin() as conn:
+        after_id = (await conn.execute(
+            text("SELECT last_id FROM schema_backfill_progress WHERE version = :v"), {"v": version},
+        )).scalar() or 0
+        max_id = (await conn.execute(text(f"SELECT max(id) FROM {step.table}"))).scalar() or 0
+
+    if after_id:
+        print(f"      ↪️  Melanjutkan backfill dari id > {after_id}")
+
+    total_rows = 0
+    while True:
+        # Satu transaksi per chunk: data + progres tersimpan bersamaan
+        async with engine.begin() as conn:
+            until_id = (await conn.execute(text(
+                f"SELECT max(id) FROM (SELECT id FROM {step.table} WHERE id > :after_id "
+                f"ORDER BY id LIMIT :chunk_size) chunk"
+            ), {"after_id": after_id, "chunk_size": chunk_size})).scalar()
+            if until_id is None:
+                break
+
+            result = await conn.execute(text(step.sql), {"after_id": after_id, "until_id": until_id})
+            await conn.execute(text(
+                "INSERT INTO schema_backfill_progress (version, last_id) VALUES (:v, :last_id) "
+                "ON CONFLICT (version) DO UPDATE SET last_id = excluded.last_id, updated_at = now()"
+            ), {"v": version, "last_id": until_id})
+
+        total_rows += result.rowcount
+        after_id = until_id
+        progress = min(100.0, after_id / max_id * 100) if max_id else 100.0
+        print(f"      🔄 id ≤ {after_id} ({progress:.1f}%) — {total_rows} baris")
+
+
+async def apply_migration(engine: AsyncEngine, migration: Migration, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    for step in migration.steps:
+        if isinstance(step, ConcurrentIndex):
+            await _run_concurrent_index(engine, step)
+        elif isinstance(step, PartitionedIndex):
+            await _run_partitioned_index(engine, step)
+        elif isinstance(step, Backfill):
+            await _run_backfill(engine, migration.version, step, chunk_size)
+        else:
+            async with engine.begin() as conn:
+                if isinstance(step, str):
+                    await conn.execute(text(step))
+                else:
+                    await conn.run_sync(step)
+
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("INSERT INTO schema_version (version, description) VALUES (:v, :d)"),
+            {"v": migration.version, "d": migration.description},
+        )
+
+
+async def run_migrations(engine: AsyncEngine, chunk_size: int = DEFAULT_CHUNK_SIZE) -> list[int]:
+    """Jalankan semua migrasi yang belum tercatat, urut versi. Returns versi yang diterapkan."""
+    applied = []
+    for migration in await pending_migrations(engine):
+        print(f"   🔄 [{migration.version}] {migration.description}")
+        await apply_migration(engine, migration, chunk_size)
+        print(f"   🆕 [{migration.version}] OK")
+        applied.append(migration.version)
+    return applied
+
+
+def _plan_indexes(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _plan_indexes(child)
+    return names
+
+
+async def _root_index(conn, name: str) -> str:
+    """Index partisi (mis. prediction_history_p202501_created_at_idx) → index parent-nya."""
+    while True:
+        parent = (await conn.execute(text(
+            "SELECT p.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE c.relname = :name"
+        ), {"name": name})).scalar()
+        if parent is None:
+            return name
+        name = parent
+
+
+async def verify_query_plans(engine: AsyncEngine) -> list[tuple[str, str, bool, set[str]]]:
+    """
+    EXPLAIN setiap query di QUERY_PLAN_CHECKS.
+    Seq scan dimatikan (SET LOCAL) agar tabel kecil pun menunjukkan apakah
+    index BISA dipakai planner.
+
+    Returns:
+        list (deskripsi, index diharapkan, dipakai?, index yang muncul di plan)
+    """
+    results = []
+    async with engine.connect() as conn:
+        for description, sql, expected in QUERY_PLAN_CHECKS:
+            async with conn.begin():
+                await conn.execute(text("SET LOCAL enable_seqscan = off"))
+                raw = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+                plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+                used = {await _root_index(conn, name) for name in _plan_indexes(plan)}
+            results.append((description, expected, expected in used, used))
+    return results
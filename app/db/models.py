@@ -1,18 +1,22 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import List
-from sqlalchemy import Integer, Float, DateTime, ARRAY, String, Index
-from sqlalchemy.sql import func
+from sqlalchemy import Integer, BigInteger, Float, Date, DateTime, ARRAY, String, Index, UniqueConstraint, ForeignKey
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.database import Base
 
 class PredictionHistory(Base):
     """
     Table Untuk Menyimpan history setiap prediksi yang masuk
+
+    Dipartisi per bulan (RANGE created_at) — partisi dikelola app/db/partitions.py.
+    Primary key partitioned table wajib memuat kolom partisi → (id, created_at);
+    id tetap unik karena berasal dari satu sequence.
     """
 
     __tablename__ = "prediction_history"
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
     # ARRAY(Float) = tipe data PostgreSQL untuk menyimpan list of float
     # Contoh: {2.6, 3.0, 5.0} tersimpan sebagai satu kolom
@@ -31,13 +35,28 @@ class PredictionHistory(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
-        nullable=False
+        primary_key=True,
     )
 
     model_version : Mapped[str] = mapped_column(nullable=False)
 
+    # Correlation ID yang dikembalikan /predict (termasuk ?compact=true) —
+    # bisa dicari lewat GET /history/request/{request_id}
+    request_id : Mapped[str | None] = mapped_column(String(32), nullable=True)
+
+    # Index baru untuk tabel yang sudah berisi data dibuat CONCURRENTLY lewat
+    # app/db/migrations.py — definisi di sini untuk database baru (create_all)
     __table_args__ = (
         Index("idx_prediction_created_at", "created_at"),
+        Index(
+            "idx_prediction_history_feedback", "created_at",
+            postgresql_where=text("actual_salaries IS NOT NULL"),
+        ),
+        Index(
+            "idx_prediction_history_request_id", "request_id",
+            postgresql_where=text("request_id IS NOT NULL"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     def __repr__(self) -> str:
@@ -48,6 +67,109 @@ class PredictionHistory(Base):
         )
 
 
+class PredictionItem(Base):
+    """
+    Satu baris per kandidat dari setiap PredictionHistory.
+
+    Kolom array di PredictionHistory tidak bisa di-index per elemen, jadi filter
+    kota/level dan ekstraksi data retrain memakai tabel ini.
+    created_at disalin dari parent (now() di transaksi yang sama) agar index
+    (city, job_level, created_at) bisa dipakai tanpa join, dan agar item selalu
+    berada di partisi bulan yang sama dengan parent-nya.
+
+    Tanpa foreign key ke prediction_history: FK ke tabel partitioned membuat
+    DETACH partisi lama harus memeriksa seluruh tabel item. Item ditulis di
+    transaksi yang sama dengan parent-nya, dan diarsipkan bersama per bulan.
+    """
+
+    __tablename__ = "prediction_items"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    history_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Posisi kandidat di dalam array parent (mulai dari 0)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    input_years: Mapped[float] = mapped_column(Float, nullable=False)
+    converted_years: Mapped[float] = mapped_column(Float, nullable=False)
+    city: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    job_level: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    predicted_salary: Mapped[float] = mapped_column(Float, nullable=False)
+    actual_salary: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        primary_key=True,
+    )
+
+    __table_args__ = (
+        UniqueConstraint("history_id", "position", "created_at", name="uq_prediction_items_history_position"),
+        Index("idx_prediction_items_city_level_created", "city", "job_level", "created_at"),
+        Index("idx_prediction_items_level_created", "job_level", "created_at"),
+        Index(
+            "idx_prediction_items_feedback", "id",
+            postgresql_include=["converted_years", "city", "job_level", "actual_salary"],
+            postgresql_where=text("actual_salary IS NOT NULL"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    def __repr__(self) -> str:
+        return f"<PredictionItem history={self.history_id} pos={self.position} city={self.city}>"
+
+
+class RetainedFeedbackItem(Base):
+    """
+    Item ber-feedback dari partisi prediction_items yang sudah diarsipkan
+    oleh kebijakan retensi — tetap dipakai sebagai data retrain.
+    """
+
+    __tablename__ = "retained_feedback_items"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    history_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    converted_years: Mapped[float] = mapped_column(Float, nullable=False)
+    city: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    job_level: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    predicted_salary: Mapped[float] = mapped_column(Float, nullable=False)
+    actual_salary: Mapped[float] = mapped_column(Float, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("history_id", "position", name="uq_retained_feedback_history_position"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<RetainedFeedbackItem history={self.history_id} pos={self.position}>"
+
+
+class PredictionDailyStats(Base):
+    """
+    Rollup harian per (hari UTC, kota, level) dari prediction_items.
+
+    Diperbarui di transaksi yang sama dengan penulisan item / feedback
+    (lihat app/services/stats.py), jadi /stats tidak perlu memindai histori.
+    city / job_level kosong ('') = record lama tanpa kota / level.
+    """
+
+    __tablename__ = "prediction_daily_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    city: Mapped[str] = mapped_column(String(50), primary_key=True)
+    job_level: Mapped[str] = mapped_column(String(50), primary_key=True)
+
+    prediction_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    predicted_salary_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    # Hanya kandidat yang sudah punya actual_salary
+    feedback_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    abs_error_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<PredictionDailyStats {self.day} {self.city}/{self.job_level} n={self.prediction_count}>"
+
+
 class User(Base):
     """
     Tabel user untuk autentikasi JWT.
@@ -67,4 +189,33 @@ class User(Base):
     )
 
     def __repr__(self) -> str:
-        return f"<User id={self.id} username={self.username} role={self.role}>"
\ No newline at end of file
+        return f"<User id={self.id} username={self.username} role={self.role}>"
+
+
+class ApiKey(Base):
+    """
+    API key jangka panjang untuk pemanggil service-to-service.
+
+    Key hanya ditampilkan sekali saat dibuat; yang disimpan SHA-256 hex-nya
+    (key acak 256-bit → hash cepat sudah cukup, tidak perlu bcrypt).
+    Key berlaku atas nama user pemiliknya (username + role saat ini);
+    ikut terhapus jika user dihapus. Lihat app/services/api_keys.py.
+    """
+
+    __tablename__ = "api_keys"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Awal key (mis. "sal_AbCd1234") untuk identifikasi di daftar admin
+    key_prefix: Mapped[str] = mapped_column(String(16), nullable=False)
+    key_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    revoked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<ApiKey id={self.id} name={self.name} prefix={self.key_prefix}>"
@@ -0,0 +1,260 @@
+"""
+app/db/partitions.py — Partisi bulanan (RANGE created_at) + retensi histori
+
+prediction_history dan prediction_items dipartisi per bulan UTC dengan nama
+<tabel>_pYYYYMM. Tabel lama yang dikonversi oleh migrasi menjadi satu partisi
+<tabel>_legacy (MINVALUE s/d bulan cutover) — lihat app/db/migrations.py.
+
+- ensure_partitions : buat partisi bulan-bulan ke depan (dipanggil saat startup,
+                      oleh job terjadwal, dan oleh migrasi). Fungsi sync → dipakai
+                      lewat conn.run_sync()
+- apply_retention   : partisi yang seluruh rentangnya lebih tua dari batas retensi
+                      di-DETACH CONCURRENTLY, item yang punya feedback disalin ke
+                      retained_feedback_items (tetap dipakai retrain), lalu isinya
+                      diarsipkan ke <archive_dir>/<partisi>.csv.gz dan tabelnya di-drop
+
+Setiap langkah retensi bisa diulang: partisi yang sudah ter-detach tapi belum
+diarsipkan (proses terhenti) akan diselesaikan pada run berikutnya.
+Rollup prediction_daily_stats TIDAK ikut dihapus — statistik lama tetap ada.
+
+Memerlukan PostgreSQL 14+ (DETACH PARTITION ... CONCURRENTLY).
+"""
+
+import asyncio
+import csv
+import gzip
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Urutan retensi: item dulu (sumber data feedback), baru parent-nya
+PARTITIONED_TABLES = ("prediction_items", "prediction_history")
+
+DEFAULT_MONTHS_AHEAD = 3
+ARCHIVE_BATCH_SIZE = 5_000
+
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+@dataclass
+class Partition:
+    name: str
+    lower: date | None  # None = MINVALUE
+    upper: date | None  # None = MAXVALUE
+    detach_pending: bool = False
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    """Tanggal 1 pada bulan `day` + months."""
+    years, month_index = divmod(day.month - 1 + months, 12)
+    return date(day.year + years, month_index + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def bound_literal(day: date) -> str:
+    return f"'{day.isoformat()} 00:00:00+00'"
+
+
+def parse_bound(value: str) -> date | None:
+    """
+    Nilai batas dari pg_get_expr(relpartbound), mis. "'2025-01-01 00:00:00+00'".
+    Sesi harus ber-TimeZone UTC agar tanggalnya tidak bergeser.
+    """
+    value = value.strip()
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return date.fromisoformat(value.strip("'")[:10])
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def relkind(sync_conn, table: str) -> str | None:
+    """'p' = partitioned, 'r' = tabel biasa, None = belum ada."""
+    return sync_conn.execute(
+        # ::text — asyncpg mengembalikan tipe "char" sebagai bytes
+        text("SELECT relkind::text FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table},
+    ).scalar()
+
+
+def list_partitions(sync_conn, table: str) -> list[Partition]:
+    sync_conn.execute(text("SET LOCAL TimeZone = 'UTC'"))
+    rows = sync_conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), i.inhdetachpending "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+    ), {"table": table})
+
+    partitions = []
+    for name, bound, pending in rows:
+        match = _BOUND_RE.search(bound or "")
+        if match is None:  # DEFAULT partition — tidak dikelola di sini
+            continue
+        partitions.append(Partition(name, parse_bound(match.group(1)), parse_bound(match.group(2)), pending))
+    return partitions
+
+
+def ensure_partitions(sync_conn, months_ahead: int = DEFAULT_MONTHS_AHEAD, today: date | None = None) -> list[str]:
+    """
+    Pastikan setiap tabel partitioned punya partisi sampai `months_ahead` bulan
+    setelah bulan ini. Partisi baru dimulai dari batas atas partisi terakhir;
+    tabel yang belum punya partisi sama sekali dimulai dari bulan record
+    histori tertua (atau bulan ini jika kosong). Tabel yang belum dikonversi
+    ke partitioned dilewati.
+
+    Returns:
+        nama partisi yang dibuat
+    """
+    today = today or _today()
+    until = add_months(month_start(today), months_ahead + 1)
+    # CREATE ... PARTITION OF butuh lock parent: jangan antre lama di belakang query panjang
+    sync_conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+
+    created = []
+    for table in PARTITIONED_TABLES:
+        if relkind(sync_conn, table) != "p":
+            continue
+
+        uppers = [p.upper for p in list_partitions(sync_conn, table) if p.upper is not None]
+        if uppers:
+            month = max(uppers)
+        else:
+            oldest = sync_conn.execute(text("SELECT min(created_at) FROM prediction_history")).scalar()
+            month = month_start(oldest.astimezone(timezone.utc).date() if oldest else today)
+
+        while month < until:
+            name = partition_name(table, month)
+            sync_conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ({bound_literal(month)}) TO ({bound_literal(add_months(month, 1))})"
+            ))
+            created.append(name)
+            month = add_months(month, 1)
+    return created
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def archive_table(engine: AsyncEngine, name: str, archive_dir: str) -> str:
+    """
+    Tulis seluruh isi tabel ke <archive_dir>/<name>.csv.gz lewat server-side
+    cursor (memori konstan). File ditulis ke .tmp lalu di-rename agar arsip
+    yang ada selalu lengkap.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    tmp_path = f"{path}.tmp"
+
+    async with engine.connect() as conn:
+        result = await conn.stream(
+            text(f"SELECT * FROM {name}").execution_options(yield_per=ARCHIVE_BATCH_SIZE)
+        )
+        with gzip.open(tmp_path, "wt", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(result.keys())
+            async for rows in result.partitions(ARCHIVE_BATCH_SIZE):
+                # Kompresi gzip di thread agar event loop tidak tertahan
+                await asyncio.to_thread(writer.writerows, [[_csv_value(v) for v in row] for row in rows])
+
+    os.replace(tmp_path, path)
+    return path
+
+
+async def _detach(engine: AsyncEngine, table: str, partition: Partition) -> None:
+    # CONCURRENTLY tidak boleh di dalam transaksi. DETACH yang terputus di tengah
+    # meninggalkan status "detach pending" → diselesaikan dengan FINALIZE
+    mode = "FINALIZE" if partition.detach_pending else "CONCURRENTLY"
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition.name} {mode}"))
+
+
+async def _detached_tables(engine: AsyncEngine, table: str) -> list[str]:
+    """Partisi milik `table` yang sudah ter-detach tapi belum diarsipkan."""
+    async with engine.connect() as conn:
+        result = await conn.execute(text(
+            "SELECT relname FROM pg_class "
+            "WHERE relkind = 'r' AND NOT relispartition AND relname ~ :pattern ORDER BY relname"
+        ), {"pattern": f"^{table}_(p[0-9]{{6}}|legacy)$"})
+        return list(result.scalars())
+
+
+RETAIN_FEEDBACK_SQL = """
+INSERT INTO retained_feedback_items (
+    history_id, position, converted_years, city, job_level,
+    predicted_salary, actual_salary, created_at
+)
+SELECT history_id, position, converted_years, city, job_level,
+       predicted_salary, actual_salary, created_at
+FROM {name}
+WHERE actual_salary IS NOT NULL
+ON CONFLICT (history_id, position) DO NOTHING
+"""
+
+
+async def apply_retention(
+    engine: AsyncEngine,
+    retention_months: int,
+    archive_dir: str,
+    keep_feedback: bool = True,
+    today: date | None = None,
+) -> list[str]:
+    """
+    Arsipkan partisi yang batas atasnya <= awal bulan ini - retention_months.
+
+    Args:
+        retention_months : jumlah bulan penuh (selain bulan berjalan) yang dipertahankan
+        archive_dir      : folder tujuan file .csv.gz
+        keep_feedback    : salin item ber-feedback ke retained_feedback_items sebelum di-drop
+
+    Returns:
+        path file arsip yang ditulis
+    """
+    cutoff = add_months(month_start(today or _today()), -retention_months)
+    archived = []
+
+    for table in PARTITIONED_TABLES:
+        async with engine.begin() as conn:
+            if await conn.run_sync(relkind, table) != "p":
+                continue
+            partitions = await conn.run_sync(list_partitions, table)
+
+        for partition in partitions:
+            if partition.upper is not None and partition.upper <= cutoff:
+                logger.info(f"📦 Detach partisi {partition.name} (< {cutoff})")
+                await _detach(engine, table, partition)
+
+        # Termasuk sisa run sebelumnya yang terhenti setelah detach
+        for name in await _detached_tables(engine, table):
+            if keep_feedback and table == "prediction_items":
+                async with engine.begin() as conn:
+                    await conn.execute(text(RETAIN_FEEDBACK_SQL.format(name=name)))
+            path = await archive_table(engine, name, archive_dir)
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP TABLE {name}"))
+            logger.info(f"🗄️  Partisi {name} diarsipkan ke {path}")
+            archived.append(path)
+
+    return archived
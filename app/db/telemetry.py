@@ -0,0 +1,118 @@
+"""
+app/db/telemetry.py — Telemetri pool koneksi & statement SQL per engine
+
+Dipasang oleh app/db/database.py pada engine tulis dan engine baca:
+- waktu tunggu checkout koneksi dari pool (histogram, termasuk membuka koneksi
+  overflow baru), jumlah checkout yang timeout (pool habis)
+- koneksi yang sedang dipakai + puncaknya, checkout saat pool_size sudah habis
+  (dilayani koneksi overflow atau harus menunggu)
+- latensi setiap statement, dikelompokkan per fungsi service yang memanggilnya
+  (ditandai dengan @track_operation; statement lain masuk ke "other")
+
+Snapshot ditampilkan di /admin/metrics (per worker).
+"""
+
+import functools
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.utils.metrics import Histogram
+
+CHECKOUT_WAIT_MS_BUCKETS = [0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000, 5000, 30000]
+STATEMENT_MS_BUCKETS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+# Fungsi service yang sedang berjalan di task ini (label latensi statement)
+_operation: ContextVar[str] = ContextVar("db_operation", default="other")
+
+
+def track_operation(name: str):
+    """Decorator fungsi service async: statement di dalamnya dilabeli `name`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            token = _operation.set(name)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                _operation.reset(token)
+        return wrapper
+    return decorator
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool yang mengukur lama connect() (menunggu slot + buka koneksi)."""
+
+    telemetry: "EngineTelemetry | None" = None
+
+    def connect(self):
+        # Dicek sebelum checkout: koneksi yang sedang dibuka sudah ikut terhitung
+        # di checkedout(), jadi setelahnya semua checkout paralel tampak overflow
+        if self.checkedout() >= self.size():
+            self.telemetry.overflow_checkouts += 1
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.telemetry.checkout_timeouts += 1
+            raise
+        finally:
+            self.telemetry.checkout_wait_ms.observe((time.perf_counter() - started) * 1000)
+        self.telemetry.on_checkout(self)
+        return connection
+
+
+class EngineTelemetry:
+    def __init__(self):
+        self.checkout_wait_ms = Histogram(CHECKOUT_WAIT_MS_BUCKETS)
+        self.checkout_timeouts = 0
+        self.overflow_checkouts = 0
+        self.peak_checked_out = 0
+        self.statement_ms: dict[str, Histogram] = {}
+        self._engine: AsyncEngine | None = None
+
+    def pool_class(self) -> type[InstrumentedPool]:
+        """
+        Kelas pool untuk create_async_engine(poolclass=...). Subclass per engine
+        karena pool.recreate() (engine.dispose) membuat instance baru dari kelas yang sama.
+        """
+        return type("InstrumentedPool", (InstrumentedPool,), {"telemetry": self})
+
+    def attach(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_execute)
+
+    def on_checkout(self, pool) -> None:
+        self.peak_checked_out = max(self.peak_checked_out, pool.checkedout())
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._telemetry_started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_telemetry_started", None)
+        if started is None:
+            return
+        name = _operation.get()
+        histogram = self.statement_ms.get(name)
+        if histogram is None:
+            histogram = self.statement_ms[name] = Histogram(STATEMENT_MS_BUCKETS)
+        histogram.observe((time.perf_counter() - started) * 1000)
+
+    def metrics(self) -> dict:
+        pool = self._engine.sync_engine.pool if self._engine is not None else None
+        return {
+            "pool_size": pool.size() if pool is not None else None,
+            "checked_out": pool.checkedout() if pool is not None else 0,
+            "overflow": max(pool.overflow(), 0) if pool is not None else 0,
+            "peak_checked_out": self.peak_checked_out,
+            "overflow_checkouts": self.overflow_checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "checkout_wait_ms": self.checkout_wait_ms.snapshot(),
+            "statement_ms": {name: h.snapshot() for name, h in sorted(self.statement_ms.items())},
+        }
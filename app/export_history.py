@@ -0,0 +1,64 @@
+"""
+app/export_history.py — CLI export histori prediksi (CSV / Parquet)
+
+    python -m app.export_history histori.parquet
+    python -m app.export_history histori.csv --start 2025-01-01 --end 2025-02-01
+
+Format ditentukan dari ekstensi file output. Data dibaca lewat server-side
+cursor dan ditulis per partisi — memori konstan untuk jutaan baris.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+# Windows CMD Unicode patch
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding="utf-8")
+
+from app.db.database import ReadSessionLocal, read_engine
+from app.services.history_export import DEFAULT_BATCH_SIZE, export_history
+
+
+async def run_export(output_path: str, start: datetime | None, end: datetime | None, batch_size: int) -> int:
+    """Tulis export ke file. Returns jumlah byte yang ditulis."""
+    fmt = os.path.splitext(output_path)[1].lstrip(".").lower()
+    written = 0
+    try:
+        async with ReadSessionLocal() as session:
+            stream = export_history(session, fmt, start, end, batch_size)
+            with open(output_path, "wb") as f:
+                async for part in stream:
+                    f.write(part)
+                    written += len(part)
+    finally:
+        await read_engine.dispose()
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.export_history",
+        description="Export tabel prediction_history ke CSV / Parquet.",
+    )
+    parser.add_argument("output", help="File output (.csv atau .parquet)")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="Batas bawah created_at (ISO 8601, inklusif)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Batas atas created_at (ISO 8601, eksklusif)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Baris per partisi cursor")
+    args = parser.parse_args(argv)
+
+    print(f"🔄 Export histori → '{args.output}'")
+    started = time.perf_counter()
+    try:
+        written = asyncio.run(run_export(args.output, args.start, args.end, args.batch_size))
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ Selesai: {written / 1_000_000:,.1f} MB dalam {time.perf_counter() - started:.1f} detik")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,62 @@
 import joblib
 import logging
+import numpy as np
 import os
 import sys
+import uuid
 import sentry_sdk
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Depends, Request
+from datetime import date, datetime
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.concurrency import run_in_threadpool
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from slowapi.middleware import SlowAPIMiddleware
 from fastapi_cache import FastAPICache
-from fastapi_cache.decorator import cache
 from fastapi_cache.backends.redis import RedisBackend
 from fastapi_cache.backends.inmemory import InMemoryBackend
 from redis import asyncio as aioredis
 
 from app.schemas.models import (
     SalaryInputV2, SalaryOutputV2, HealthOutput, HistoryOutput,
-    PaginatedHistoryOutput, UserCreate, UserResponse, Token, FeedbackInput,
+    PaginatedHistoryOutput, StatsOutput, UserCreate, UserResponse, Token, FeedbackInput,
+    BulkFeedbackInput, BulkFeedbackOutput, RoleUpdate, ApiKeyCreate, ApiKeyOutput, ApiKeyIssued,
 )
-from app.services.predictor import predict_salaries_v2
-from app.services.history import save_prediction, get_all_history, get_history_by_id, update_actual_salaries
+from app.services.predictor import build_prediction_result, encode_compact_result
+from app.services.scorer import build_scorer
+from app.services.batcher import PredictionBatcher
+from app.services.inference import InferenceBackend
+from app.services.prediction_cache import PredictionCache, model_fingerprint
+from app.services.history_writer import HistoryWriter
+from app.services.history_maintenance import HistoryMaintenance
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy
+from app.services.rate_limiter import RowRateLimiter, RateLimitExceeded
+from app.services.history_cache import history_cache, json_response
+from app.services.history_export import EXPORT_MEDIA_TYPES, check_export_format, export_history
+from app.services.streaming import (
+    detect_stream_format, stream_predictions, UploadStreamingResponse, OUTPUT_MEDIA_TYPES,
+)
+from app.services.columnar import (
+    code_table, columnar_row_limit, decode_payload, validate_columns, encode_response, to_history_result,
+)
+from app.services.history import (
+    save_prediction, get_all_history, get_history_by_id, get_history_by_request_id, normalize_filters,
+    update_actual_salaries, bulk_update_actual_salaries,
+)
+from app.services.stats import get_stats
 from app.services.auth import (
-    hash_password, verify_password, create_access_token,
-    get_current_user, require_admin_role,
+    create_access_token, get_current_user, require_admin_role, principal_cache, api_key_index,
+)
+from app.services.api_keys import issue_api_key, list_api_keys, revoke_api_key
+from app.services.principal_cache import Principal
+from app.db.database import (
+    get_db, get_read_db, engine, Base, AsyncSessionLocal, ReadSessionLocal,
+    DATABASE_URL, DATABASE_READ_URL, write_telemetry, read_telemetry,
 )
-from app.db.database import get_db, engine, Base
+from app.db.migrations import pending_migrations
+from app.db.partitions import ensure_partitions
 from app.db.models import User
 from ml.auto_retrain import retrain_model
 
@@ -44,6 +71,64 @@ logger = logging.getLogger(__name__)
 ml_models = {}
 APP_VERSION = "5.0.0"
 MODEL_VERSION = "salary-linear-v2"
+MODEL_PATH = "ml/gaji_model_v2.pkl"
+
+# Mode serving opsional: precompute seluruh domain prediksi ke tabel lookup saat model di-load
+PREDICTION_LOOKUP_TABLE = os.getenv("PREDICTION_LOOKUP_TABLE", "False").lower() in ("true", "1")
+
+# Micro-batching lintas request untuk /predict (opsional)
+PREDICT_BATCHING = os.getenv("PREDICT_BATCHING", "False").lower() in ("true", "1")
+PREDICT_BATCH_MAX_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "1024"))
+PREDICT_BATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "2"))
+
+# Backend eksekusi scorer: inline | thread | process
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "thread").lower()
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0")) or None
+
+# Ukuran chunk (baris) untuk /predict/stream
+PREDICT_STREAM_CHUNK_ROWS = int(os.getenv("PREDICT_STREAM_CHUNK_ROWS", "1000"))
+
+# Cache respons /predict untuk payload identik (detik, 0 = nonaktif)
+PREDICT_CACHE_TTL = int(os.getenv("PREDICT_CACHE_TTL", "0"))
+CACHE_PREFIX = "salary-api-cache"
+
+# Histori /predict ditulis di background (write-behind) — false = tulis langsung di request
+HISTORY_WRITE_BEHIND = os.getenv("HISTORY_WRITE_BEHIND", "True").lower() in ("true", "1")
+HISTORY_QUEUE_MAX = int(os.getenv("HISTORY_QUEUE_MAX", "10000"))
+HISTORY_FLUSH_ROWS = int(os.getenv("HISTORY_FLUSH_ROWS", "500"))
+HISTORY_FLUSH_MS = float(os.getenv("HISTORY_FLUSH_MS", "200"))
+HISTORY_FLUSH_RETRY_MS = float(os.getenv("HISTORY_FLUSH_RETRY_MS", "500"))
+
+# Partisi bulanan histori: job terjadwal (jam, 0 = nonaktif) + retensi (bulan, 0 = simpan semua)
+HISTORY_MAINTENANCE_HOURS = float(os.getenv("HISTORY_MAINTENANCE_HOURS", "24"))
+HISTORY_PARTITION_MONTHS_AHEAD = int(os.getenv("HISTORY_PARTITION_MONTHS_AHEAD", "3"))
+HISTORY_RETENTION_MONTHS = int(os.getenv("HISTORY_RETENTION_MONTHS", "0"))
+HISTORY_ARCHIVE_DIR = os.getenv("HISTORY_ARCHIVE_DIR", "archive")
+HISTORY_RETAIN_FEEDBACK = os.getenv("HISTORY_RETAIN_FEEDBACK", "True").lower() in ("true", "1")
+
+# Hashing password bcrypt di thread pool khusus (bukan di event loop)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+
+# Rate limit endpoint prediksi: baris per user per window, dibagi lintas worker via Redis (0 = nonaktif).
+# Default 2000 ≈ anggaran lama (20 request/menit × maks 100 baris /predict)
+RATE_LIMIT_ROWS = int(os.getenv("RATE_LIMIT_ROWS", "2000"))
+RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
+RATE_LIMIT_BLOCK_ROWS = int(os.getenv("RATE_LIMIT_BLOCK_ROWS", "100"))
+
+# Kuota dipotong per chunk /predict/stream: chunk yang lebih besar dari kuota
+# tidak akan pernah lolos, jadi ukuran chunk dibatasi kuota
+if 0 < RATE_LIMIT_ROWS < PREDICT_STREAM_CHUNK_ROWS:
+    logger.warning(
+        f"⚠️  PREDICT_STREAM_CHUNK_ROWS ({PREDICT_STREAM_CHUNK_ROWS}) > RATE_LIMIT_ROWS "
+        f"({RATE_LIMIT_ROWS}) — chunk /predict/stream dibatasi {RATE_LIMIT_ROWS} baris"
+    )
+    PREDICT_STREAM_CHUNK_ROWS = RATE_LIMIT_ROWS
+
+# Aturan yang sama untuk /predict/columnar — batas ini juga yang dipublikasikan
+# di GET /predict/codes, jadi client tidak mengirim batch yang pasti 413
+COLUMNAR_MAX_ROWS = columnar_row_limit(RATE_LIMIT_ROWS)
 
 # --- Sentry (Error Tracking) ---
 SENTRY_DSN = os.getenv("SENTRY_DSN")
@@ -58,8 +143,70 @@ if SENTRY_DSN:
 else:
     logging.getLogger(__name__).info("ℹ️  SENTRY_DSN tidak diset — error tracking nonaktif.")
 
+inference_backend = InferenceBackend(
+    INFERENCE_BACKEND,
+    get_scorer=lambda: ml_models["scorer"],
+    model_path=MODEL_PATH,
+    use_lookup_table=PREDICTION_LOOKUP_TABLE,
+    workers=INFERENCE_WORKERS,
+)
+
+def activate_model(model, model_path: str = MODEL_PATH) -> None:
+    """
+    Jadikan `model` sebagai model aktif.
+    Scorer (termasuk tabel lookup) dibangun penuh dulu, baru ditukar dengan
+    satu assignment — request yang sedang berjalan tetap memakai scorer lama.
+    Worker process (INFERENCE_BACKEND=process) ikut di-reload dari model_path.
+    Fingerprint model baru membuat key cache prediksi lama tidak terpakai lagi.
+    """
+    scorer = build_scorer(model, use_lookup_table=PREDICTION_LOOKUP_TABLE)
+    ml_models["fingerprint"] = f"{MODEL_VERSION}:{model_fingerprint(model)}"
+    ml_models["gaji_model_v2"] = model
+    ml_models["scorer"] = scorer
+    if inference_backend.running:
+        inference_backend.reload(model_path)
+
+prediction_batcher = PredictionBatcher(
+    inference_backend.score,
+    max_batch_rows=PREDICT_BATCH_MAX_ROWS,
+    max_wait_ms=PREDICT_BATCH_MAX_WAIT_MS,
+) if PREDICT_BATCHING else None
+
+prediction_cache = PredictionCache(
+    FastAPICache.get_backend,
+    ttl_seconds=PREDICT_CACHE_TTL,
+    prefix=CACHE_PREFIX,
+) if PREDICT_CACHE_TTL > 0 else None
+
+history_writer = HistoryWriter(
+    AsyncSessionLocal,
+    max_queue=HISTORY_QUEUE_MAX,
+    flush_rows=HISTORY_FLUSH_ROWS,
+    flush_interval_ms=HISTORY_FLUSH_MS,
+    retry_backoff_ms=HISTORY_FLUSH_RETRY_MS,
+) if HISTORY_WRITE_BEHIND else None
+
+history_maintenance = HistoryMaintenance(
+    engine,
+    interval_hours=HISTORY_MAINTENANCE_HOURS,
+    months_ahead=HISTORY_PARTITION_MONTHS_AHEAD,
+    retention_months=HISTORY_RETENTION_MONTHS,
+    archive_dir=HISTORY_ARCHIVE_DIR,
+    keep_feedback=HISTORY_RETAIN_FEEDBACK,
+) if HISTORY_MAINTENANCE_HOURS > 0 else None
+
+password_hasher = PasswordHasher(
+    rounds=BCRYPT_ROUNDS,
+    workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+)
+
 # --- Rate Limiter ---
-limiter = Limiter(key_func=get_remote_address)
+rate_limiter = RowRateLimiter(
+    limit=RATE_LIMIT_ROWS,
+    window_seconds=RATE_LIMIT_WINDOW_SECONDS,
+    block_size=RATE_LIMIT_BLOCK_ROWS,
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -67,12 +214,24 @@ async def lifespan(app: FastAPI):
     logger.info("🔄 Menginisialisasi database...")
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # Tabel partitioned tanpa partisi menolak semua INSERT
+        await conn.run_sync(ensure_partitions, HISTORY_PARTITION_MONTHS_AHEAD)
     logger.info("✅ Tabel database siap!")
 
+    pending = await pending_migrations(engine)
+    if pending:
+        logger.warning(
+            f"⚠️  {len(pending)} migrasi database belum dijalankan "
+            f"(versi {[m.version for m in pending]}). Jalankan: python migrate_db.py"
+        )
+
+    if DATABASE_READ_URL != DATABASE_URL:
+        logger.info("✅ Query read-only (riwayat, statistik, export) diarahkan ke replica baca")
+
     # Load Model ML
     logger.info("🔄 Loading model ML V2...")
     try:
-        ml_models["gaji_model_v2"] = joblib.load("ml/gaji_model_v2.pkl")
+        activate_model(joblib.load(MODEL_PATH))
         logger.info("✅ Model V2 berhasil di-load ke memori! Siap melayani request.")
     except FileNotFoundError:
         logger.error("❌ File 'ml/gaji_model_v2.pkl' tidak ditemukan. Jalankan train_model_v2.py dulu!")
@@ -81,21 +240,61 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Error loading model: {e}")
         sys.exit(1)
 
+    await run_in_threadpool(inference_backend.start)
+    logger.info(f"✅ Backend inferensi: {inference_backend.mode}")
+
     # Inisialisasi Redis Cache
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+    redis_client = None
     try:
         redis_client = aioredis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
         await redis_client.ping()
-        FastAPICache.init(RedisBackend(redis_client), prefix="salary-api-cache")
-        logger.info(f"✅ Redis cache aktif! ({REDIS_URL})")
+        FastAPICache.init(RedisBackend(redis_client), prefix=CACHE_PREFIX)
+        rate_limiter.attach_redis(redis_client)
+        logger.info(f"✅ Redis cache & rate limiter bersama aktif! ({REDIS_URL})")
     except Exception as redis_err:
-        logger.warning(f"⚠️  Redis tidak tersedia ({redis_err}). Menggunakan in-memory cache.")
-        FastAPICache.init(InMemoryBackend(), prefix="salary-api-cache")
+        logger.warning(
+            f"⚠️  Redis tidak tersedia ({redis_err}). Menggunakan in-memory cache "
+            "dan rate limit per worker (Redis dicoba lagi secara berkala)."
+        )
+        FastAPICache.init(InMemoryBackend(), prefix=CACHE_PREFIX)
+        if redis_client is not None:
+            rate_limiter.attach_redis(redis_client, available=False)
+
+    if prediction_batcher is not None:
+        await prediction_batcher.start()
+        logger.info(
+            f"✅ Micro-batching aktif (maks {PREDICT_BATCH_MAX_ROWS} baris, "
+            f"tunggu maks {PREDICT_BATCH_MAX_WAIT_MS} ms)"
+        )
+
+    if history_writer is not None:
+        await history_writer.start()
+        logger.info(
+            f"✅ Write-behind histori aktif (flush tiap {HISTORY_FLUSH_ROWS} record / {HISTORY_FLUSH_MS} ms)"
+        )
+
+    await api_key_index.start()
+    logger.info(f"✅ Index API key aktif ({api_key_index.metrics()['active_keys']} key, refresh tiap {api_key_index.refresh_seconds} detik)")
+
+    if history_maintenance is not None:
+        await history_maintenance.start()
+        retention = f"{HISTORY_RETENTION_MONTHS} bulan" if HISTORY_RETENTION_MONTHS > 0 else "nonaktif"
+        logger.info(f"✅ Maintenance partisi histori tiap {HISTORY_MAINTENANCE_HOURS} jam (retensi: {retention})")
 
     yield 
 
     # Shutdown
     logger.info("🛑 Aplikasi berhenti. Membersihkan resource...")
+    await api_key_index.stop()
+    if history_maintenance is not None:
+        await history_maintenance.stop()
+    if history_writer is not None:
+        await history_writer.stop()
+    if prediction_batcher is not None:
+        await prediction_batcher.stop()
+    await run_in_threadpool(inference_backend.shutdown)
+    await run_in_threadpool(password_hasher.shutdown)
     ml_models.clear()
 
 
@@ -111,10 +310,6 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Pasang Rate Limiter sebagai middleware
-app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
-
 # =====================================
 #   INFO ENDPOINTS (Publik)
 # =====================================
@@ -149,6 +344,21 @@ def health_check():
 #   AUTH ENDPOINTS (Publik)
 # =====================================
 
+def _hasher_busy(e: PasswordHasherBusy) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+async def enforce_rate_limit(current_user: Principal, rows: int) -> None:
+    """Potong kuota baris user; 413 jika batch melebihi kuota, 429 jika kuota habis."""
+    if rows > rate_limiter.limit > 0:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch {rows} baris melebihi rate limit {rate_limiter.limit} baris per window",
+        )
+    try:
+        await rate_limiter.acquire(current_user.username, rows)
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 @app.post("/register", response_model=UserResponse, status_code=201, tags=["Auth"])
 async def register_user(data: UserCreate, db: AsyncSession = Depends(get_db)):
     """
@@ -163,9 +373,14 @@ async def register_user(data: UserCreate, db: AsyncSession = Depends(get_db)):
             detail=f"Username '{data.username}' sudah terdaftar"
         )
 
+    try:
+        hashed = await password_hasher.hash(data.password)
+    except PasswordHasherBusy as e:
+        raise _hasher_busy(e)
+
     user = User(
         username=data.username,
-        hashed_password=hash_password(data.password),
+        hashed_password=hashed,
         role="user",
     )
     db.add(user)
@@ -188,14 +403,28 @@ async def login(
     result = await db.execute(select(User).where(User.username == form_data.username))
     user = result.scalar_one_or_none()
 
-    if user is None or not verify_password(form_data.password, user.hashed_password):
+    try:
+        valid = user is not None and await password_hasher.verify(form_data.password, user.hashed_password)
+    except PasswordHasherBusy as e:
+        raise _hasher_busy(e)
+
+    if not valid:
         raise HTTPException(
             status_code=401,
             detail="Username atau password salah",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(data={"sub": user.username})
+    # BCRYPT_ROUNDS berubah → hash ulang dengan cost baru selagi password plain tersedia
+    if password_hasher.needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = await password_hasher.hash(form_data.password)
+            await db.commit()
+            password_hasher.rehashed += 1
+        except PasswordHasherBusy:
+            pass  # dicoba lagi di login berikutnya
+
+    access_token = create_access_token(data={"sub": user.username, "role": user.role})
     logger.info(f"🔑 User '{user.username}' berhasil login")
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -203,46 +432,93 @@ async def login(
 #   PREDIKSI ENDPOINT (Dilindungi JWT + Rate Limit)
 # =====================================
 
+def ensure_model_loaded() -> None:
+    if "gaji_model_v2" not in ml_models or ml_models["gaji_model_v2"] is None:
+        logger.critical("Model V2 hilang dari memori runtime!")
+        raise HTTPException(
+            status_code=500,
+            detail="Model machine learning tidak aktif"
+        )
+
+async def run_scorer(converted_years, city_codes, level_codes):
+    """Skor satu request lewat micro-batcher (jika aktif) atau langsung ke backend inferensi."""
+    if prediction_batcher is not None:
+        return await prediction_batcher.submit(converted_years, city_codes, level_codes)
+    return await inference_backend.score(converted_years, city_codes, level_codes)
+
+async def record_history(db: AsyncSession, result: dict) -> None:
+    """
+    Catat hasil prediksi ke histori: lewat antrean write-behind jika aktif,
+    atau langsung ke DB di dalam request. Kegagalan hanya di-log.
+    """
+    if history_writer is not None and history_writer.running:
+        history_writer.enqueue(result, MODEL_VERSION)
+        return
+    try:
+        await save_prediction(session=db, prediction_result=result, model_version=MODEL_VERSION)
+    except Exception as db_err:
+        logger.error(f"Gagal menyimpan histori ke DB: {db_err}")
+
+async def predict_with_cache(data: SalaryInputV2, request_id: str) -> tuple[list[float], bool, str]:
+    """
+    Prediksi lewat cache respons (jika PREDICT_CACHE_TTL aktif).
+    Returns: (prediksi mentah, from_cache, request_id request yang menghitung)
+    """
+    async def compute() -> list[float]:
+        raw = await run_scorer(data.converted_years, data.city_codes, data.level_codes)
+        return np.asarray(raw, dtype=float).tolist()
+
+    if prediction_cache is None:
+        return await compute(), False, request_id
+
+    key = prediction_cache.make_key(
+        ml_models["fingerprint"], data.converted_years, data.city_codes, data.level_codes,
+    )
+    return await prediction_cache.get_or_compute(key, compute, request_id)
+
 @app.post("/predict", response_model=SalaryOutputV2, tags=["Prediksi"])
-@limiter.limit("20/minute")
 async def predict_salary(
     request: Request,
     data: SalaryInputV2,
+    compact: bool = False,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Endpoint utama: prediksi gaji berdasarkan pengalaman kerja, kota, dan level jabatan.
     Mendukung batch processing (banyak orang sekaligus).
 
+    **Mode ringkas** (`?compact=true`): response hanya berisi `id` (ID request)
+    dan `estimated_salary_million`, tanpa echo input.
+
+    `request_id` (mode ringkas: `id`) menunjuk record histori prediksi ini —
+    cari lewat `GET /history/request/{request_id}`. Jika hasil diambil dari
+    cache prediksi, ID-nya milik request yang menghitung hasil tersebut.
+
     **Memerlukan JWT token** (header: `Authorization: Bearer <token>`).
-    **Rate limit**: 20 request per menit per IP.
+    **Rate limit**: dihitung per baris per user (RATE_LIMIT_ROWS per window).
     """
-    
-    if "gaji_model_v2" not in ml_models or ml_models["gaji_model_v2"] is None:
-        logger.critical("Model V2 hilang dari memori runtime!")
-        raise HTTPException(
-            status_code=500,
-            detail="Model machine learning tidak aktif"
-        )
+    await enforce_rate_limit(current_user, len(data.years_experience))
+    ensure_model_loaded()
     try:
-        result = await run_in_threadpool(
-            predict_salaries_v2,
-            ml_models["gaji_model_v2"],
-            data.years_experience,
-            data.city,
-            data.job_level
+        raw_predictions, from_cache, request_id = await predict_with_cache(data, uuid.uuid4().hex)
+        result = build_prediction_result(
+            data.years_experience, data.city, data.job_level,
+            data.converted_years, raw_predictions,
         )
 
-        try:
-            await save_prediction(
-                session=db,
-                prediction_result=result,
-                model_version=MODEL_VERSION,
+        # Hasil dari cache sudah tercatat di histori oleh request yang menghitungnya
+        # (request_id = ID record tersebut)
+        result["request_id"] = request_id
+        if not from_cache:
+            await record_history(db, result)
+
+        if compact:
+            # Lewati validasi & serialisasi ulang response_model
+            return Response(
+                content=encode_compact_result(result["request_id"], result["estimated_salary_million"]),
+                media_type="application/json",
             )
-        except Exception as db_err:
-            logger.error(f"Gagal menyimpan histori ke DB: {db_err}")
-            
         return result
 
     except ValueError as e:
@@ -255,59 +531,247 @@ async def predict_salary(
             detail="Terjadi kesalahan internal saat memproses data"
         )
 
+@app.get("/predict/codes", tags=["Prediksi"])
+def get_prediction_codes():
+    """
+    Tabel kode integer untuk endpoint /predict/columnar.
+    Indeks di list `city` / `job_level` = kode yang dikirim di payload.
+    `max_rows` = batas baris per request (dipotong RATE_LIMIT_ROWS jika lebih kecil).
+    """
+    return code_table(COLUMNAR_MAX_ROWS)
+
+@app.post("/predict/columnar", tags=["Prediksi"])
+async def predict_salary_columnar(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Prediksi batch untuk pemanggil machine-to-machine dengan payload biner kolumnar.
+
+    Body: `application/msgpack` atau `application/x-npz` berisi kolom
+    `years_experience` (float32, format Y.M), `city` dan `job_level` (uint8, kode
+    dari GET /predict/codes). Response: kolom `estimated_salary_million` (float32)
+    dalam format yang sama dengan request.
+
+    **Memerlukan JWT token**. **Rate limit**: dihitung per baris per user.
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        years, city_codes, level_codes = decode_payload(await request.body(), content_type)
+        years_ym, converted = validate_columns(years, city_codes, level_codes, max_rows=COLUMNAR_MAX_ROWS)
+    except LookupError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        logger.warning(f"Payload kolumnar tidak valid: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+
+    await enforce_rate_limit(current_user, len(converted))
+    ensure_model_loaded()
+    try:
+        raw_predictions = await run_scorer(converted, city_codes, level_codes)
+    except Exception as e:
+        logger.error(f"Error saat prediksi kolumnar: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Terjadi kesalahan internal saat memproses data"
+        )
+
+    await record_history(
+        db, to_history_result(years_ym, converted, city_codes, level_codes, raw_predictions),
+    )
+
+    body, media_type = encode_response(raw_predictions, content_type)
+    return Response(content=body, media_type=media_type)
+
+@app.post("/predict/stream", tags=["Prediksi"])
+async def predict_salary_stream(
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Prediksi bulk tanpa batas jumlah baris untuk job import HR.
+
+    Body: upload chunked `application/x-ndjson` atau `text/csv`
+    (kolom: years_experience, city, job_level). Data di-parse, divalidasi dan
+    diskor per chunk, dan hasilnya di-stream balik dalam format yang sama
+    segera setelah tiap chunk selesai — memori konstan berapa pun ukurannya.
+
+    **Memerlukan JWT token**. **Rate limit**: dihitung per baris per user, dipotong
+    per chunk — jika kuota habis di tengah stream, stream dihentikan dengan baris
+    error `row: -1`.
+    """
+    try:
+        fmt = detect_stream_format(request.headers.get("content-type", ""))
+    except LookupError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    # Kuota yang sudah habis langsung dijawab 429 sebelum upload dibaca
+    await enforce_rate_limit(current_user, 1)
+    ensure_model_loaded()
+
+    # 1 baris yang sudah dipotong di atas diperhitungkan ke chunk pertama,
+    # agar chunk sebesar kuota penuh tetap bisa lolos
+    prepaid = 1
+
+    async def score_chunk(converted, city_codes, level_codes):
+        nonlocal prepaid
+        rows, prepaid = len(converted) - prepaid, 0
+        try:
+            if rows > 0:
+                await rate_limiter.acquire(current_user.username, rows)
+        except RateLimitExceeded as e:
+            # ValueError → stream_predictions menutup stream dengan baris error
+            raise ValueError(str(e))
+        return await run_scorer(converted, city_codes, level_codes)
+
+    async def generate():
+        # Session dibuat di dalam generator: body response dikirim setelah endpoint return
+        async with AsyncSessionLocal() as session:
+            async for part in stream_predictions(
+                request.stream(), fmt, score_chunk, session,
+                model_version=MODEL_VERSION, chunk_size=PREDICT_STREAM_CHUNK_ROWS,
+            ):
+                yield part
+
+    logger.info(f"📥 Stream prediksi ({fmt}) dimulai oleh {current_user.username}")
+    return UploadStreamingResponse(generate(), media_type=OUTPUT_MEDIA_TYPES[fmt])
+
 # =====================================
 #   HISTORY ENDPOINTS (Dilindungi JWT)
 # =====================================
 
 @app.get("/history", response_model=PaginatedHistoryOutput, tags=["History"])
-@cache(expire=30)
 async def get_history(
     request: Request,
     page: int = 1,
     size: int = 10,
     city: str | None = None,
     job_level: str | None = None,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    cursor: str | None = None,
+    exact_total: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Ambil riwayat prediksi dengan paginasi dan filter opsional.
     **Memerlukan JWT token**.
 
-    - **page**: Nomor halaman (mulai dari 1)
+    - **page**: Nomor halaman (mulai dari 1), diabaikan jika `cursor` diisi
     - **size**: Jumlah item per halaman (default 10, maks 100)
     - **city**: (Opsional) Filter berdasarkan kota, contoh: `?city=jakarta`
     - **job_level**: (Opsional) Filter berdasarkan level, contoh: `?job_level=senior`
+      (kota / level di luar daftar valid → 422)
+    - **cursor**: (Opsional) `next_cursor` dari response sebelumnya — halaman
+      berikutnya tanpa OFFSET, tetap cepat sedalam apa pun
+    - **exact_total**: `true` → `total_data` dihitung persis (COUNT). Default
+      estimasi / cache singkat (`total_exact=false`)
+
+    Halaman di-cache per filter & parameter (HISTORY_CACHE_TTL) dan dibuang
+    saat ada prediksi / feedback baru yang terdampak. Response membawa `ETag`;
+    kirim `If-None-Match` untuk mendapat 304 jika halaman tidak berubah.
     """
     if page < 1:
         raise HTTPException(status_code=422, detail="Parameter 'page' harus >= 1")
     if size < 1 or size > 100:
         raise HTTPException(status_code=422, detail="Parameter 'size' harus antara 1-100")
+    try:
+        city, job_level = normalize_filters(city, job_level)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-    result = await get_all_history(
-        db, page=page, size=size,
-        filter_city=city, filter_level=job_level,
-    )
-    return result
+    async def compute() -> str:
+        result = await get_all_history(
+            db, page=page, size=size,
+            filter_city=city, filter_level=job_level,
+            cursor=cursor, exact_total=exact_total,
+        )
+        return PaginatedHistoryOutput.model_validate(result).model_dump_json()
+
+    try:
+        body = await history_cache.get_or_compute(
+            "page", history_cache.page_tags(city, job_level),
+            {"page": page, "size": size, "city": city, "job_level": job_level,
+             "cursor": cursor, "exact_total": exact_total},
+            compute,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return json_response(request, body)
+
+@app.get("/history/request/{request_id}", response_model=HistoryOutput, tags=["History"])
+async def get_history_by_request(
+    request_id: str,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Ambil riwayat prediksi berdasarkan `request_id` dari response /predict
+    (`id` pada mode ringkas). **Memerlukan JWT token**.
+
+    Dengan write-behind histori (HISTORY_WRITE_BEHIND) record baru tersedia
+    setelah flush berikutnya — 404 tepat setelah prediksi bisa dicoba lagi.
+    """
+    record = await get_history_by_request_id(db, request_id)
+    if record is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"History dengan request_id {request_id} tidak ditemukan!"
+        )
+    return record
 
 @app.get("/history/{history_id}", response_model=HistoryOutput, tags=["History"])
 async def get_history_detail(
+    request: Request,
     history_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Ambil detail satu riwayat prediksi berdasarkan ID.
     **Memerlukan JWT token**.
+
+    Di-cache sampai feedback record ini berubah. Response membawa `ETag`;
+    kirim `If-None-Match` untuk mendapat 304 jika record tidak berubah.
     """
-    record = await get_history_by_id(db, history_id)
+    async def compute() -> str:
+        record = await get_history_by_id(db, history_id)
+        if record is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"History dengan ID {history_id} tidak ditemukan!"
+            )
+        return HistoryOutput.model_validate(record).model_dump_json()
 
-    if record is None:
-        raise HTTPException(
-            status_code=404,
-            detail=f"History dengan ID {history_id} tidak ditemukan!"
-        )
-    return record
+    body = await history_cache.get_or_compute(
+        f"item:{history_id}", ["all", f"item:{history_id}"], {}, compute,
+    )
+    return json_response(request, body)
+
+@app.get("/stats", response_model=StatsOutput, tags=["History"])
+async def get_prediction_stats(
+    start: date | None = None,
+    end: date | None = None,
+    city: str | None = None,
+    job_level: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Statistik prediksi per hari × kota × level dari tabel rollup
+    (diperbarui saat prediksi / feedback ditulis, tanpa memindai histori).
+    **Memerlukan JWT token**.
+
+    - **start** / **end**: (Opsional) rentang hari UTC inklusif, default 30 hari terakhir
+    - **city** / **job_level**: (Opsional) filter, contoh `?city=jakarta&job_level=senior`
+
+    Setiap baris berisi `prediction_count`, `mean_predicted_salary`, dan
+    `mean_absolute_error` terhadap gaji aktual (null jika belum ada feedback).
+    """
+    try:
+        return await get_stats(db, start, end, filter_city=city, filter_level=job_level)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 # =====================================
 #   FEEDBACK ENDPOINT (Dilindungi JWT)
@@ -318,7 +782,7 @@ async def submit_feedback(
     history_id: int,
     data: FeedbackInput,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Submit gaji aktual (feedback) untuk sebuah prediksi yang sudah tersimpan.
@@ -338,13 +802,38 @@ async def submit_feedback(
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
 
+@app.put("/history/feedback/bulk", response_model=BulkFeedbackOutput, tags=["History"])
+async def submit_feedback_bulk(
+    data: BulkFeedbackInput,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Submit gaji aktual untuk banyak prediksi sekaligus (maks 10.000 per request).
+    **Memerlukan JWT token**.
+
+    Diterapkan per chunk dengan satu UPDATE set-based; validasi panjang
+    (`actual_salaries` = `data_count`) dilakukan di database. ID yang gagal
+    tidak membatalkan yang lain — lihat `status` per ID di `results`:
+    `updated`, `not_found`, atau `length_mismatch`.
+    """
+    results = await bulk_update_actual_salaries(
+        db, [(item.history_id, item.actual_salaries) for item in data.items],
+    )
+    updated = sum(1 for r in results if r["status"] == "updated")
+    logger.info(
+        f"📝 Feedback bulk oleh {current_user.username}: {updated} diterima, "
+        f"{len(results) - updated} gagal"
+    )
+    return {"updated": updated, "failed": len(results) - updated, "results": results}
+
 # =====================================
 #   ADMIN ENDPOINTS (Khusus Admin)
 # =====================================
 
 @app.post("/admin/retrain", tags=["Admin"])
 async def trigger_retrain(
-    current_user: User = Depends(require_admin_role),
+    current_user: Principal = Depends(require_admin_role),
 ):
     """
     Trigger retraining model AI menggunakan data feedback (actual_salaries).
@@ -366,4 +855,195 @@ async def trigger_retrain(
         raise HTTPException(
             status_code=500,
             detail=f"Retraining gagal: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@app.put("/admin/users/{username}/role", response_model=UserResponse, tags=["Admin"])
+async def update_user_role(
+    username: str,
+    data: RoleUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin_role),
+):
+    """
+    Ubah role user (`admin` / `user`). **Khusus admin**.
+
+    Principal user tersebut di-cache worker ini dibuang seketika; worker lain
+    mengikuti paling lambat setelah PRINCIPAL_CACHE_TTL.
+    """
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
+    if user is None:
+        raise HTTPException(status_code=404, detail=f"User '{username}' tidak ditemukan")
+
+    user.role = data.role
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.invalidate_user(username)
+
+    logger.info(f"👤 Role '{username}' diubah menjadi '{data.role}' oleh admin '{current_user.username}'")
+    return user
+
+@app.delete("/admin/users/{username}", status_code=204, tags=["Admin"])
+async def delete_user(
+    username: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin_role),
+):
+    """
+    Hapus user. Token miliknya langsung ditolak di worker ini; worker lain
+    paling lambat setelah PRINCIPAL_CACHE_TTL. **Khusus admin**.
+    """
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
+    if user is None:
+        raise HTTPException(status_code=404, detail=f"User '{username}' tidak ditemukan")
+
+    await db.delete(user)
+    await db.commit()
+    principal_cache.invalidate_user(username)
+
+    logger.info(f"🗑️  User '{username}' dihapus oleh admin '{current_user.username}'")
+    return Response(status_code=204)
+
+def _api_key_output(record, username: str, api_key: str | None = None) -> dict:
+    output = {
+        "id": record.id,
+        "name": record.name,
+        "username": username,
+        "key_prefix": record.key_prefix,
+        "created_at": record.created_at,
+        "revoked_at": record.revoked_at,
+    }
+    if api_key is not None:
+        output["api_key"] = api_key
+    return output
+
+@app.post("/admin/api-keys", response_model=ApiKeyIssued, status_code=201, tags=["Admin"])
+async def create_api_key(
+    data: ApiKeyCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin_role),
+):
+    """
+    Buat API key jangka panjang atas nama user (role mengikuti user tersebut).
+    **Khusus admin**.
+
+    `api_key` hanya ditampilkan di response ini — simpan di secret manager.
+    Pemanggil mengirimnya lewat header `X-API-Key` (atau `Authorization: Bearer`).
+    """
+    result = await db.execute(select(User).where(User.username == data.username))
+    user = result.scalar_one_or_none()
+    if user is None:
+        raise HTTPException(status_code=404, detail=f"User '{data.username}' tidak ditemukan")
+
+    record, api_key = await issue_api_key(db, data.name, user)
+    await api_key_index.refresh()
+
+    logger.info(f"🔐 API key '{data.name}' ({record.key_prefix}…) untuk '{user.username}' dibuat oleh admin '{current_user.username}'")
+    return _api_key_output(record, user.username, api_key)
+
+@app.get("/admin/api-keys", response_model=list[ApiKeyOutput], tags=["Admin"])
+async def get_api_keys(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin_role),
+):
+    """Daftar API key (aktif & sudah dicabut), terbaru dulu. **Khusus admin**."""
+    return [_api_key_output(record, username) for record, username in await list_api_keys(db)]
+
+@app.delete("/admin/api-keys/{key_id}", status_code=204, tags=["Admin"])
+async def delete_api_key(
+    key_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin_role),
+):
+    """
+    Cabut API key. Langsung ditolak di worker ini; worker lain paling lambat
+    setelah API_KEY_REFRESH_SECONDS. **Khusus admin**.
+    """
+    record = await revoke_api_key(db, key_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"API key dengan ID {key_id} tidak ditemukan")
+    await api_key_index.refresh()
+
+    logger.info(f"🔐 API key #{key_id} ({record.key_prefix}…) dicabut oleh admin '{current_user.username}'")
+    return Response(status_code=204)
+
+@app.get("/admin/history/export", tags=["Admin"])
+async def export_history_endpoint(
+    format: str = "csv",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    current_user: Principal = Depends(require_admin_role),
+):
+    """
+    Export seluruh histori prediksi (atau rentang `start <= created_at < end`)
+    sebagai CSV atau Parquet, di-stream langsung dari server-side cursor.
+    **Khusus admin**.
+
+    - **format**: `csv` (default) atau `parquet`
+    - **start** / **end**: (Opsional) batas waktu ISO 8601, contoh `?start=2025-01-01`
+    """
+    try:
+        check_export_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    async def generate():
+        # Session dibuat di dalam generator: body response dikirim setelah endpoint return
+        async with ReadSessionLocal() as session:
+            async for part in export_history(session, format, start, end):
+                yield part
+
+    filename = f"prediction_history.{format}"
+    logger.info(f"📤 Export histori ({format}) dimulai oleh admin '{current_user.username}'")
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.get("/admin/metrics", tags=["Admin"])
+async def get_metrics(
+    current_user: Principal = Depends(require_admin_role),
+):
+    """
+    Metrik runtime in-process (per worker).
+    **Khusus admin**.
+
+    - **inference**: mode backend eksekusi scorer
+    - **batcher**: distribusi ukuran batch dan queueing delay micro-batching
+      (null jika PREDICT_BATCHING nonaktif)
+    - **predict_cache**: hit / miss / request yang digabung (null jika PREDICT_CACHE_TTL=0)
+    - **history_cache**: hit / miss cache /history & /history/{id}, invalidasi tag
+    - **history_writer**: kedalaman antrean, record tertulis, flush diulang, record / baris dibuang,
+      record yang COMMIT-nya gagal dengan status tidak diketahui (uncertain_records)
+      (null jika HISTORY_WRITE_BEHIND nonaktif)
+    - **history_maintenance**: putaran job partisi / retensi, partisi dibuat / diarsipkan
+      (null jika HISTORY_MAINTENANCE_HOURS=0)
+    - **api_keys**: key aktif di index, hit / miss, refresh dari DB
+    - **principal_cache**: hit / miss cache principal per token, invalidasi user
+    - **password_hasher**: cost bcrypt, antrean hashing, request ditolak (503), hash ulang
+    - **rate_limiter**: backend kuota (`redis` / `local`), baris diloloskan, request
+      ditolak (429), panggilan Redis untuk reservasi blok dan error Redis
+    - **database**: per engine (`write` / `read`) — koneksi dipakai & puncaknya,
+      checkout overflow / timeout, histogram tunggu checkout, dan latensi
+      statement per fungsi service (save_prediction, get_all_history, get_current_user, ...)
+    """
+    return {
+        "inference": inference_backend.metrics(),
+        "batcher": prediction_batcher.metrics() if prediction_batcher is not None else None,
+        "predict_cache": prediction_cache.metrics() if prediction_cache is not None else None,
+        "history_cache": history_cache.metrics(),
+        "history_writer": history_writer.metrics() if history_writer is not None else None,
+        "history_maintenance": history_maintenance.metrics() if history_maintenance is not None else None,
+        "principal_cache": principal_cache.metrics(),
+        "api_keys": api_key_index.metrics(),
+        "password_hasher": password_hasher.metrics(),
+        "rate_limiter": rate_limiter.metrics(),
+        "database": {
+            "write": write_telemetry.metrics(),
+            "read": read_telemetry.metrics(),
+        },
+    }
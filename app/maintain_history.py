@@ -0,0 +1,64 @@
+"""
+app/maintain_history.py — CLI maintenance partisi & retensi histori
+
+    python -m app.maintain_history                           # siapkan partisi ke depan saja
+    python -m app.maintain_history --retention-months 12     # + arsipkan partisi > 12 bulan
+    python -m app.maintain_history --retention-months 12 --archive-dir /backup/histori --no-keep-feedback
+
+Sama dengan job terjadwal di dalam aplikasi (HISTORY_MAINTENANCE_HOURS), cocok
+untuk cron jika job di aplikasi dimatikan.
+"""
+
+import argparse
+import asyncio
+import sys
+
+# Windows CMD Unicode patch
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding="utf-8")
+
+from app.db.database import engine
+from app.db.partitions import DEFAULT_MONTHS_AHEAD
+from app.services.history_maintenance import HistoryMaintenance
+
+
+async def run(args) -> dict | None:
+    maintenance = HistoryMaintenance(
+        engine,
+        months_ahead=args.months_ahead,
+        retention_months=args.retention_months,
+        archive_dir=args.archive_dir,
+        keep_feedback=args.keep_feedback,
+    )
+    try:
+        return await maintenance.run_once()
+    finally:
+        await engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.maintain_history",
+        description="Buat partisi histori ke depan dan arsipkan partisi lama.",
+    )
+    parser.add_argument("--months-ahead", type=int, default=DEFAULT_MONTHS_AHEAD, help="Bulan ke depan yang disiapkan")
+    parser.add_argument("--retention-months", type=int, default=0, help="Bulan penuh yang dipertahankan (0 = tanpa retensi)")
+    parser.add_argument("--archive-dir", default="archive", help="Folder tujuan arsip .csv.gz")
+    parser.add_argument(
+        "--no-keep-feedback", dest="keep_feedback", action="store_false",
+        help="Jangan simpan item ber-feedback untuk retrain",
+    )
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(run(args))
+    if summary is None:
+        print("⏭️  Maintenance sedang dijalankan proses lain — dilewati")
+        return
+    print(f"✅ {len(summary['created'])} partisi dibuat")
+    for path in summary["archived"]:
+        print(f"   🗄️  {path}")
+    print(f"✅ {len(summary['archived'])} partisi diarsipkan")
+
+
+if __name__ == "__main__":
+    main()
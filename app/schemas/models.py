@@ -1,7 +1,11 @@
-from pydantic import BaseModel, Field, field_validator, model_validator
+import numpy as np
+from pydantic import BaseModel, Field, PrivateAttr, field_validator, model_validator
 from typing import List, Optional
-from datetime import datetime as dt
-from app.utils.constants import VALID_CITIES, VALID_JOB_LEVELS
+from datetime import date, datetime as dt
+from app.utils.constants import (
+    VALID_CITIES, VALID_JOB_LEVELS, MAX_YEARS_EXPERIENCE, CITY_CODES, JOB_LEVEL_CODES,
+)
+from app.utils.converters import convert_ym_array, encode_categories
 
 
 class SalaryInputV2(BaseModel):
@@ -35,27 +39,34 @@ class SalaryInputV2(BaseModel):
         description=f"Level posisi pekerjaan. Pilihan: {VALID_JOB_LEVELS}"
     )
 
+    # Hasil konversi Y.M → desimal, diisi SEKALI oleh convert_experience()
+    # lalu diteruskan ke predictor agar tidak dikonversi ulang
+    _converted_years: np.ndarray | None = PrivateAttr(default=None)
+
     @field_validator("years_experience")
     @classmethod
     def validate_experience(cls, values: List[float]) -> List[float]:
         """
-        Validasi aturan bisnis: format Y.M, max 100 data, maks 50 tahun.
-        Memanfaatkan convert_ym_to_years() untuk cek format bulan.
+        Validasi aturan bisnis: max 100 data, tidak negatif, maks 50 tahun.
+        Format bulan dicek sekaligus dikonversi di convert_experience().
         """
-        from app.utils.converters import convert_ym_to_years
-
         if not values:
             raise ValueError("List pengalaman tidak boleh kosong")
 
         if len(values) > 100:
             raise ValueError("Maksimal 100 data per request")
 
-        for val in values:
-            convert_ym_to_years(val)  # Akan raise ValueError jika format salah
-            if val > 50:
-                raise ValueError(
-                    f"Nilai '{val}' tidak wajar. Maksimal 50 tahun pengalaman"
-                )
+        arr = np.asarray(values, dtype=float)
+        negative = np.flatnonzero(arr < 0)
+        if negative.size:
+            raise ValueError(f"Pengalaman tidak boleh negatif: '{values[negative[0]]}'.")
+
+        too_large = np.flatnonzero(arr > MAX_YEARS_EXPERIENCE)
+        if too_large.size:
+            raise ValueError(
+                f"Nilai '{values[too_large[0]]}' tidak wajar. "
+                f"Maksimal {MAX_YEARS_EXPERIENCE} tahun pengalaman"
+            )
         return values
 
     @field_validator("city")
@@ -86,6 +97,38 @@ class SalaryInputV2(BaseModel):
             validated.append(val_lower)
         return validated
 
+    @model_validator(mode="after")
+    def convert_experience(self) -> "SalaryInputV2":
+        """
+        Konversi Y.M → tahun desimal untuk seluruh batch dalam satu pass vektor.
+        Hasilnya disimpan di `converted_years` untuk dipakai predictor.
+        """
+        converted, valid = convert_ym_array(self.years_experience)
+        invalid = np.flatnonzero(~valid)
+        if invalid.size:
+            raise ValueError(
+                f"Format tidak valid: '{self.years_experience[invalid[0]]}'. "
+                f"Bulan harus antara 0-11. "
+                f"Contoh: 2.6 (6 bulan), 2.11 (11 bulan), bukan 2.12"
+            )
+        self._converted_years = converted
+        return self
+
+    @property
+    def converted_years(self) -> np.ndarray:
+        """Pengalaman dalam tahun desimal (hasil convert_experience)."""
+        return self._converted_years
+
+    @property
+    def city_codes(self) -> np.ndarray:
+        """Kota sebagai kode integer (lihat CITY_CODES)."""
+        return encode_categories(self.city, CITY_CODES)
+
+    @property
+    def level_codes(self) -> np.ndarray:
+        """Level jabatan sebagai kode integer (lihat JOB_LEVEL_CODES)."""
+        return encode_categories(self.job_level, JOB_LEVEL_CODES)
+
     @model_validator(mode="after")
     def validate_equal_lengths(self) -> "SalaryInputV2":
         """
@@ -120,6 +163,7 @@ class SalaryOutputV2(BaseModel):
     converted_years_decimal: List[float]
     estimated_salary_million: List[float]
     message: str
+    request_id: str
 
 
 class HealthOutput(BaseModel):
@@ -142,18 +186,44 @@ class HistoryOutput(BaseModel):
     actual_salaries: Optional[List[float]] = None
     data_count: int
     model_version: str
+    request_id: Optional[str] = None
     created_at: dt
 
 
 class PaginatedHistoryOutput(BaseModel):
     """Schema response paginasi untuk endpoint /history."""
     total_data: int
+    total_exact: bool = True
     total_pages: int
-    current_page: int
+    current_page: Optional[int] = None
     page_size: int
+    next_cursor: Optional[str] = None
     items: List[HistoryOutput]
 
 
+class StatsSummary(BaseModel):
+    """Ringkasan agregat: jumlah prediksi, rata-rata gaji prediksi, MAE terhadap feedback."""
+    prediction_count: int
+    mean_predicted_salary: Optional[float] = None
+    feedback_count: int
+    mean_absolute_error: Optional[float] = None
+
+
+class StatsRow(StatsSummary):
+    """Satu baris rollup /stats (hari × kota × level)."""
+    day: date
+    city: Optional[str] = None
+    job_level: Optional[str] = None
+
+
+class StatsOutput(BaseModel):
+    """Schema response endpoint /stats."""
+    start: date
+    end: date
+    total: StatsSummary
+    items: List[StatsRow]
+
+
 class FeedbackInput(BaseModel):
     """Schema untuk mengirimkan gaji aktual (feedback) ke prediksi yang sudah tersimpan."""
     actual_salaries: List[float] = Field(
@@ -173,6 +243,40 @@ class FeedbackInput(BaseModel):
         return values
 
 
+class BulkFeedbackItem(FeedbackInput):
+    """Satu pasangan feedback di /history/feedback/bulk."""
+    history_id: int = Field(..., examples=[42])
+
+
+class BulkFeedbackInput(BaseModel):
+    """Schema untuk upload banyak feedback sekaligus (mis. hasil kontrak dari HR)."""
+    items: List[BulkFeedbackItem] = Field(..., min_length=1, max_length=10_000)
+
+    @field_validator("items")
+    @classmethod
+    def validate_unique_ids(cls, items: List[BulkFeedbackItem]) -> List[BulkFeedbackItem]:
+        seen = set()
+        for item in items:
+            if item.history_id in seen:
+                raise ValueError(f"history_id {item.history_id} muncul lebih dari sekali")
+            seen.add(item.history_id)
+        return items
+
+
+class BulkFeedbackResult(BaseModel):
+    """Hasil per ID: updated, not_found, atau length_mismatch."""
+    history_id: int
+    status: str
+    detail: Optional[str] = None
+
+
+class BulkFeedbackOutput(BaseModel):
+    """Schema response /history/feedback/bulk."""
+    updated: int
+    failed: int
+    results: List[BulkFeedbackResult]
+
+
 # --- Auth Schemas ---
 
 class UserCreate(BaseModel):
@@ -189,6 +293,30 @@ class UserResponse(BaseModel):
     role: str
     created_at: dt
 
+class RoleUpdate(BaseModel):
+    """Schema untuk mengubah role user (khusus admin)."""
+    role: str = Field(..., pattern="^(admin|user)$", examples=["admin"])
+
+class ApiKeyCreate(BaseModel):
+    """Schema untuk membuat API key atas nama user (khusus admin)."""
+    name: str = Field(..., min_length=1, max_length=100, examples=["batch-scoring-hr"])
+    username: str = Field(..., examples=["svc_batch"])
+
+
+class ApiKeyOutput(BaseModel):
+    """Metadata API key — key-nya sendiri tidak pernah ditampilkan lagi."""
+    id: int
+    name: str
+    username: str
+    key_prefix: str
+    created_at: dt
+    revoked_at: Optional[dt] = None
+
+
+class ApiKeyIssued(ApiKeyOutput):
+    """Response pembuatan API key: `api_key` hanya muncul sekali ini."""
+    api_key: str
+
 class Token(BaseModel):
     """Schema response setelah login berhasil."""
     access_token: str
@@ -0,0 +1,166 @@
+"""
+app/services/api_keys.py — API key service-to-service (alternatif JWT)
+
+Batch service tidak perlu login /token (verifikasi bcrypt) dan refresh JWT
+60 menit: cukup kirim header `X-API-Key: sal_...` (atau `Authorization:
+Bearer sal_...`).
+
+- Key = "sal_" + 256 bit acak, hanya ditampilkan sekali saat dibuat
+- Tabel api_keys menyimpan SHA-256 hex-nya — key acak sepanjang ini tidak
+  bisa di-brute-force, jadi hash cepat sudah cukup (bukan bcrypt)
+- Validasi = lookup dict in-memory hash → principal (O(1), tanpa DB)
+- Index dimuat ulang dari DB tiap refresh_seconds di setiap worker, jadi key
+  baru / pencabutan / perubahan role pemilik berlaku di semua worker dalam
+  hitungan detik. Worker yang mencabut key me-refresh saat itu juga
+"""
+
+import asyncio
+import hashlib
+import logging
+import secrets
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import ApiKey, User
+from app.services.principal_cache import Principal
+
+logger = logging.getLogger(__name__)
+
+API_KEY_PREFIX = "sal_"
+# Jumlah karakter awal key yang disimpan untuk identifikasi ("sal_" + 8)
+DISPLAY_PREFIX_LENGTH = len(API_KEY_PREFIX) + 8
+
+
+def generate_api_key() -> str:
+    return API_KEY_PREFIX + secrets.token_urlsafe(32)
+
+
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def is_api_key(credential: str) -> bool:
+    return credential.startswith(API_KEY_PREFIX)
+
+
+async def issue_api_key(session: AsyncSession, name: str, user: User) -> tuple[ApiKey, str]:
+    """Buat key baru atas nama `user`. Returns (record, key plain — tampilkan sekali)."""
+    api_key = generate_api_key()
+    record = ApiKey(
+        name=name,
+        user_id=user.id,
+        key_prefix=api_key[:DISPLAY_PREFIX_LENGTH],
+        key_hash=hash_api_key(api_key),
+    )
+    session.add(record)
+    await session.commit()
+    await session.refresh(record)
+    return record, api_key
+
+
+async def revoke_api_key(session: AsyncSession, key_id: int) -> ApiKey | None:
+    """Cabut key (idempoten). Returns None jika ID tidak ada."""
+    record = await session.get(ApiKey, key_id)
+    if record is None:
+        return None
+    if record.revoked_at is None:
+        record.revoked_at = datetime.now(timezone.utc)
+        await session.commit()
+        await session.refresh(record)
+    return record
+
+
+async def list_api_keys(session: AsyncSession) -> list[tuple[ApiKey, str]]:
+    """Semua key (termasuk yang sudah dicabut) beserta username pemiliknya, terbaru dulu."""
+    result = await session.execute(
+        select(ApiKey, User.username).join(User, User.id == ApiKey.user_id).order_by(ApiKey.id.desc())
+    )
+    return [(record, username) for record, username in result.all()]
+
+
+class ApiKeyIndex:
+    """
+    Index in-memory SHA-256 → Principal untuk key yang aktif.
+
+    Args:
+        session_factory : pembuat AsyncSession (primary — pencabutan harus segera terlihat)
+        refresh_seconds : jarak antar muat ulang dari DB
+    """
+
+    def __init__(self, session_factory, refresh_seconds: float = 5):
+        self.session_factory = session_factory
+        self.refresh_seconds = refresh_seconds
+        self._index: dict[str, Principal] = {}
+        self._task: asyncio.Task | None = None
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failed_refreshes = 0
+        self.last_refresh_at: float | None = None
+
+    def lookup(self, api_key: str) -> Principal | None:
+        principal = self._index.get(hash_api_key(api_key))
+        if principal is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return principal
+
+    async def refresh(self) -> None:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(ApiKey.key_hash, User.username, User.role)
+                .join(User, User.id == ApiKey.user_id)
+                .where(ApiKey.revoked_at.is_(None))
+            )
+            index = {key_hash: Principal(username, role) for key_hash, username, role in result.all()}
+        # Ganti dict sekaligus: lookup yang sedang berjalan tidak melihat index setengah jadi
+        self._index = index
+        self.refreshes += 1
+        self.last_refresh_at = time.time()
+
+    async def start(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            # Mis. migrasi api_keys belum dijalankan — JWT tetap berfungsi
+            self.failed_refreshes += 1
+            logger.warning(f"⚠️  Index API key gagal dimuat: {e}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Index lama tetap dipakai sampai refresh berikutnya berhasil
+                self.failed_refreshes += 1
+                logger.error(f"❌ Refresh index API key gagal: {e}")
+
+    def metrics(self) -> dict:
+        return {
+            "active_keys": len(self._index),
+            "refresh_seconds": self.refresh_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "failed_refreshes": self.failed_refreshes,
+            "last_refresh_at": self.last_refresh_at,
+        }
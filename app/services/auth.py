@@ -2,9 +2,10 @@
 app/services/auth.py — Service autentikasi JWT
 
 Berisi:
-- Hashing & verifikasi password (bcrypt langsung)
+- Hashing & verifikasi password (bcrypt langsung, versi async di password_hasher.py)
 - Generate & decode JWT token
-- Dependency `get_current_user` untuk melindungi endpoint
+- Dependency `get_current_user` untuk melindungi endpoint (principal di-cache per token,
+  atau API key service-to-service — lihat api_keys.py)
 - Dependency `require_admin_role` untuk endpoint admin-only
 """
 
@@ -13,14 +14,17 @@ from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from jose import JWTError, jwt
 import bcrypt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import get_db
+from app.db.database import AsyncSessionLocal, get_db
 from app.db.models import User
+from app.db.telemetry import track_operation
+from app.services.api_keys import ApiKeyIndex, is_api_key
+from app.services.principal_cache import Principal, PrincipalCache
 
 load_dotenv()
 
@@ -29,10 +33,31 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60  # Token berlaku 1 jam
 
+# Cache principal terverifikasi per token (detik, 0 = nonaktif) — request
+# terproteksi tidak perlu SELECT users selama entry masih berlaku
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+# true → klaim "role" di token dipercaya saat cache miss (tanpa DB sama sekali).
+# Konsekuensi: perubahan role di worker lain baru berlaku setelah token kedaluwarsa
+AUTH_TRUST_ROLE_CLAIM = os.getenv("AUTH_TRUST_ROLE_CLAIM", "False").lower() in ("true", "1")
+
+# Detik antar muat ulang index API key dari DB (= batas propagasi pencabutan ke worker lain)
+API_KEY_REFRESH_SECONDS = float(os.getenv("API_KEY_REFRESH_SECONDS", "5"))
+
+api_key_index = ApiKeyIndex(AsyncSessionLocal, refresh_seconds=API_KEY_REFRESH_SECONDS)
+
+principal_cache = PrincipalCache(
+    ttl_seconds=PRINCIPAL_CACHE_TTL,
+    max_size=PRINCIPAL_CACHE_SIZE,
+    revoke_window_seconds=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
 # --- Password Hashing ---
-def hash_password(password: str) -> str:
-    """Hash password menggunakan bcrypt."""
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+# Fungsi sync (memblokir ~cost bcrypt). Dari handler async, pakai PasswordHasher
+# (app/services/password_hasher.py) agar tidak menahan event loop
+def hash_password(password: str, rounds: int = 12) -> str:
+    """Hash password menggunakan bcrypt dengan cost `rounds`."""
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifikasi password plain terhadap hash."""
@@ -44,25 +69,35 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     Generate JWT token.
     
     Args:
-        data: Payload (biasanya {"sub": username})
+        data: Payload (biasanya {"sub": username, "role": role})
         expires_delta: Durasi kadaluwarsa (default: ACCESS_TOKEN_EXPIRE_MINUTES)
     """
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    now = datetime.now(timezone.utc)
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"exp": expire, "iat": now})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 # --- OAuth2 Scheme ---
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
+# auto_error=False: request boleh memakai JWT atau API key, dicek di get_current_user
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token", auto_error=False)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 # --- Dependencies ---
+@track_operation("get_current_user")
 async def get_current_user(
-    token: str = Depends(oauth2_scheme),
+    token: str | None = Depends(oauth2_scheme),
+    api_key: str | None = Depends(api_key_header),
     db: AsyncSession = Depends(get_db),
-) -> User:
+) -> Principal:
     """
-    FastAPI dependency: Ekstrak user dari JWT token.
+    FastAPI dependency: Ekstrak principal (username + role) dari JWT token
+    atau API key (`X-API-Key: sal_...` / `Authorization: Bearer sal_...`).
     Dipakai sebagai `Depends(get_current_user)` di endpoint yang dilindungi.
+
+    API key: lookup index in-memory. JWT: cache principal (tanpa decode & DB)
+    → klaim role di token jika AUTH_TRUST_ROLE_CLAIM aktif → SELECT users.
+    Hasil verifikasi JWT di-cache.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -70,6 +105,20 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    if api_key is None and token is not None and is_api_key(token):
+        api_key = token
+    if api_key is not None:
+        principal = api_key_index.lookup(api_key)
+        if principal is None:
+            raise credentials_exception
+        return principal
+    if token is None:
+        raise credentials_exception
+
+    principal = principal_cache.get(token) if principal_cache.enabled else None
+    if principal is not None:
+        return principal
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -78,17 +127,26 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalar_one_or_none()
-
-    if user is None:
-        raise credentials_exception
+    role = payload.get("role")
+    if (
+        AUTH_TRUST_ROLE_CLAIM
+        and role is not None
+        and not principal_cache.issued_before_revocation(username, payload.get("iat"))
+    ):
+        principal = Principal(username=username, role=role)
+    else:
+        result = await db.execute(select(User.username, User.role).where(User.username == username))
+        row = result.one_or_none()
+        if row is None:
+            raise credentials_exception
+        principal = Principal(username=row.username, role=row.role)
 
-    return user
+    principal_cache.put(token, principal, payload.get("exp", float("inf")))
+    return principal
 
 async def require_admin_role(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """
     Dependency: hanya mengizinkan user dengan role 'admin'.
     Dipakai untuk endpoint sensitif seperti /admin/retrain.
@@ -0,0 +1,145 @@
+"""
+app/services/batcher.py — Micro-batching lintas request untuk /predict
+
+Banyak request /predict kecil (1–5 baris) yang datang bersamaan dikumpulkan
+menjadi SATU panggilan scorer. Batch dikirim ketika:
+- jumlah baris mencapai max_batch_rows, atau
+- request pertama di batch sudah menunggu max_wait_ms
+
+Hasil dipecah kembali ke future milik masing-masing request.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app.utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+BATCH_ROW_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+QUEUE_DELAY_MS_BUCKETS = [0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250]
+
+
+@dataclass
+class _PendingRequest:
+    years: np.ndarray
+    city_codes: np.ndarray
+    level_codes: np.ndarray
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class PredictionBatcher:
+    """
+    Scheduler asyncio di antara endpoint dan scorer.
+
+    Args:
+        score_fn       : async callable (years, city_codes, level_codes) → np.ndarray
+        max_batch_rows : batas baris per batch. Satu request tidak pernah dipecah,
+                         jadi batch bisa melebihi batas ini maksimal 1 request
+        max_wait_ms    : waktu tunggu maksimal sejak request pertama masuk batch
+    """
+
+    def __init__(self, score_fn, max_batch_rows: int = 1024, max_wait_ms: float = 2.0):
+        self.score_fn = score_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+        self.batch_rows = Histogram(BATCH_ROW_BUCKETS)
+        self.batch_requests = Histogram(BATCH_ROW_BUCKETS)
+        self.queue_delay_ms = Histogram(QUEUE_DELAY_MS_BUCKETS)
+        self.failed_batches = 0
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Proses semua request yang sudah antre, lalu hentikan loop."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, years: np.ndarray, city_codes: np.ndarray, level_codes: np.ndarray) -> np.ndarray:
+        """Antrikan satu request dan tunggu prediksinya."""
+        if self._task is None:
+            raise RuntimeError("PredictionBatcher belum di-start")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingRequest(years, city_codes, level_codes, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            rows = len(first.years)
+            deadline = loop.time() + self.max_wait
+
+            while rows < self.max_batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                rows += len(item.years)
+
+            await self._dispatch(batch, rows)
+
+    async def _dispatch(self, batch: list[_PendingRequest], rows: int) -> None:
+        started = time.perf_counter()
+        for item in batch:
+            self.queue_delay_ms.observe((started - item.enqueued_at) * 1000)
+        self.batch_rows.observe(rows)
+        self.batch_requests.observe(len(batch))
+
+        try:
+            predictions = await self.score_fn(
+                np.concatenate([item.years for item in batch]),
+                np.concatenate([item.city_codes for item in batch]),
+                np.concatenate([item.level_codes for item in batch]),
+            )
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error(f"Batch prediksi gagal ({len(batch)} request, {rows} baris): {e}")
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        offsets = np.cumsum([len(item.years) for item in batch])[:-1]
+        for item, part in zip(batch, np.split(predictions, offsets)):
+            # Request yang sudah dibatalkan (client disconnect) dilewati saja
+            if not item.future.done():
+                item.future.set_result(part)
+
+    def metrics(self) -> dict:
+        return {
+            "max_batch_rows": self.max_batch_rows,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "failed_batches": self.failed_batches,
+            "batch_rows": self.batch_rows.snapshot(),
+            "batch_requests": self.batch_requests.snapshot(),
+            "queue_delay_ms": self.queue_delay_ms.snapshot(),
+        }
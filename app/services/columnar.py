@@ -0,0 +1,209 @@
+"""
+app/services/columnar.py — Codec payload biner kolumnar untuk /predict/columnar
+
+Untuk pemanggil machine-to-machine: tidak ada list JSON dan loop per elemen.
+Setiap kolom dikirim sebagai buffer NumPy:
+    years_experience : float32 little-endian, format Y.M (2.6 = 2 tahun 6 bulan)
+    city             : uint8, kode dari CITY_CODES
+    job_level        : uint8, kode dari JOB_LEVEL_CODES
+
+Format yang didukung (Content-Type):
+    application/msgpack  → map {kolom: bytes}; list angka biasa juga diterima
+    application/x-npz    → file .npz (np.savez) berisi array per kolom
+
+Response memakai format yang sama dengan request, kolom
+estimated_salary_million bertipe float32.
+"""
+
+import io
+
+import msgpack
+import numpy as np
+
+from app.utils.constants import VALID_CITIES, VALID_JOB_LEVELS, MAX_YEARS_EXPERIENCE
+from app.utils.converters import convert_ym_array
+
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack")
+NPZ_CONTENT_TYPES = ("application/x-npz",)
+
+# Batas baris per request kolumnar (SalaryInputV2 JSON dibatasi 100)
+MAX_COLUMNAR_ROWS = 10_000
+
+COLUMNS = {
+    "years_experience": np.dtype("<f4"),
+    "city": np.dtype("u1"),
+    "job_level": np.dtype("u1"),
+}
+
+_CITY_ARRAY = np.array(VALID_CITIES, dtype=object)
+_LEVEL_ARRAY = np.array(VALID_JOB_LEVELS, dtype=object)
+
+
+def columnar_row_limit(rate_limit_rows: int) -> int:
+    """
+    Batas baris efektif per request kolumnar. Request yang lebih besar dari
+    kuota rate limit per window (RATE_LIMIT_ROWS, 0 = nonaktif) tidak akan
+    pernah lolos, jadi batasnya ikut dipotong kuota.
+    """
+    if rate_limit_rows > 0:
+        return min(MAX_COLUMNAR_ROWS, rate_limit_rows)
+    return MAX_COLUMNAR_ROWS
+
+
+def code_table(max_rows: int = MAX_COLUMNAR_ROWS) -> dict:
+    """Tabel kode yang dipublikasikan lewat GET /predict/codes."""
+    return {
+        "city": VALID_CITIES,
+        "job_level": VALID_JOB_LEVELS,
+        "dtypes": {name: dtype.str for name, dtype in COLUMNS.items()},
+        "max_rows": max_rows,
+    }
+
+
+def _column(raw, name: str) -> np.ndarray:
+    dtype = COLUMNS[name]
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        if len(raw) % dtype.itemsize:
+            raise ValueError(f"Panjang buffer '{name}' bukan kelipatan {dtype.itemsize} byte")
+        return np.frombuffer(raw, dtype=dtype)
+
+    column = np.asarray(raw)
+    if column.ndim != 1:
+        raise ValueError(f"Kolom '{name}' harus 1 dimensi")
+    if dtype.kind == "u" and column.size:
+        if column.dtype.kind not in "iu":
+            raise ValueError(f"Kolom '{name}' harus berisi kode integer")
+        if column.min() < 0 or column.max() > np.iinfo(dtype).max:
+            raise ValueError(f"Kolom '{name}' berisi kode di luar rentang {dtype}")
+    return column.astype(dtype)
+
+
+def decode_payload(body: bytes, content_type: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode body request menjadi (years_f32, city_codes, level_codes).
+
+    Raises:
+        LookupError : content type tidak didukung
+        ValueError  : payload rusak / kolom tidak lengkap
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+
+    if media_type in MSGPACK_CONTENT_TYPES:
+        try:
+            payload = msgpack.unpackb(body, raw=False)
+        except Exception as e:
+            raise ValueError(f"Payload msgpack tidak valid: {e}")
+        if not isinstance(payload, dict):
+            raise ValueError("Payload msgpack harus berupa map {kolom: data}")
+    elif media_type in NPZ_CONTENT_TYPES:
+        try:
+            with np.load(io.BytesIO(body), allow_pickle=False) as npz:
+                payload = {name: npz[name] for name in npz.files}
+        except Exception as e:
+            raise ValueError(f"Payload .npz tidak valid: {e}")
+    else:
+        raise LookupError(
+            f"Content-Type '{media_type}' tidak didukung. "
+            f"Gunakan salah satu: {MSGPACK_CONTENT_TYPES + NPZ_CONTENT_TYPES}"
+        )
+
+    missing = [name for name in COLUMNS if name not in payload]
+    if missing:
+        raise ValueError(f"Kolom wajib tidak ada: {missing}")
+
+    try:
+        return tuple(_column(payload[name], name) for name in COLUMNS)
+    except (TypeError, ValueError, OverflowError) as e:
+        raise ValueError(f"Kolom tidak valid: {e}")
+
+
+def ym_from_float32(years: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Kembalikan nilai Y.M float32 ke desimal 2 digit terdekat.
+
+    float32(2.11) = 2.10999989... — tanpa langkah ini bulan ke-11 terbaca tidak valid.
+    Nilai yang bukan float32 terdekat dari bilangan 2 desimal ditandai tidak valid.
+    """
+    years = np.asarray(years)
+    if years.dtype != np.float32:
+        return np.asarray(years, dtype=float), np.ones(len(years), dtype=bool)
+
+    with np.errstate(invalid="ignore"):
+        rounded = np.round(years.astype(float), 2)
+        exact = rounded.astype(np.float32) == years
+    return rounded, exact
+
+
+def validate_columns(
+    years: np.ndarray, city_codes: np.ndarray, level_codes: np.ndarray, max_rows: int = MAX_COLUMNAR_ROWS,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Validasi vektor untuk payload kolumnar (maks `max_rows` baris).
+
+    Returns:
+        (years_ym, converted) — nilai Y.M (float64, 2 desimal) dan tahun desimalnya
+
+    Raises:
+        ValueError berisi jumlah baris tidak valid dan indeks pertamanya
+    """
+    lengths = {len(years), len(city_codes), len(level_codes)}
+    if len(lengths) > 1:
+        raise ValueError(
+            f"Panjang semua kolom harus sama. Saat ini: years_experience={len(years)}, "
+            f"city={len(city_codes)}, job_level={len(level_codes)}"
+        )
+    n = len(years)
+    if n == 0:
+        raise ValueError("Payload tidak boleh kosong")
+    if n > max_rows:
+        raise ValueError(f"Maksimal {max_rows} baris per request")
+
+    years_ym, exact = ym_from_float32(years)
+    converted, valid = convert_ym_array(years_ym)
+
+    checks = {
+        "years_experience": valid & exact & (years_ym <= MAX_YEARS_EXPERIENCE),
+        "city": city_codes < len(VALID_CITIES),
+        "job_level": level_codes < len(VALID_JOB_LEVELS),
+    }
+    for name, ok in checks.items():
+        if not ok.all():
+            bad = np.flatnonzero(~ok)
+            raise ValueError(
+                f"Kolom '{name}' berisi {bad.size} nilai tidak valid "
+                f"(baris pertama: {int(bad[0])})"
+            )
+
+    return years_ym, converted
+
+
+def to_history_result(
+    years_ym: np.ndarray, converted: np.ndarray,
+    city_codes: np.ndarray, level_codes: np.ndarray, predictions: np.ndarray,
+) -> dict:
+    """Bentuk dict yang sama dengan output predictor agar bisa disimpan oleh save_prediction()."""
+    return {
+        "input_years": years_ym.tolist(),
+        "converted_years_decimal": converted.tolist(),
+        "city": _CITY_ARRAY[city_codes].tolist(),
+        "job_level": _LEVEL_ARRAY[level_codes].tolist(),
+        "estimated_salary_million": np.round(predictions, 2).tolist(),
+    }
+
+
+def encode_response(predictions: np.ndarray, content_type: str) -> tuple[bytes, str]:
+    """Encode prediksi ke format yang sama dengan request."""
+    salaries = np.asarray(predictions, dtype="<f4")
+    media_type = content_type.split(";")[0].strip().lower()
+
+    if media_type in NPZ_CONTENT_TYPES:
+        buffer = io.BytesIO()
+        np.savez(buffer, estimated_salary_million=salaries)
+        return buffer.getvalue(), NPZ_CONTENT_TYPES[0]
+
+    body = msgpack.packb({
+        "estimated_salary_million": salaries.tobytes(),
+        "dtype": salaries.dtype.str,
+        "count": len(salaries),
+    })
+    return body, MSGPACK_CONTENT_TYPES[0]
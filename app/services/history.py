@@ -1,103 +1,333 @@
+import base64
+import json
 import math
+import time
+from datetime import datetime
+from typing import Iterable
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func
-from app.db.models import PredictionHistory
+from sqlalchemy import select, desc, func, insert, update, and_, or_, text, values, column, Integer, Float
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.db.models import PredictionHistory, PredictionItem
+from app.db.telemetry import track_operation
+from app.services.history_cache import history_cache, history_tags
+from app.services.stats import add_items_to_rollup, apply_feedback_delta
+from app.utils.constants import VALID_CITIES, VALID_JOB_LEVELS
 
-async def save_prediction(session: AsyncSession, prediction_result: dict, model_version: str) -> PredictionHistory:
+# Masa berlaku hitungan total yang di-cache per kombinasi filter (detik)
+COUNT_CACHE_TTL = 60
+
+# Di bawah angka ini estimasi pg_class diganti COUNT(*) biasa (masih murah,
+# dan reltuples belum akurat untuk tabel kecil yang jarang di-ANALYZE)
+EXACT_COUNT_THRESHOLD = 10_000
+
+# Key = (kota, level) hasil normalize_filters — hanya nilai VALID_*, jadi
+# jumlah key terbatas
+_count_cache: dict[tuple, tuple[float, int]] = {}
+
+# prediction_history adalah tabel partisi: autovacuum tidak pernah meng-ANALYZE
+# parent-nya (reltuples tetap -1), jadi estimasi = jumlah reltuples partisi.
+# Partisi yang belum di-ANALYZE (mis. bulan depan, masih kosong) dihitung 0.
+# Fallback ke reltuples tabel itu sendiri jika belum dipartisi.
+RELTUPLES_ESTIMATE_SQL = """
+SELECT COALESCE(
+    (SELECT SUM(GREATEST(child.reltuples, 0))::bigint
+     FROM pg_inherits
+     JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+     WHERE pg_inherits.inhparent = 'prediction_history'::regclass),
+    (SELECT reltuples::bigint FROM pg_class WHERE oid = 'prediction_history'::regclass)
+)
+"""
+
+# Pasangan (history_id, actual_salaries) per UPDATE ... FROM (VALUES ...) + commit
+FEEDBACK_BULK_CHUNK = 500
+
+def _record_values(prediction_result: dict, model_version: str) -> dict:
     """
-    Simpan Hasil Prediksi ke Database.
     Menggunakan .get() untuk field opsional agar kompatibel
     dengan berbagai versi output predictor.
     """
-    record = PredictionHistory(
-        input_years=prediction_result["input_years"],
-        converted_years=prediction_result["converted_years_decimal"],
-        city=prediction_result.get("city"),
-        job_level=prediction_result.get("job_level"),
-        predicted_salaries=prediction_result["estimated_salary_million"],
-        data_count=len(prediction_result["input_years"]),
-        model_version=model_version,
+    return {
+        "input_years": prediction_result["input_years"],
+        "converted_years": prediction_result["converted_years_decimal"],
+        "city": prediction_result.get("city"),
+        "job_level": prediction_result.get("job_level"),
+        "predicted_salaries": prediction_result["estimated_salary_million"],
+        "data_count": len(prediction_result["input_years"]),
+        "model_version": model_version,
+        "request_id": prediction_result.get("request_id"),
+    }
+
+def _build_record(prediction_result: dict, model_version: str) -> PredictionHistory:
+    return PredictionHistory(**_record_values(prediction_result, model_version))
+
+def _item_values(history_id: int, prediction_result: dict) -> list[dict]:
+    """Pecah satu hasil prediksi (array paralel) menjadi satu baris per kandidat."""
+    count = len(prediction_result["input_years"])
+    cities = prediction_result.get("city") or [None] * count
+    levels = prediction_result.get("job_level") or [None] * count
+    return [
+        {
+            "history_id": history_id,
+            "position": i,
+            "input_years": years,
+            "converted_years": converted,
+            "city": city,
+            "job_level": level,
+            "predicted_salary": salary,
+        }
+        for i, (years, converted, city, level, salary) in enumerate(zip(
+            prediction_result["input_years"],
+            prediction_result["converted_years_decimal"],
+            cities,
+            levels,
+            prediction_result["estimated_salary_million"],
+        ))
+    ]
+
+async def _insert_items(session: AsyncSession, history_ids: list[int], prediction_results: list[dict]) -> None:
+    rows = [
+        row
+        for history_id, result in zip(history_ids, prediction_results)
+        for row in _item_values(history_id, result)
+    ]
+    if rows:
+        await session.execute(insert(PredictionItem), rows)
+        await add_items_to_rollup(session, history_ids)
+
+async def sync_item_feedback(session: AsyncSession, history_ids: list[int]) -> None:
+    """
+    Salin actual_salaries parent ke kolom actual_salary tiap item
+    (UPDATE ... FROM prediction_history, satu statement untuk semua ID).
+    Rollup harian ikut dikoreksi: kontribusi feedback lama dikurangi, yang baru ditambahkan.
+    """
+    await apply_feedback_delta(session, history_ids, sign=-1)
+    await session.execute(
+        update(PredictionItem)
+        .where(
+            PredictionItem.history_id == PredictionHistory.id,
+            PredictionItem.created_at == PredictionHistory.created_at,
+            PredictionHistory.id.in_(history_ids),
+        )
+        .values(actual_salary=PredictionHistory.actual_salaries[PredictionItem.position + 1])
+        .execution_options(synchronize_session=False)
     )
+    await apply_feedback_delta(session, history_ids, sign=+1)
+
+async def invalidate_history_cache(
+    cities: Iterable[str | None] = (), levels: Iterable[str | None] = (), history_ids: Iterable[int] = (),
+) -> None:
+    """
+    Buang cache /history yang terdampak penulisan record ini (panggil SETELAH
+    commit). _count_cache sengaja tidak ikut dibuang: total memang estimasi
+    (total_exact=false) yang dibatasi COUNT_CACHE_TTL, dan membuangnya di setiap
+    flush write-behind membuat COUNT per filter berjalan hampir tiap request.
+    """
+    await history_cache.invalidate(history_tags(cities, levels, history_ids))
+
+@track_operation("save_prediction")
+async def save_prediction(session: AsyncSession, prediction_result: dict, model_version: str) -> PredictionHistory:
+    """
+    Simpan Hasil Prediksi ke Database.
+    """
+    record = _build_record(prediction_result, model_version)
     session.add(record)
+    await session.flush()
+    await _insert_items(session, [record.id], [prediction_result])
     await session.commit()
     await session.refresh(record)
+    await invalidate_history_cache(record.city or (), record.job_level or ())
 
     return record
 
+async def stage_prediction(session: AsyncSession, prediction_result: dict, model_version: str) -> None:
+    """
+    Tulis hasil prediksi ke transaksi yang sedang berjalan TANPA commit.
+    Dipakai /predict/stream: beberapa chunk per transaksi pendek, commit (dan invalidate_history_cache) oleh pemanggil.
+    Record dilepas dari session setelah flush agar memori tidak menumpuk.
+    """
+    record = _build_record(prediction_result, model_version)
+    session.add(record)
+    await session.flush()
+    await _insert_items(session, [record.id], [prediction_result])
+    session.expunge(record)
+
+@track_operation("insert_predictions")
+async def insert_predictions(session: AsyncSession, items: list[tuple[dict, str]]) -> None:
+    """
+    Tulis banyak hasil prediksi sekaligus (INSERT multi-row, tanpa refresh).
+    `items` berisi pasangan (prediction_result, model_version). Commit (dan
+    invalidate_history_cache) oleh pemanggil.
+    """
+    if not items:
+        return
+    inserted = await session.execute(
+        insert(PredictionHistory).returning(PredictionHistory.id, sort_by_parameter_order=True),
+        [_record_values(result, model_version) for result, model_version in items],
+    )
+    await _insert_items(session, inserted.scalars().all(), [result for result, _ in items])
+
+def encode_cursor(created_at: datetime, history_id: int) -> str:
+    """Cursor opaque (base64url) berisi posisi record terakhir di halaman."""
+    payload = json.dumps({"c": created_at.isoformat(), "i": history_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Kebalikan encode_cursor. Raises ValueError jika cursor rusak."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Parameter 'cursor' tidak valid") from None
+
+def normalize_filters(filter_city: str | None, filter_level: str | None) -> tuple[str | None, str | None]:
+    """
+    Huruf kecil-kan filter /history dan tolak nilai di luar VALID_CITIES /
+    VALID_JOB_LEVELS (nilainya jadi bagian key cache). Raises ValueError.
+    """
+    city = filter_city.lower() if filter_city else None
+    level = filter_level.lower() if filter_level else None
+    if city is not None and city not in VALID_CITIES:
+        raise ValueError(f"Kota '{city}' tidak valid. Pilih salah satu: {VALID_CITIES}")
+    if level is not None and level not in VALID_JOB_LEVELS:
+        raise ValueError(f"Level '{level}' tidak valid. Pilih salah satu: {VALID_JOB_LEVELS}")
+    return city, level
+
+def _filter_conditions(filter_city: str | None, filter_level: str | None) -> list:
+    """
+    Filter dicari di prediction_items (index city, job_level, created_at):
+    record cocok jika ada SATU kandidat yang memenuhi semua filter.
+    """
+    item_conditions = []
+    if filter_city:
+        item_conditions.append(PredictionItem.city == filter_city.lower())
+    if filter_level:
+        item_conditions.append(PredictionItem.job_level == filter_level.lower())
+
+    if not item_conditions:
+        return []
+    return [PredictionHistory.id.in_(select(PredictionItem.history_id).where(*item_conditions))]
+
+async def _exact_count(session: AsyncSession, conditions: list) -> int:
+    result = await session.execute(select(func.count(PredictionHistory.id)).where(*conditions))
+    return result.scalar_one()
+
+async def _cheap_count(session: AsyncSession, conditions: list, cache_key: tuple) -> int:
+    """
+    Total tanpa filter: estimasi planner (pg_class.reltuples), O(1).
+    Total dengan filter: COUNT(*) yang di-cache COUNT_CACHE_TTL detik per filter.
+    """
+    if not conditions:
+        estimate = (await session.execute(text(RELTUPLES_ESTIMATE_SQL))).scalar()
+        # reltuples = -1 jika tabel belum pernah di-ANALYZE
+        if estimate is not None and estimate >= EXACT_COUNT_THRESHOLD:
+            return estimate
+
+    now = time.monotonic()
+    cached = _count_cache.get(cache_key)
+    if cached is not None and now - cached[0] < COUNT_CACHE_TTL:
+        return cached[1]
+
+    total = await _exact_count(session, conditions)
+    _count_cache[cache_key] = (now, total)
+    return total
+
+@track_operation("get_all_history")
 async def get_all_history(
     session: AsyncSession,
     page: int = 1,
     size: int = 10,
     filter_city: str | None = None,
     filter_level: str | None = None,
+    cursor: str | None = None,
+    exact_total: bool = False,
 ) -> dict:
     """
     Ambil riwayat prediksi dengan paginasi dan filter opsional.
 
     Args:
         session      : Sesi database async
-        page         : Nomor halaman (mulai dari 1)
+        page         : Nomor halaman (mulai dari 1), diabaikan jika cursor diisi
         size         : Jumlah item per halaman
-        filter_city  : (Opsional) Filter berdasarkan kota (cari di dalam array)
+        filter_city  : (Opsional) Filter berdasarkan kota
         filter_level : (Opsional) Filter berdasarkan level jabatan
+        cursor       : (Opsional) next_cursor dari halaman sebelumnya → keyset
+                       pagination (WHERE pada index created_at, tanpa OFFSET)
+        exact_total  : True → COUNT(*) persis; False → estimasi / cache
+
+    Urutan selalu (created_at DESC, id DESC) agar cursor stabil
+    walau ada record dengan created_at yang sama.
 
     Returns:
-        dict berisi metadata paginasi dan list items
+        dict berisi metadata paginasi, list items, dan next_cursor
+        (None jika sudah halaman terakhir)
     """
-    # Base query conditions
-    conditions = []
+    conditions = _filter_conditions(filter_city, filter_level)
+    seek = decode_cursor(cursor) if cursor is not None else None
 
-    if filter_city:
-        # Cari row yang array 'city' mengandung nilai filter_city
-        conditions.append(
-            PredictionHistory.city.any(filter_city.lower())
-        )
-
-    if filter_level:
-        # Cari row yang array 'job_level' mengandung nilai filter_level
-        conditions.append(
-            PredictionHistory.job_level.any(filter_level.lower())
-        )
-
-    # Hitung total data (dengan filter)
-    count_query = select(func.count(PredictionHistory.id))
-    for cond in conditions:
-        count_query = count_query.where(cond)
-
-    total_result = await session.execute(count_query)
-    total_data = total_result.scalar_one()
+    if exact_total:
+        total_data = await _exact_count(session, conditions)
+    else:
+        cache_key = (filter_city and filter_city.lower(), filter_level and filter_level.lower())
+        total_data = await _cheap_count(session, conditions, cache_key)
 
     total_pages = max(1, math.ceil(total_data / size))
 
-    # Ambil data sesuai halaman (dengan filter)
-    offset = (page - 1) * size
     data_query = (
         select(PredictionHistory)
-        .order_by(desc(PredictionHistory.created_at))
-        .offset(offset)
-        .limit(size)
+        .where(*conditions)
+        .order_by(desc(PredictionHistory.created_at), desc(PredictionHistory.id))
+        .limit(size + 1)
     )
-    for cond in conditions:
-        data_query = data_query.where(cond)
+    if seek is not None:
+        after_created_at, after_id = seek
+        # created_at <= x di luar OR → tetap bisa memakai idx_prediction_created_at
+        data_query = data_query.where(
+            PredictionHistory.created_at <= after_created_at,
+            or_(
+                PredictionHistory.created_at < after_created_at,
+                and_(PredictionHistory.created_at == after_created_at, PredictionHistory.id < after_id),
+            ),
+        )
+    else:
+        data_query = data_query.offset((page - 1) * size)
 
     result = await session.execute(data_query)
     items = result.scalars().all()
 
+    # Ambil size + 1 baris: baris ekstra hanya penanda masih ada halaman berikutnya
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+
     return {
         "total_data": total_data,
+        "total_exact": exact_total,
         "total_pages": total_pages,
-        "current_page": page,
+        "current_page": None if seek is not None else page,
         "page_size": size,
+        "next_cursor": next_cursor,
         "items": items,
     }
 
+@track_operation("get_history_by_id")
 async def get_history_by_id(session: AsyncSession, history_id: int) -> PredictionHistory | None:
     result = await session.execute(
         select(PredictionHistory).where(PredictionHistory.id == history_id)
     )
     return result.scalar_one_or_none()
 
+@track_operation("get_history_by_request_id")
+async def get_history_by_request_id(session: AsyncSession, request_id: str) -> PredictionHistory | None:
+    """Record histori untuk correlation ID dari response /predict (None jika belum / tidak tercatat)."""
+    result = await session.execute(
+        select(PredictionHistory).where(PredictionHistory.request_id == request_id)
+    )
+    return result.scalars().first()
+
+@track_operation("update_actual_salaries")
 async def update_actual_salaries(
     session: AsyncSession,
     history_id: int,
@@ -113,7 +343,12 @@ async def update_actual_salaries(
     Returns:
         Record yang sudah diupdate
     """
-    record = await get_history_by_id(session, history_id)
+    # FOR UPDATE: feedback bersamaan untuk record yang sama diserialkan agar
+    # delta rollup (kurangi lama, tambah baru) tidak dihitung dua kali
+    result = await session.execute(
+        select(PredictionHistory).where(PredictionHistory.id == history_id).with_for_update()
+    )
+    record = result.scalar_one_or_none()
 
     if record is None:
         raise ValueError(f"History dengan ID {history_id} tidak ditemukan")
@@ -125,7 +360,85 @@ async def update_actual_salaries(
         )
 
     record.actual_salaries = actual_salaries
+    await session.flush()
+    await sync_item_feedback(session, [history_id])
     await session.commit()
     await session.refresh(record)
+    await invalidate_history_cache(record.city or (), record.job_level or (), [history_id])
+
+    return record
+
+async def _bulk_update_chunk(session: AsyncSession, pairs: list[tuple[int, list[float]]]) -> dict[int, tuple[str, str | None]]:
+    feedback = values(
+        column("history_id", Integer), column("actual_salaries", ARRAY(Float)), name="feedback",
+    ).data(sorted(pairs))
+
+    # Validasi panjang (= data_count) ikut di WHERE: baris yang tidak cocok tidak tersentuh
+    result = await session.execute(
+        update(PredictionHistory)
+        .where(
+            PredictionHistory.id == feedback.c.history_id,
+            func.cardinality(feedback.c.actual_salaries) == PredictionHistory.data_count,
+        )
+        .values(actual_salaries=feedback.c.actual_salaries)
+        .returning(PredictionHistory.id, PredictionHistory.city, PredictionHistory.job_level)
+        .execution_options(synchronize_session=False)
+    )
+    updated_rows = result.all()
+    updated = {row.id for row in updated_rows}
+
+    outcomes = {history_id: ("updated", None) for history_id in updated}
+    failed = {history_id: salaries for history_id, salaries in pairs if history_id not in updated}
+    if failed:
+        # Hanya untuk yang gagal: bedakan ID tidak ada vs panjang tidak cocok
+        data_counts = dict((await session.execute(
+            select(PredictionHistory.id, PredictionHistory.data_count).where(PredictionHistory.id.in_(failed))
+        )).all())
+        for history_id, salaries in failed.items():
+            if history_id not in data_counts:
+                outcomes[history_id] = ("not_found", f"History dengan ID {history_id} tidak ditemukan")
+            else:
+                outcomes[history_id] = ("length_mismatch", (
+                    f"Jumlah gaji aktual ({len(salaries)}) harus sama dengan "
+                    f"jumlah data prediksi ({data_counts[history_id]})"
+                ))
+
+    if updated:
+        await sync_item_feedback(session, sorted(updated))
+    await session.commit()
+    if updated:
+        await invalidate_history_cache(
+            [city for row in updated_rows for city in row.city or ()],
+            [level for row in updated_rows for level in row.job_level or ()],
+            updated,
+        )
+    return outcomes
+
+@track_operation("bulk_update_actual_salaries")
+async def bulk_update_actual_salaries(
+    session: AsyncSession,
+    feedback: list[tuple[int, list[float]]],
+    chunk_size: int = FEEDBACK_BULK_CHUNK,
+) -> list[dict]:
+    """
+    Update gaji aktual banyak record sekaligus: per chunk satu UPDATE ... FROM
+    (VALUES ...) set-based (baris terkunci oleh UPDATE itu sendiri),
+    lalu item & rollup disinkronkan dan di-commit. ID yang gagal tidak
+    membatalkan yang lain.
+
+    Args:
+        feedback   : pasangan (history_id, actual_salaries), history_id unik
+        chunk_size : pasangan per transaksi
+
+    Returns:
+        hasil per ID sesuai urutan input: {history_id, status, detail} dengan
+        status "updated", "not_found", atau "length_mismatch"
+    """
+    outcomes = {}
+    for start in range(0, len(feedback), chunk_size):
+        outcomes.update(await _bulk_update_chunk(session, feedback[start:start + chunk_size]))
 
-    return record
\ No newline at end of file
+    return [
+        {"history_id": history_id, "status": outcomes[history_id][0], "detail": outcomes[history_id][1]}
+        for history_id, _ in feedback
+    ]
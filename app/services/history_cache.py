@@ -0,0 +1,229 @@
+"""
+app/services/history_cache.py — Cache /history & /history/{id} dengan invalidasi berbasis event
+
+@cache(expire=30) dulu membuat user melihat halaman basi sampai 30 detik
+setelah prediksi / feedback baru, sementara halaman populer tetap dihitung
+ulang (COUNT + OFFSET) tiap 30 detik walau tidak ada perubahan. Key-nya juga
+ikut memuat repr AsyncSession per request, jadi cache hampir tidak pernah hit.
+
+Sekarang setiap entry ditandai tag dan key-nya memuat VERSI tag tersebut:
+
+    <prefix>:history:page:<versi tag>:<sha256(parameter halaman)>
+    <prefix>:history:item:<id>:<versi tag>
+
+Tag per entry:
+    halaman tanpa filter     : all, list
+    halaman ?city / ?job_level: all, city:<kota>, level:<level>
+    detail /history/{id}     : all, item:<id>
+
+Penulisan histori (prediksi baru, feedback) mengganti versi tag yang
+terdampak dengan token acak baru setelah commit — entry lama otomatis tidak
+terpakai lagi (dibiarkan kedaluwarsa oleh TTL). Versi disimpan di backend
+FastAPICache (Redis), jadi invalidasi berlaku untuk semua worker. Token acak
+tidak pernah berulang: versi yang hilang / kedaluwarsa hanya menyebabkan miss,
+tidak pernah menghidupkan entry lama.
+
+Dengan replica baca, request yang miss tepat setelah commit bisa membaca
+replica yang tertinggal dan menyimpan halaman lama di bawah versi baru.
+Karena itu versi diganti sekali lagi setelah replica_lag_seconds.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from typing import Awaitable, Callable, Iterable
+
+from fastapi import Request, Response
+from fastapi_cache import FastAPICache
+
+from app.db.database import DATABASE_URL, DATABASE_READ_URL
+
+logger = logging.getLogger(__name__)
+
+# Masa berlaku entry (detik, 0 = nonaktif) — batas atas basi untuk penulisan
+# di luar API (mis. CLI batch_score) yang tidak mengirim invalidasi
+HISTORY_CACHE_TTL = int(os.getenv("HISTORY_CACHE_TTL", "600"))
+HISTORY_CACHE_REPLICA_LAG = float(os.getenv(
+    "HISTORY_CACHE_REPLICA_LAG_SECONDS", "2" if DATABASE_READ_URL != DATABASE_URL else "0",
+))
+
+
+def history_tags(
+    cities: Iterable[str | None] = (), levels: Iterable[str | None] = (), history_ids: Iterable[int] = (),
+) -> set[str]:
+    """Tag yang terdampak penulisan record dengan kota / level / ID ini."""
+    tags = {"list"}
+    tags.update(f"city:{city.lower()}" for city in cities if city)
+    tags.update(f"level:{level.lower()}" for level in levels if level)
+    tags.update(f"item:{history_id}" for history_id in history_ids)
+    return tags
+
+
+def etag_for(body: str) -> str:
+    return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Perbandingan weak If-None-Match (RFC 9110): daftar dipisah koma, prefix W/ diabaikan."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in [c[2:] if c.startswith("W/") else c for c in candidates]
+
+
+def json_response(request: Request, body: str) -> Response:
+    """Response JSON ber-ETag; 304 tanpa body jika If-None-Match cocok."""
+    etag = etag_for(body)
+    # no-cache: client boleh menyimpan, tapi wajib revalidasi (murah: 304)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class HistoryCache:
+    """
+    Args:
+        get_backend         : callable yang mengembalikan backend FastAPICache aktif
+        ttl_seconds         : masa berlaku entry (0 = nonaktif)
+        prefix              : prefix key (biasanya FastAPICache.get_prefix())
+        replica_lag_seconds : jeda invalidasi kedua (0 = tanpa replica baca)
+    """
+
+    def __init__(
+        self,
+        get_backend: Callable,
+        ttl_seconds: int = 600,
+        prefix: str = "salary-api-cache",
+        replica_lag_seconds: float = 0,
+    ):
+        self._get_backend = get_backend
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.replica_lag_seconds = replica_lag_seconds
+        self._delayed: set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.backend_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _backend(self):
+        try:
+            return self._get_backend()
+        except AssertionError:
+            # FastAPICache belum di-init (mis. dipanggil dari CLI) → cache tidak dipakai
+            return None
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:history:tag:{tag}"
+
+    async def _versions(self, backend, tags: list[str]) -> str:
+        cached = await asyncio.gather(*(backend.get(self._tag_key(tag)) for tag in tags))
+        versions = []
+        for tag, version in zip(tags, cached):
+            if version is None:
+                version = uuid.uuid4().hex
+                await backend.set(self._tag_key(tag), version, expire=self.ttl_seconds * 2)
+            versions.append(version.decode() if isinstance(version, bytes) else version)
+        return ".".join(v[:12] for v in versions)
+
+    def page_tags(self, city: str | None, job_level: str | None) -> list[str]:
+        if not city and not job_level:
+            return ["all", "list"]
+        tags = ["all"]
+        if city:
+            tags.append(f"city:{city.lower()}")
+        if job_level:
+            tags.append(f"level:{job_level.lower()}")
+        return tags
+
+    async def get_or_compute(
+        self, name: str, tags: list[str], params: dict, compute: Callable[[], Awaitable[str]],
+    ) -> str:
+        """
+        Body JSON dari cache, atau hasil compute() yang lalu disimpan.
+
+        Args:
+            name   : jenis entry ("page" / "item:<id>")
+            tags   : tag entry (lihat docstring modul)
+            params : parameter yang membedakan entry dengan tag yang sama
+        """
+        backend = self._backend() if self.enabled else None
+        if backend is None:
+            return await compute()
+
+        try:
+            digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+            key = f"{self.prefix}:history:{name}:{await self._versions(backend, tags)}:{digest}"
+            cached = await backend.get(key)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"⚠️  Cache histori tidak bisa dibaca: {e}")
+            return await compute()
+
+        if cached is not None:
+            self.hits += 1
+            return cached.decode() if isinstance(cached, bytes) else cached
+
+        self.misses += 1
+        body = await compute()
+        try:
+            await backend.set(key, body, expire=self.ttl_seconds)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"⚠️  Cache histori tidak bisa ditulis: {e}")
+        return body
+
+    async def invalidate(self, tags: Iterable[str]) -> None:
+        """Ganti versi `tags` (panggil SETELAH commit). Error backend hanya di-log."""
+        backend = self._backend() if self.enabled else None
+        if backend is None:
+            return
+        tags = sorted(set(tags))
+        await self._bump(backend, tags)
+        if self.replica_lag_seconds > 0:
+            task = asyncio.create_task(self._bump_later(tags))
+            self._delayed.add(task)
+            task.add_done_callback(self._delayed.discard)
+
+    async def _bump(self, backend, tags: list[str]) -> None:
+        try:
+            await asyncio.gather(*(
+                backend.set(self._tag_key(tag), uuid.uuid4().hex, expire=self.ttl_seconds * 2)
+                for tag in tags
+            ))
+            self.invalidations += 1
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"⚠️  Invalidasi cache histori gagal ({tags}): {e}")
+
+    async def _bump_later(self, tags: list[str]) -> None:
+        await asyncio.sleep(self.replica_lag_seconds)
+        backend = self._backend()
+        if backend is not None:
+            await self._bump(backend, tags)
+
+    def metrics(self) -> dict:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "replica_lag_seconds": self.replica_lag_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "backend_errors": self.backend_errors,
+        }
+
+
+history_cache = HistoryCache(
+    FastAPICache.get_backend,
+    ttl_seconds=HISTORY_CACHE_TTL,
+    replica_lag_seconds=HISTORY_CACHE_REPLICA_LAG,
+)
@@ -0,0 +1,171 @@
+"""
+app/services/history_export.py — Export histori prediksi (CSV / Parquet) secara streaming
+
+Seluruh tabel prediction_history (atau rentang created_at) dibaca dalam SATU
+query memakai server-side cursor (session.stream + yield_per): baris diambil
+per partisi berukuran tetap dan langsung diserialisasi, jadi memori tetap
+konstan berapa pun jumlah barisnya. Tidak ada COUNT(*) maupun OFFSET.
+
+Kolom array (input_years, city, dst.) ditulis sebagai JSON list di CSV dan
+sebagai list<...> native di Parquet.
+
+Parquet memerlukan pyarrow (di-import saat dipakai saja).
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import PredictionHistory
+
+EXPORT_FORMATS = ("csv", "parquet")
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+DEFAULT_BATCH_SIZE = 5_000
+
+EXPORT_COLUMNS = (
+    "id", "created_at", "model_version", "data_count",
+    "input_years", "converted_years", "city", "job_level",
+    "predicted_salaries", "actual_salaries",
+)
+ARRAY_COLUMNS = {"input_years", "converted_years", "city", "job_level", "predicted_salaries", "actual_salaries"}
+
+
+async def iter_history_partitions(
+    session: AsyncSession,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> AsyncIterator[list]:
+    """
+    Yield list baris (Row) per partisi lewat server-side cursor.
+    Rentang waktu: start <= created_at < end.
+    """
+    query = select(*(getattr(PredictionHistory, name) for name in EXPORT_COLUMNS))
+    if start is not None:
+        query = query.where(PredictionHistory.created_at >= start)
+    if end is not None:
+        query = query.where(PredictionHistory.created_at < end)
+    query = query.order_by(PredictionHistory.id).execution_options(yield_per=batch_size)
+
+    result = await session.stream(query)
+    async for partition in result.partitions(batch_size):
+        yield partition
+
+
+async def iter_csv(partitions: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    yield (",".join(EXPORT_COLUMNS) + "\n").encode("utf-8")
+
+    async for rows in partitions:
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        for row in rows:
+            writer.writerow([
+                json.dumps(value) if name in ARRAY_COLUMNS and value is not None
+                else value.isoformat() if isinstance(value, datetime)
+                else value
+                for name, value in zip(EXPORT_COLUMNS, row)
+            ])
+        yield out.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    """File-like tujuan ParquetWriter: byte yang sudah ditulis diambil per row group."""
+
+    def __init__(self):
+        self.parts: list[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    floats = pa.list_(pa.float64())
+    strings = pa.list_(pa.string())
+    return pa.schema([
+        ("id", pa.int64()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("model_version", pa.string()),
+        ("data_count", pa.int32()),
+        ("input_years", floats),
+        ("converted_years", floats),
+        ("city", strings),
+        ("job_level", strings),
+        ("predicted_salaries", floats),
+        ("actual_salaries", floats),
+    ])
+
+
+async def iter_parquet(partitions: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    """Satu partisi = satu row group; byte dikirim begitu row group selesai ditulis."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for rows in partitions:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def check_export_format(fmt: str) -> None:
+    """
+    Validasi format (dan dependency-nya) sebelum response mulai dikirim.
+
+    Raises:
+        ValueError   : format tidak didukung
+        RuntimeError : format parquet tetapi pyarrow tidak terpasang
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format export '{fmt}' tidak didukung. Gunakan salah satu: {EXPORT_FORMATS}")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Export Parquet memerlukan pyarrow (pip install pyarrow)")
+
+
+def export_history(
+    session: AsyncSession,
+    fmt: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """Stream byte export dalam format `fmt` ("csv" / "parquet")."""
+    check_export_format(fmt)
+    partitions = iter_history_partitions(session, start, end, batch_size)
+    return iter_parquet(partitions) if fmt == "parquet" else iter_csv(partitions)
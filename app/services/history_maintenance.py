@@ -0,0 +1,139 @@
+"""
+app/services/history_maintenance.py — Job terjadwal partisi & retensi histori
+
+Setiap interval_hours (dan sekali saat start):
+1. ensure_partitions — siapkan partisi bulan-bulan ke depan
+2. apply_retention   — arsipkan partisi lama (hanya jika retention_months > 0)
+
+Dengan banyak worker uvicorn, hanya satu yang menjalankan job per putaran:
+pg_try_advisory_lock pada koneksi terpisah; worker lain melewati putaran itu.
+Job yang gagal dicatat di log + metrik lalu dicoba lagi pada putaran berikutnya.
+
+Bisa juga dijalankan manual / via cron: python -m app.maintain_history
+"""
+
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.partitions import DEFAULT_MONTHS_AHEAD, apply_retention, ensure_partitions
+from app.services.history_cache import history_cache
+
+logger = logging.getLogger(__name__)
+
+# Kunci advisory lock (bebas, asal unik di aplikasi ini)
+MAINTENANCE_LOCK_KEY = 7_301_017
+
+
+class HistoryMaintenance:
+    """
+    Args:
+        engine           : AsyncEngine aplikasi
+        interval_hours   : jarak antar putaran job
+        months_ahead     : jumlah bulan ke depan yang partisinya disiapkan
+        retention_months : bulan penuh yang dipertahankan (0 = retensi nonaktif)
+        archive_dir      : folder arsip .csv.gz
+        keep_feedback    : item ber-feedback tetap disimpan untuk retrain
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        interval_hours: float = 24,
+        months_ahead: int = DEFAULT_MONTHS_AHEAD,
+        retention_months: int = 0,
+        archive_dir: str = "archive",
+        keep_feedback: bool = True,
+    ):
+        self.engine = engine
+        self.interval = interval_hours * 3600
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.archive_dir = archive_dir
+        self.keep_feedback = keep_feedback
+        self._task: asyncio.Task | None = None
+
+        self.runs = 0
+        self.skipped_runs = 0
+        self.failed_runs = 0
+        self.partitions_created = 0
+        self.partitions_archived = 0
+        self.last_run_at: float | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> dict | None:
+        """
+        Satu putaran job. Returns ringkasan (partisi dibuat / arsip ditulis),
+        atau None jika worker lain sedang menjalankannya.
+        """
+        async with self.engine.connect() as lock_conn:
+            locked = (await lock_conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY},
+            )).scalar()
+            await lock_conn.commit()
+            if not locked:
+                self.skipped_runs += 1
+                return None
+            try:
+                async with self.engine.begin() as conn:
+                    created = await conn.run_sync(ensure_partitions, self.months_ahead)
+                archived = []
+                if self.retention_months > 0:
+                    archived = await apply_retention(
+                        self.engine, self.retention_months, self.archive_dir, self.keep_feedback,
+                    )
+            finally:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+                await lock_conn.commit()
+
+        if archived:
+            # Record lama hilang dari histori → semua halaman & detail yang di-cache basi
+            await history_cache.invalidate(["all"])
+
+        self.runs += 1
+        self.partitions_created += len(created)
+        self.partitions_archived += len(archived)
+        self.last_run_at = time.time()
+        return {"created": created, "archived": archived}
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                summary = await self.run_once()
+                if summary and (summary["created"] or summary["archived"]):
+                    logger.info(
+                        f"🗂️  Maintenance histori: {len(summary['created'])} partisi dibuat, "
+                        f"{len(summary['archived'])} partisi diarsipkan"
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed_runs += 1
+                logger.error(f"❌ Maintenance histori gagal: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def metrics(self) -> dict:
+        return {
+            "retention_months": self.retention_months,
+            "runs": self.runs,
+            "skipped_runs": self.skipped_runs,
+            "failed_runs": self.failed_runs,
+            "partitions_created": self.partitions_created,
+            "partitions_archived": self.partitions_archived,
+            "last_run_at": self.last_run_at,
+        }
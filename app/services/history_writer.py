@@ -0,0 +1,205 @@
+"""
+app/services/history_writer.py — Penulisan histori prediksi di background (write-behind)
+
+/predict tidak lagi menunggu INSERT + COMMIT + REFRESH ke PostgreSQL.
+Hasil prediksi dimasukkan ke antrean in-memory berukuran tetap, lalu task
+background menulisnya sebagai INSERT multi-row ketika:
+- jumlah record mencapai flush_rows, atau
+- record pertama di antrean sudah menunggu flush_interval_ms
+
+Flush yang gagal SEBELUM COMMIT (mis. failover / koneksi putus sesaat saat
+INSERT) dicoba ulang sekali setelah retry_backoff_ms; baru jika percobaan
+ulang juga gagal batch dibuang. COMMIT yang gagal tidak dicoba ulang: koneksi
+bisa putus setelah server sudah meng-commit, jadi mengulang batch berisiko
+menulis record ganda. Batch seperti itu dihitung di uncertain_records
+(mungkin tersimpan, mungkin tidak).
+Jika antrean penuh (DB lambat / mati), record baru DIBUANG — request /predict
+tidak pernah ikut tertahan. Yang dibuang dihitung di metrik dropped_records
+(record = request) dan dropped_rows (baris prediksi, jumlah data_count).
+Saat shutdown, seluruh isi antrean di-flush dulu.
+"""
+
+import asyncio
+import logging
+import time
+
+from app.services.history import insert_predictions, invalidate_history_cache
+from app.utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class CommitOutcomeUnknown(Exception):
+    """COMMIT gagal — transaksi mungkin sudah ter-commit di server, mungkin belum."""
+
+FLUSH_RECORD_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+FLUSH_MS_BUCKETS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000]
+
+
+class HistoryWriter:
+    """
+    Args:
+        session_factory   : pembuat AsyncSession (mis. AsyncSessionLocal)
+        max_queue         : kapasitas antrean (jumlah record)
+        flush_rows        : maks record per INSERT
+        flush_interval_ms : maks waktu tunggu sejak record pertama masuk antrean
+        retry_backoff_ms  : jeda sebelum mencoba ulang flush yang gagal (sekali)
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        max_queue: int = 10_000,
+        flush_rows: int = 500,
+        flush_interval_ms: float = 200,
+        retry_backoff_ms: float = 500,
+    ):
+        self.session_factory = session_factory
+        self.max_queue = max_queue
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.retry_backoff = retry_backoff_ms / 1000
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+        self.flush_records = Histogram(FLUSH_RECORD_BUCKETS)
+        self.flush_ms = Histogram(FLUSH_MS_BUCKETS)
+        self.written_records = 0
+        self.dropped_records = 0
+        self.dropped_rows = 0
+        self.retried_flushes = 0
+        self.failed_flushes = 0
+        self.uncertain_flushes = 0
+        self.uncertain_records = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush semua record yang sudah antre, lalu hentikan loop."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    def enqueue(self, prediction_result: dict, model_version: str) -> bool:
+        """
+        Antrikan satu hasil prediksi tanpa menunggu DB.
+        Returns False jika antrean penuh (record dibuang).
+        """
+        if self._task is None:
+            raise RuntimeError("HistoryWriter belum di-start")
+        try:
+            self._queue.put_nowait((prediction_result, model_version))
+        except asyncio.QueueFull:
+            self.dropped_records += 1
+            self.dropped_rows += len(prediction_result["input_years"])
+            if self.dropped_records == 1 or self.dropped_records % 1000 == 0:
+                logger.warning(f"⚠️  Antrean histori penuh, {self.dropped_records} record dibuang")
+            return False
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.flush_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _insert(self, batch: list[tuple[dict, str]]) -> None:
+        async with self.session_factory() as session:
+            await insert_predictions(session, batch)
+            try:
+                await session.commit()
+            except Exception as e:
+                raise CommitOutcomeUnknown(e) from e
+
+    async def _flush(self, batch: list[tuple[dict, str]]) -> None:
+        started = time.perf_counter()
+        try:
+            await self._insert(batch)
+        except CommitOutcomeUnknown as e:
+            await self._commit_uncertain(batch, e)
+            return
+        except Exception as e:
+            # Gagal sebelum COMMIT → transaksi di-rollback seluruhnya, aman diulang tanpa duplikat
+            self.retried_flushes += 1
+            logger.warning(f"⚠️  Flush {len(batch)} record histori gagal ({e}), dicoba ulang")
+            await asyncio.sleep(self.retry_backoff)
+            try:
+                await self._insert(batch)
+            except CommitOutcomeUnknown as e:
+                await self._commit_uncertain(batch, e)
+                return
+            except Exception as e:
+                rows = sum(len(result["input_years"]) for result, _ in batch)
+                self.failed_flushes += 1
+                self.dropped_records += len(batch)
+                self.dropped_rows += rows
+                logger.error(f"Gagal menyimpan {len(batch)} record histori ({rows} baris) ke DB: {e}")
+                return
+
+        await self._invalidate(batch)
+        self.written_records += len(batch)
+        self.flush_records.observe(len(batch))
+        self.flush_ms.observe((time.perf_counter() - started) * 1000)
+
+    async def _commit_uncertain(self, batch: list[tuple[dict, str]], error: Exception) -> None:
+        """COMMIT gagal: tidak dicoba ulang (bisa duplikat), cache tetap di-invalidate."""
+        rows = sum(len(result["input_years"]) for result, _ in batch)
+        self.uncertain_flushes += 1
+        self.uncertain_records += len(batch)
+        logger.error(
+            f"COMMIT {len(batch)} record histori ({rows} baris) gagal, status tidak diketahui "
+            f"— tidak dicoba ulang: {error}"
+        )
+        await self._invalidate(batch)
+
+    async def _invalidate(self, batch: list[tuple[dict, str]]) -> None:
+        await invalidate_history_cache(
+            [city for result, _ in batch for city in result.get("city") or ()],
+            [level for result, _ in batch for level in result.get("job_level") or ()],
+        )
+
+    def metrics(self) -> dict:
+        return {
+            "max_queue": self.max_queue,
+            "flush_rows": self.flush_rows,
+            "flush_interval_ms": self.flush_interval * 1000,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "written_records": self.written_records,
+            "dropped_records": self.dropped_records,
+            "dropped_rows": self.dropped_rows,
+            "retried_flushes": self.retried_flushes,
+            "failed_flushes": self.failed_flushes,
+            "uncertain_flushes": self.uncertain_flushes,
+            "uncertain_records": self.uncertain_records,
+            "flush_records": self.flush_records.snapshot(),
+            "flush_ms": self.flush_ms.snapshot(),
+        }
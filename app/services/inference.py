@@ -0,0 +1,133 @@
+"""
+app/services/inference.py — Backend eksekusi inferensi (inline / thread / process)
+
+- inline  : scorer dipanggil langsung di event loop (paling cepat untuk batch kecil
+            dengan scorer terkompilasi/lookup, tanpa hop thread)
+- thread  : thread pool Starlette (perilaku lama, default)
+- process : ProcessPoolExecutor. Setiap worker me-load model SEKALI lewat
+            initializer, jadi scoring berat tidak berebut GIL dengan thread
+            yang melayani request. Batch dikirim sebagai array NumPy (buffer
+            biner ringkas), bukan list Python.
+
+Modul ini sengaja tidak meng-import app.main agar aman di-import ulang oleh
+worker process (start method "spawn").
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from app.services.scorer import build_scorer
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_MODES = ("inline", "thread", "process")
+
+# --- State di sisi worker process ---
+_worker_scorer = None
+
+
+def _init_worker(model_path: str, use_lookup_table: bool) -> None:
+    """Initializer ProcessPoolExecutor: load model sekali per worker."""
+    global _worker_scorer
+    _worker_scorer = build_scorer(joblib.load(model_path), use_lookup_table=use_lookup_table)
+
+
+def _score_in_worker(years: np.ndarray, city_codes: np.ndarray, level_codes: np.ndarray) -> np.ndarray:
+    return _worker_scorer.predict_codes(years, city_codes, level_codes)
+
+
+def _pack_codes(codes: np.ndarray) -> np.ndarray:
+    # Kode kota/level < 128 → cukup int8 (1 byte per baris saat dikirim ke worker)
+    return np.asarray(codes, dtype=np.int8)
+
+
+class InferenceBackend:
+    """
+    Jalankan scorer sesuai mode yang dipilih.
+
+    Args:
+        mode             : "inline", "thread", atau "process"
+        get_scorer       : callable yang mengembalikan scorer aktif (mode inline/thread)
+        model_path       : path .pkl yang di-load worker (mode process)
+        use_lookup_table : diteruskan ke build_scorer() di worker
+        workers          : jumlah worker process (default: os.cpu_count())
+    """
+
+    def __init__(self, mode: str, get_scorer=None, model_path: str | None = None,
+                 use_lookup_table: bool = False, workers: int | None = None):
+        if mode not in INFERENCE_MODES:
+            raise ValueError(f"Mode inferensi '{mode}' tidak valid. Pilih salah satu: {INFERENCE_MODES}")
+        if mode == "process" and not model_path:
+            raise ValueError("Mode 'process' membutuhkan model_path")
+
+        self.mode = mode
+        self.get_scorer = get_scorer
+        self.model_path = model_path
+        self.use_lookup_table = use_lookup_table
+        self.workers = workers or os.cpu_count() or 1
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _new_pool(self, model_path: str) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_path, self.use_lookup_table),
+        )
+        # Warm-up: paksa semua worker spawn & load model sebelum request pertama
+        empty = np.empty(0, dtype=float)
+        codes = np.empty(0, dtype=np.int8)
+        for future in [pool.submit(_score_in_worker, empty, codes, codes) for _ in range(self.workers)]:
+            future.result()
+        return pool
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def start(self) -> None:
+        if self.mode == "process" and self._pool is None:
+            self._pool = self._new_pool(self.model_path)
+            logger.info(f"✅ Process pool inferensi siap ({self.workers} worker)")
+
+    def reload(self, model_path: str) -> None:
+        """Ganti model di semua worker: pool baru disiapkan dulu, baru pool lama dimatikan."""
+        self.model_path = model_path
+        if self.mode != "process":
+            return
+        new_pool = self._new_pool(model_path)
+        old_pool, self._pool = self._pool, new_pool
+        if old_pool is not None:
+            old_pool.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    async def score(self, years: np.ndarray, city_codes: np.ndarray, level_codes: np.ndarray) -> np.ndarray:
+        years = np.asarray(years, dtype=float)
+
+        if self.mode == "inline":
+            return self.get_scorer().predict_codes(years, city_codes, level_codes)
+
+        if self.mode == "thread":
+            return await run_in_threadpool(self.get_scorer().predict_codes, years, city_codes, level_codes)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, _score_in_worker, years, _pack_codes(city_codes), _pack_codes(level_codes),
+        )
+
+    def metrics(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers if self.mode == "process" else None,
+        }
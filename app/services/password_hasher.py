@@ -0,0 +1,94 @@
+"""
+app/services/password_hasher.py — Hashing password bcrypt di luar event loop
+
+bcrypt sengaja lambat (~250 ms pada cost 12). Dipanggil langsung dari handler
+async, setiap login / register menahan event loop selama itu dan semua request
+lain di worker yang sama (termasuk /predict) ikut menunggu.
+
+PasswordHasher menjalankan bcrypt di thread pool khusus (bcrypt melepas GIL,
+jadi benar-benar paralel dengan event loop) dengan batas antrean:
+- max_pending : jumlah hash/verify yang boleh berjalan + antre sekaligus. Lebih
+                dari itu → PasswordHasherBusy (endpoint menjawab 503) daripada
+                antrean login menumpuk tanpa batas
+- rounds      : cost bcrypt untuk hash baru. Hash lama dengan cost berbeda
+                di-hash ulang otomatis saat login berhasil (needs_rehash)
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.auth import hash_password, verify_password
+from app.utils.metrics import Histogram
+
+HASH_MS_BUCKETS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Antrean hashing penuh — coba lagi sebentar lagi."""
+
+
+def bcrypt_rounds(hashed_password: str) -> int | None:
+    """Cost dari hash bcrypt ("$2b$12$..." → 12), None jika format tidak dikenal."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    """
+    Args:
+        rounds      : cost bcrypt untuk hash baru (4–31)
+        workers     : thread bcrypt paralel
+        max_pending : batas hash/verify yang berjalan + antre
+    """
+
+    def __init__(self, rounds: int = 12, workers: int = 2, max_pending: int = 16):
+        if not 4 <= rounds <= 31:
+            raise ValueError(f"BCRYPT_ROUNDS harus antara 4-31, dapat: {rounds}")
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max(max_pending, workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+
+        self.rejected = 0
+        self.rehashed = 0
+        self.duration_ms = Histogram(HASH_MS_BUCKETS)
+
+    async def _run(self, fn, *args):
+        # Counter cukup tanpa lock: hanya diubah dari thread event loop
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy("Server sedang sibuk memproses login, coba lagi")
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            self.duration_ms.observe((time.perf_counter() - started) * 1000)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return bcrypt_rounds(hashed_password) != self.rounds
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def metrics(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "duration_ms": self.duration_ms.snapshot(),
+        }
@@ -0,0 +1,158 @@
+"""
+app/services/prediction_cache.py — Cache respons /predict + single-flight
+
+Payload /predict yang identik (setelah normalisasi: tahun desimal hasil
+konversi Y.M, kode kota, kode level) dengan model aktif yang sama selalu
+menghasilkan prediksi yang sama. Hasilnya disimpan di backend FastAPICache
+(Redis / in-memory) dengan key:
+
+    <prefix>:predict:<sha256(fingerprint model + kolom ter-normalisasi)>
+
+Fingerprint model ikut di-hash, jadi saat model aktif berganti semua key
+lama otomatis tidak terpakai lagi (dibiarkan kedaluwarsa oleh TTL).
+
+Request identik yang datang BERSAMAAN digabung menjadi satu komputasi:
+request pertama menjalankan compute() sebagai task bersama, sisanya menunggu
+task yang sama. Jika request pertama dibatalkan (mis. client memutus koneksi),
+task tetap berjalan sampai selesai untuk request yang menunggu.
+
+Entry menyimpan request_id request yang menghitungnya (dan menulis record
+histori-nya), jadi cache hit dan request yang digabung tetap mengembalikan
+ID yang bisa dicari lewat GET /history/request/{request_id}.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import pickle
+from typing import Awaitable, Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def model_fingerprint(model) -> str:
+    """Hash isi model (hasil pickle) — berubah setiap kali model dilatih ulang."""
+    return hashlib.sha256(pickle.dumps(model)).hexdigest()[:16]
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    """Tandai error task bersama sudah diambil meski semua request penunggu dibatalkan."""
+    if not task.cancelled():
+        task.exception()
+
+
+class PredictionCache:
+    """
+    Args:
+        get_backend : callable yang mengembalikan backend FastAPICache aktif
+        ttl_seconds : masa berlaku entry cache
+        prefix      : prefix key (biasanya FastAPICache.get_prefix())
+    """
+
+    def __init__(self, get_backend: Callable, ttl_seconds: int, prefix: str = "salary-api-cache"):
+        self._get_backend = get_backend
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._inflight: dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.backend_errors = 0
+
+    def make_key(
+        self, fingerprint: str, converted: np.ndarray, city_codes: np.ndarray, level_codes: np.ndarray,
+    ) -> str:
+        """Key kanonik: urutan baris dipertahankan, dtype dinormalisasi agar hash stabil."""
+        digest = hashlib.sha256(fingerprint.encode("utf-8"))
+        digest.update(np.asarray(converted, dtype="<f8").tobytes())
+        digest.update(np.asarray(city_codes, dtype="<i2").tobytes())
+        digest.update(np.asarray(level_codes, dtype="<i2").tobytes())
+        return f"{self.prefix}:predict:{digest.hexdigest()}"
+
+    async def _backend_get(self, key: str) -> tuple[list[float], str | None] | None:
+        try:
+            cached = await self._get_backend().get(key)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"⚠️  Cache prediksi tidak bisa dibaca: {e}")
+            return None
+        entry = json.loads(cached) if cached is not None else None
+        # Entry format lama (list tanpa request_id) dianggap miss
+        if not isinstance(entry, dict):
+            return None
+        return entry["predictions"], entry["request_id"]
+
+    async def _backend_set(self, key: str, predictions: list[float], request_id: str | None) -> None:
+        entry = {"predictions": predictions, "request_id": request_id}
+        try:
+            await self._get_backend().set(key, json.dumps(entry), expire=self.ttl_seconds)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"⚠️  Cache prediksi tidak bisa ditulis: {e}")
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[list[float]]], request_id: str | None = None,
+    ) -> tuple[list[float], bool, str | None]:
+        """
+        Ambil prediksi dari cache, atau hitung sekali untuk semua request identik.
+
+        Args:
+            request_id : correlation ID request ini, disimpan bersama prediksi
+                         jika request ini yang menghitung
+
+        Returns:
+            (predictions, from_cache, request_id) — from_cache True jika hasil tidak
+            dihitung oleh request ini (cache hit atau menumpang komputasi request
+            lain); request_id milik request yang menghitung
+        """
+        if key in self._inflight:
+            predictions, origin_id = await self._wait(key)
+            return predictions, True, origin_id
+
+        cached = await self._backend_get(key)
+        if cached is not None:
+            self.hits += 1
+            predictions, origin_id = cached
+            return predictions, True, origin_id
+
+        # Request lain mungkin mulai menghitung selama kita menunggu backend
+        if key in self._inflight:
+            predictions, origin_id = await self._wait(key)
+            return predictions, True, origin_id
+
+        self.misses += 1
+        task = asyncio.create_task(self._compute(key, compute, request_id))
+        task.add_done_callback(_consume_exception)
+        self._inflight[key] = task
+        # shield: membatalkan request ini tidak ikut membatalkan komputasi bersama
+        predictions, _ = await asyncio.shield(task)
+        return predictions, False, request_id
+
+    async def _compute(
+        self, key: str, compute: Callable[[], Awaitable[list[float]]], request_id: str | None,
+    ) -> tuple[list[float], str | None]:
+        """Task bersama: hitung, simpan ke backend, baru lepas dari _inflight."""
+        try:
+            predictions = await compute()
+            await self._backend_set(key, predictions, request_id)
+            return predictions, request_id
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _wait(self, key: str) -> tuple[list[float], str | None]:
+        self.coalesced += 1
+        return await asyncio.shield(self._inflight[key])
+
+    def metrics(self) -> dict:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "backend_errors": self.backend_errors,
+            "inflight": len(self._inflight),
+        }
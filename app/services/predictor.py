@@ -1,10 +1,21 @@
+import json
 import logging
-from app.utils.converters import convert_ym_to_years
+import numpy as np
+
+from app.services.scorer import as_scorer
+from app.utils.constants import CITY_CODES, JOB_LEVEL_CODES
+from app.utils.converters import convert_ym_array, encode_categories
 
 logger = logging.getLogger(__name__)
 
 
-def predict_salaries_v2(model, years_list: list[float], city_list: list[str], level_list: list[str]) -> dict:
+def predict_salaries_v2(
+    model,
+    years_list: list[float],
+    city_list: list[str],
+    level_list: list[str],
+    converted_years: np.ndarray | None = None,
+) -> dict:
     """
     Fungsi prediksi V2: terima list pengalaman kerja, kota, dan level jabatan,
     kembalikan prediksi gaji.
@@ -13,30 +24,49 @@ def predict_salaries_v2(model, years_list: list[float], city_list: list[str], le
     jadi di sini kita fokus pada logika ML saja.
 
     Args:
-        model      : Pipeline scikit-learn (ColumnTransformer + LinearRegression)
+        model      : Scorer dari build_scorer() (terkompilasi) atau Pipeline scikit-learn mentah
         years_list : list pengalaman dalam format Y.M (contoh: [2.6, 3.0])
         city_list  : list kota (contoh: ["jakarta", "bandung"])
         level_list : list level jabatan (contoh: ["junior", "senior"])
+        converted_years : (Opsional) hasil konversi dari SalaryInputV2.converted_years.
+                          Jika None, dikonversi di sini via convert_ym_array()
 
     Returns:
         dict berisi input asli, hasil konversi, dan hasil prediksi
     """
 
     # Konversi format Y.M → desimal murni
-    # Validasi format sudah dilakukan oleh Pydantic, jadi ini murni konversi
-    converted = [convert_ym_to_years(ym) for ym in years_list]
+    # Request dari API sudah dikonversi oleh Pydantic, jadi tidak diulang di sini
+    if converted_years is None:
+        converted_years, valid = convert_ym_array(years_list)
+        if not valid.all():
+            bad = years_list[int(np.flatnonzero(~valid)[0])]
+            raise ValueError(f"Format pengalaman tidak valid: '{bad}'")
 
     logger.info(f"Konversi Y.M V2 selesai, batch size: {len(years_list)}")
 
-    # Gabungkan menjadi format 2D: [[tahun, kota, level], ...]
-    # Pipeline V2 menggunakan ColumnTransformer yang menerima list of list
-    input_records = [
-        [tahun, kota, level]
-        for tahun, kota, level in zip(converted, city_list, level_list)
-    ]
+    # Kota & level → kode integer, lalu skor satu batch secara vektor.
+    # Model sklearn mentah otomatis dibungkus SklearnModelScorer (jalur lama)
+    raw_predictions = as_scorer(model).predict_codes(
+        np.asarray(converted_years, dtype=float),
+        encode_categories(city_list, CITY_CODES),
+        encode_categories(level_list, JOB_LEVEL_CODES),
+    )
+
+    return build_prediction_result(years_list, city_list, level_list, converted_years, raw_predictions)
 
-    raw_predictions = model.predict(input_records)
 
+def build_prediction_result(
+    years_list: list[float],
+    city_list: list[str],
+    level_list: list[str],
+    converted_years: np.ndarray,
+    raw_predictions: np.ndarray,
+) -> dict:
+    """
+    Susun dict response /predict dari hasil scorer.
+    Dipakai juga oleh jalur micro-batching yang memanggil scorer secara terpisah.
+    """
     # Ubah numpy array → list of float biasa (agar bisa di-serialize ke JSON)
     result = [round(float(x), 2) for x in raw_predictions]
 
@@ -46,7 +76,18 @@ def predict_salaries_v2(model, years_list: list[float], city_list: list[str], le
         "input_years": years_list,
         "city": city_list,
         "job_level": level_list,
-        "converted_years_decimal": converted,
+        "converted_years_decimal": np.asarray(converted_years, dtype=float).tolist(),
         "estimated_salary_million": result,
         "message": f"Berhasil memprediksi {len(result)} data sekaligus!"
     }
+
+
+def encode_compact_result(request_id: str, salaries: list[float]) -> bytes:
+    """
+    Serialisasi response ringkas /predict?compact=true langsung ke bytes JSON.
+    Tanpa field echo (input_years, city, dst.) dan tanpa validasi ulang response_model.
+    """
+    return json.dumps(
+        {"id": request_id, "estimated_salary_million": salaries},
+        separators=(",", ":"),
+    ).encode("utf-8")
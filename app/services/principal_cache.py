@@ -0,0 +1,95 @@
+"""
+app/services/principal_cache.py — Cache principal (username + role) per token
+
+get_current_user dulu menjalankan SELECT ke tabel users di setiap request
+terproteksi. Principal yang sudah terverifikasi kini disimpan in-process
+(TTL + LRU) dengan key token lengkap — bukan hanya signature-nya, agar
+payload yang diubah tidak bisa "menumpang" signature yang sudah di-cache.
+Entry tidak pernah hidup melewati `exp` token-nya.
+
+Invalidasi saat role berubah / user dihapus (invalidate_user):
+- entry milik user itu dibuang
+- token yang diterbitkan SEBELUM perubahan tidak lagi dipercaya klaim
+  role-nya (lihat AUTH_TRUST_ROLE_CLAIM di auth.py) → kembali dicek ke DB
+
+Cache ini per worker: worker lain melihat perubahan paling lambat setelah
+ttl_seconds (entry dari DB).
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Identitas yang sudah terautentikasi — cukup untuk otorisasi endpoint."""
+    username: str
+    role: str
+
+
+class PrincipalCache:
+    """
+    Args:
+        ttl_seconds : umur maksimal entry (0 = cache nonaktif)
+        max_size    : jumlah token maksimal; entry paling lama tak dipakai dibuang
+        revoke_window_seconds : berapa lama catatan invalidasi disimpan
+                                (= umur token, setelah itu token lama sudah kedaluwarsa)
+    """
+
+    def __init__(self, ttl_seconds: float = 60, max_size: int = 10_000, revoke_window_seconds: float = 3600):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.revoke_window = revoke_window_seconds
+        self._entries: OrderedDict[str, tuple[Principal, float]] = OrderedDict()
+        self._revoked_at: dict[str, float] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, token: str) -> Principal | None:
+        entry = self._entries.get(token)
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, token: str, principal: Principal, token_exp: float) -> None:
+        if not self.enabled:
+            return
+        self._entries[token] = (principal, min(token_exp, time.time() + self.ttl_seconds))
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate_user(self, username: str) -> None:
+        """Role user berubah / user dihapus: buang entry-nya dan cabut kepercayaan token lama."""
+        now = time.time()
+        for token in [t for t, (p, _) in self._entries.items() if p.username == username]:
+            del self._entries[token]
+        self._revoked_at[username] = now
+        self._revoked_at = {u: at for u, at in self._revoked_at.items() if at > now - self.revoke_window}
+        self.invalidations += 1
+
+    def issued_before_revocation(self, username: str, issued_at: float | None) -> bool:
+        """True jika token (iat) diterbitkan sebelum invalidasi terakhir user ini."""
+        revoked_at = self._revoked_at.get(username)
+        return revoked_at is not None and (issued_at is None or issued_at <= revoked_at)
+
+    def metrics(self) -> dict:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,212 @@
+"""
+app/services/rate_limiter.py — Rate limit baris prediksi per user, dibagi lintas worker
+
+slowapi dulu menghitung request per IP di memori masing-masing proses: dengan
+N worker uvicorn batas 20/menit efektif menjadi 20×N, dan batch 100 baris
+dihitung sama dengan request 1 baris. RowRateLimiter menghitung BARIS per
+user (username principal — JWT maupun API key) dalam sliding window yang
+disimpan di Redis, jadi semua worker berbagi kuota yang sama.
+
+Sliding window counter: counter per window tetap (mis. per menit) di Redis,
+pemakaian = counter window sekarang + counter window sebelumnya × porsi
+window sebelumnya yang masih masuk jendela geser.
+
+Reservasi blok: worker tidak memanggil Redis per request. Kuota diambil
+sekaligus per blok (block_size baris) lewat satu script Lua atomik lalu
+dipakai lokal; Redis baru dipanggil lagi saat blok habis. Sisa blok hangus
+saat window berganti — kuota yang "terbuang" maksimal block_size per worker
+per user per window, dan limiter tidak pernah meloloskan lebih dari batas.
+
+Fallback: jika Redis tidak tersedia (ping startup gagal atau error di tengah
+jalan) limiter memakai counter in-process per worker; Redis dicoba lagi oleh
+request pertama setelah retry_seconds, dan dipakai kembali begitu berhasil.
+"""
+
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = counter window sekarang, KEYS[2] = counter window sebelumnya
+# ARGV = limit, jumlah yang diminta, bobot window sebelumnya, TTL (ms)
+# Returns jumlah baris yang berhasil direservasi (0..diminta)
+RESERVE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local want = tonumber(ARGV[2])
+local prev_weight = tonumber(ARGV[3])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local grant = math.min(want, math.floor(limit - current - previous * prev_weight))
+if grant <= 0 then
+    return 0
+end
+redis.call('INCRBY', KEYS[1], grant)
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[4]))
+return grant
+"""
+
+
+class RateLimitExceeded(Exception):
+    """Kuota baris habis — `retry_after` detik sampai window berikutnya."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Rate limit terlampaui, coba lagi dalam {retry_after} detik")
+        self.retry_after = retry_after
+
+
+class RowRateLimiter:
+    """
+    Args:
+        limit          : baris maksimal per user per window
+        window_seconds : panjang window
+        block_size     : baris yang direservasi dari Redis sekaligus per worker
+        retry_seconds  : jeda sebelum mencoba Redis lagi setelah error
+        prefix         : prefix key Redis
+    """
+
+    def __init__(
+        self,
+        limit: int = 2000,
+        window_seconds: float = 60,
+        block_size: int = 100,
+        retry_seconds: float = 5,
+        prefix: str = "salary-api-ratelimit",
+        clock=time.time,
+    ):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.block_size = block_size
+        self.retry_seconds = retry_seconds
+        self.prefix = prefix
+        self.clock = clock
+
+        self._redis = None
+        self._reserve = None
+        self._redis_retry_at = 0.0
+        # key -> (window_id, sisa baris blok yang sudah direservasi)
+        self._blocks: dict[str, tuple[int, int]] = {}
+        # key -> (window_id, counter window sekarang, counter window sebelumnya)
+        self._local: dict[str, tuple[int, int, int]] = {}
+
+        self.allowed_rows = 0
+        self.rejected = 0
+        self.redis_calls = 0
+        self.redis_errors = 0
+        self.local_decisions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.limit > 0
+
+    def attach_redis(self, client, available: bool = True) -> None:
+        """
+        Pakai `client` (redis.asyncio) sebagai penyimpanan kuota bersama.
+        available=False (ping startup gagal): mulai dengan counter in-process
+        dan coba Redis lagi setelah retry_seconds.
+        """
+        self._redis = client
+        self._reserve = client.register_script(RESERVE_SCRIPT)
+        if not available:
+            self._redis_retry_at = self.clock() + self.retry_seconds
+
+    def _window(self, now: float) -> tuple[int, float]:
+        """(ID window sekarang, porsi window sekarang yang sudah berjalan 0..1)."""
+        position = now / self.window_seconds
+        window_id = int(position)
+        return window_id, position - window_id
+
+    def _retry_after(self, now: float) -> int:
+        _, elapsed = self._window(now)
+        return max(1, math.ceil((1 - elapsed) * self.window_seconds))
+
+    async def acquire(self, key: str, rows: int) -> None:
+        """
+        Pakai `rows` baris dari kuota `key`.
+
+        Raises:
+            RateLimitExceeded: kuota window ini tidak cukup
+        """
+        if not self.enabled:
+            return
+        rows = max(rows, 1)
+        now = self.clock()
+        window_id, elapsed = self._window(now)
+
+        if self._redis is not None and now >= self._redis_retry_at:
+            try:
+                allowed = await self._acquire_redis(key, rows, window_id, elapsed)
+                if self._redis_retry_at:
+                    self._redis_retry_at = 0.0
+                    logger.info("✅ Rate limiter: Redis tersedia lagi, kuota kembali dibagi lintas worker")
+            except Exception as e:
+                self.redis_errors += 1
+                self._redis_retry_at = now + self.retry_seconds
+                self._blocks.clear()
+                logger.warning(f"⚠️  Rate limiter: Redis gagal ({e}), pakai counter in-process")
+                allowed = self._acquire_local(key, rows, window_id, elapsed)
+        else:
+            allowed = self._acquire_local(key, rows, window_id, elapsed)
+
+        if not allowed:
+            self.rejected += 1
+            raise RateLimitExceeded(self._retry_after(now))
+        self.allowed_rows += rows
+
+    async def _acquire_redis(self, key: str, rows: int, window_id: int, elapsed: float) -> bool:
+        block_window, remaining = self._blocks.get(key, (window_id, 0))
+        if block_window != window_id:
+            remaining = 0  # sisa blok window lama hangus
+
+        if remaining < rows:
+            self.redis_calls += 1
+            granted = await self._reserve(
+                keys=[self._redis_key(key, window_id), self._redis_key(key, window_id - 1)],
+                args=[self.limit, max(self.block_size, rows - remaining), 1 - elapsed,
+                      int(self.window_seconds * 2000)],
+            )
+            remaining += int(granted)
+
+        allowed = remaining >= rows
+        if allowed:
+            remaining -= rows
+        self._blocks[key] = (window_id, remaining)
+        return allowed
+
+    def _redis_key(self, key: str, window_id: int) -> str:
+        # Hash tag {key}: kedua window user yang sama di slot yang sama (Redis Cluster)
+        return f"{self.prefix}:{{{key}}}:{window_id}"
+
+    def _acquire_local(self, key: str, rows: int, window_id: int, elapsed: float) -> bool:
+        self.local_decisions += 1
+        entry_window, current, previous = self._local.get(key, (window_id, 0, 0))
+        if entry_window != window_id:
+            previous = current if entry_window == window_id - 1 else 0
+            current = 0
+            if len(self._local) > 1000:
+                self._local = {k: v for k, v in self._local.items() if v[0] >= window_id - 1}
+
+        allowed = current + previous * (1 - elapsed) + rows <= self.limit
+        if allowed:
+            current += rows
+        self._local[key] = (window_id, current, previous)
+        return allowed
+
+    def metrics(self) -> dict:
+        if self._redis is None:
+            backend = "local"
+        elif self.clock() < self._redis_retry_at:
+            backend = "local (redis fallback)"
+        else:
+            backend = "redis"
+        return {
+            "backend": backend,
+            "limit_rows": self.limit,
+            "window_seconds": self.window_seconds,
+            "block_size": self.block_size,
+            "allowed_rows": self.allowed_rows,
+            "rejected": self.rejected,
+            "redis_calls": self.redis_calls,
+            "redis_errors": self.redis_errors,
+            "local_decisions": self.local_decisions,
+        }
@@ -0,0 +1,306 @@
+"""
+app/services/scorer.py — Mesin inferensi untuk model prediksi gaji
+
+Model V2 (dan V3 hasil auto_retrain) hanyalah regresi linear di log-space:
+    log(gaji) = intercept + koef_kota + koef_level + slope × tahun
+
+Daripada melewatkan setiap request ke TransformedTargetRegressor → Pipeline →
+ColumnTransformer → OneHotEncoder → LinearRegression, koefisien tersebut
+diekstrak SEKALI saat model di-load. Prediksi satu batch cukup berupa
+gather koefisien kota/level + slope × tahun, lalu np.exp.
+
+Pipeline yang tidak bisa dikompilasi otomatis memakai jalur sklearn biasa.
+
+Mode opsional: domain input kecil dan diskrit (601 nilai bulan × 6 kota × 6 level),
+jadi seluruh prediksi bisa di-precompute ke tabel float32 (~85 KB) dan
+inferensi menjadi index lookup murni.
+"""
+
+import logging
+import numpy as np
+
+from sklearn.compose import ColumnTransformer, TransformedTargetRegressor
+from sklearn.linear_model import LinearRegression, Ridge, RidgeCV, Lasso, ElasticNet
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, FunctionTransformer
+
+from app.utils.constants import (
+    VALID_CITIES, VALID_JOB_LEVELS, CITY_CODES, JOB_LEVEL_CODES, MAX_YEARS_EXPERIENCE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Estimator linear yang prediksinya murni X @ coef_ + intercept_
+LINEAR_ESTIMATORS = (LinearRegression, Ridge, RidgeCV, Lasso, ElasticNet)
+
+# Jumlah sel bulan di tabel lookup: 0.0 s/d MAX_YEARS_EXPERIENCE.0 → 601 nilai
+LOOKUP_MONTHS = MAX_YEARS_EXPERIENCE * 12 + 1
+
+# Toleransi relatif untuk startup check tabel float32 vs model.predict
+LOOKUP_RTOL = 1e-6
+
+# Posisi kolom input mentah: [tahun, kota, level]
+YEARS_COLUMN, CITY_COLUMN, LEVEL_COLUMN = 0, 1, 2
+
+_CITY_ARRAY = np.array(VALID_CITIES, dtype=object)
+_LEVEL_ARRAY = np.array(VALID_JOB_LEVELS, dtype=object)
+
+
+class SklearnModelScorer:
+    """
+    Jalur fallback: bungkus model sklearn apa pun agar punya API `predict_codes`.
+    Kode kota/level dikembalikan ke string lalu diteruskan ke model.predict().
+    """
+
+    compiled = False
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_codes(self, years: np.ndarray, city_codes: np.ndarray, level_codes: np.ndarray) -> np.ndarray:
+        records = np.empty((len(years), 3), dtype=object)
+        records[:, YEARS_COLUMN] = np.asarray(years, dtype=float)
+        records[:, CITY_COLUMN] = _CITY_ARRAY[city_codes]
+        records[:, LEVEL_COLUMN] = _LEVEL_ARRAY[level_codes]
+        return np.asarray(self.model.predict(records), dtype=float)
+
+
+class CompiledLinearModel:
+    """
+    Model linear yang sudah "dikompilasi" menjadi tabel koefisien.
+
+    Attributes:
+        intercept   : intercept regresi (log-space jika log_target=True)
+        city_coef   : koefisien per kota, diindeks sesuai CITY_CODES
+        level_coef  : koefisien per level, diindeks sesuai JOB_LEVEL_CODES
+        slope       : koefisien untuk fitur tahun pengalaman
+        log_target  : True jika output harus di-np.exp (TransformedTargetRegressor)
+    """
+
+    compiled = True
+
+    def __init__(self, intercept: float, city_coef: np.ndarray, level_coef: np.ndarray,
+                 slope: float, log_target: bool, model=None):
+        self.intercept = float(intercept)
+        self.city_coef = np.asarray(city_coef, dtype=float)
+        self.level_coef = np.asarray(level_coef, dtype=float)
+        self.slope = float(slope)
+        self.log_target = log_target
+        self.model = model
+
+    def predict_codes(self, years: np.ndarray, city_codes: np.ndarray, level_codes: np.ndarray) -> np.ndarray:
+        raw = (
+            self.intercept
+            + self.city_coef[city_codes]
+            + self.level_coef[level_codes]
+            + self.slope * np.asarray(years, dtype=float)
+        )
+        return np.exp(raw) if self.log_target else raw
+
+
+class LookupTableScorer:
+    """
+    Scorer berbasis tabel precomputed berukuran (LOOKUP_MONTHS, n_kota, n_level).
+
+    Tahun desimal dipetakan ke indeks bulan (tahun × 12). Input di luar grid
+    bulan (mis. dari pemanggil non-API) diteruskan ke scorer fallback.
+    """
+
+    compiled = True
+
+    def __init__(self, table: np.ndarray, fallback):
+        self.table = table
+        self.fallback = fallback
+        self.model = getattr(fallback, "model", None)
+
+    def predict_codes(self, years: np.ndarray, city_codes: np.ndarray, level_codes: np.ndarray) -> np.ndarray:
+        months = np.asarray(years, dtype=float) * 12
+        month_idx = np.rint(months)
+
+        # convert_ym_array membulatkan ke 4 desimal → selisih dari grid maks ~6e-4 bulan
+        on_grid = (np.abs(months - month_idx) < 1e-2) & (month_idx >= 0) & (month_idx < len(self.table))
+        if not on_grid.all():
+            return self.fallback.predict_codes(years, city_codes, level_codes)
+
+        return self.table[month_idx.astype(np.intp), city_codes, level_codes].astype(float)
+
+
+def build_lookup_table(scorer) -> np.ndarray:
+    """Precompute prediksi untuk seluruh domain (bulan × kota × level) dalam satu batch."""
+    month_idx, city_codes, level_codes = np.meshgrid(
+        np.arange(LOOKUP_MONTHS),
+        np.arange(len(VALID_CITIES)),
+        np.arange(len(VALID_JOB_LEVELS)),
+        indexing="ij",
+    )
+    years = np.round(month_idx.ravel() / 12, 4)
+    predictions = scorer.predict_codes(years, city_codes.ravel(), level_codes.ravel())
+    return predictions.astype(np.float32).reshape(month_idx.shape)
+
+
+def verify_lookup_table(table_scorer: LookupTableScorer, model, sample_size: int = 256, seed: int = 0) -> bool:
+    """
+    Startup check: bandingkan sampel acak sel tabel dengan model.predict() asli.
+    """
+    rng = np.random.default_rng(seed)
+    month_idx = rng.integers(0, LOOKUP_MONTHS, sample_size)
+    city_codes = rng.integers(0, len(VALID_CITIES), sample_size)
+    level_codes = rng.integers(0, len(VALID_JOB_LEVELS), sample_size)
+    years = np.round(month_idx / 12, 4)
+
+    expected = SklearnModelScorer(model).predict_codes(years, city_codes, level_codes)
+    actual = table_scorer.predict_codes(years, city_codes, level_codes)
+    return bool(np.allclose(actual, expected, rtol=LOOKUP_RTOL, atol=0))
+
+
+def _column_list(columns) -> list | None:
+    """Normalisasi spesifikasi kolom ColumnTransformer menjadi list of int."""
+    if isinstance(columns, (int, np.integer)):
+        return [int(columns)]
+    try:
+        cols = list(columns)
+    except TypeError:
+        return None
+    if not all(isinstance(c, (int, np.integer)) for c in cols):
+        return None
+    return [int(c) for c in cols]
+
+
+def _is_passthrough(transformer) -> bool:
+    if isinstance(transformer, str):
+        return transformer == "passthrough"
+    # sklearn >= 1.2 menyimpan remainder="passthrough" sebagai FunctionTransformer identitas
+    return isinstance(transformer, FunctionTransformer) and transformer.func is None
+
+
+def _fill_category_coef(encoder: OneHotEncoder, weights: np.ndarray, codes: dict) -> np.ndarray | None:
+    """Petakan koefisien one-hot encoder ke urutan tabel kode (VALID_*)."""
+    if encoder.drop is not None or getattr(encoder, "infrequent_categories_", None) is not None:
+        return None
+    categories = list(encoder.categories_[0])
+    if len(categories) != len(weights):
+        return None
+    if encoder.handle_unknown != "ignore" and not set(codes).issubset(categories):
+        return None
+
+    # Kategori yang tidak dikenal encoder (handle_unknown="ignore") → vektor nol → koefisien 0
+    table = np.zeros(len(codes), dtype=float)
+    for category, weight in zip(categories, weights):
+        if category in codes:
+            table[codes[category]] = weight
+    return table
+
+
+def compile_model(model) -> CompiledLinearModel | None:
+    """
+    Ekstrak intercept & koefisien dari pipeline V2/V3.
+
+    Yang didukung: [TransformedTargetRegressor(func=np.log, inverse_func=np.exp)] →
+    Pipeline(ColumnTransformer(OneHotEncoder kota & level + passthrough tahun) →
+    LinearRegression/Ridge/...).
+
+    Returns:
+        CompiledLinearModel, atau None jika struktur pipeline tidak dikenali
+    """
+    log_target = False
+    regressor = model
+
+    if isinstance(model, TransformedTargetRegressor):
+        if not hasattr(model, "regressor_"):
+            return None
+        if model.transformer is not None or model.inverse_func is not np.exp:
+            return None
+        log_target = True
+        regressor = model.regressor_
+
+    if not isinstance(regressor, Pipeline) or len(regressor.steps) != 2:
+        return None
+
+    preprocessor = regressor.steps[0][1]
+    estimator = regressor.steps[1][1]
+
+    if not isinstance(preprocessor, ColumnTransformer) or not hasattr(preprocessor, "output_indices_"):
+        return None
+    if not isinstance(estimator, LINEAR_ESTIMATORS) or not hasattr(estimator, "coef_"):
+        return None
+
+    coef = np.asarray(estimator.coef_, dtype=float)
+    if coef.ndim != 1:
+        return None
+
+    city_coef = np.zeros(len(VALID_CITIES), dtype=float)
+    level_coef = np.zeros(len(VALID_JOB_LEVELS), dtype=float)
+    slope = 0.0
+    covered = 0
+
+    for name, transformer, columns in preprocessor.transformers_:
+        output_slice = preprocessor.output_indices_[name]
+        weights = coef[output_slice]
+        covered += len(weights)
+
+        if transformer == "drop" or len(weights) == 0:
+            continue
+
+        cols = _column_list(columns)
+        if cols is None:
+            return None
+
+        if isinstance(transformer, OneHotEncoder) and cols in ([CITY_COLUMN], [LEVEL_COLUMN]):
+            is_city = cols == [CITY_COLUMN]
+            table = _fill_category_coef(transformer, weights, CITY_CODES if is_city else JOB_LEVEL_CODES)
+            if table is None:
+                return None
+            if is_city:
+                city_coef += table
+            else:
+                level_coef += table
+        elif _is_passthrough(transformer) and cols == [YEARS_COLUMN]:
+            slope += float(weights[0])
+        else:
+            return None
+
+    if covered != len(coef):
+        return None
+
+    return CompiledLinearModel(
+        intercept=estimator.intercept_,
+        city_coef=city_coef,
+        level_coef=level_coef,
+        slope=slope,
+        log_target=log_target,
+        model=model,
+    )
+
+
+def build_scorer(model, use_lookup_table: bool = False):
+    """
+    Pilih scorer terbaik untuk model yang baru di-load:
+    versi terkompilasi jika bisa, fallback ke jalur sklearn jika tidak.
+
+    Jika use_lookup_table=True, scorer tersebut dipakai untuk membangun tabel
+    lookup full-domain. Tabel hanya dipakai jika lolos startup check.
+    """
+    scorer = compile_model(model)
+    if scorer is not None:
+        logger.info("⚡ Model berhasil dikompilasi ke tabel koefisien")
+    else:
+        logger.warning(f"⚠️  Model {type(model).__name__} tidak bisa dikompilasi, memakai jalur sklearn")
+        scorer = SklearnModelScorer(model)
+
+    if not use_lookup_table:
+        return scorer
+
+    table_scorer = LookupTableScorer(build_lookup_table(scorer), fallback=scorer)
+    if not verify_lookup_table(table_scorer, model):
+        logger.error("❌ Tabel lookup tidak cocok dengan model.predict — mode lookup dinonaktifkan")
+        return scorer
+
+    logger.info(f"⚡ Tabel lookup siap: {table_scorer.table.shape}, {table_scorer.table.nbytes / 1024:.0f} KB")
+    return table_scorer
+
+
+def as_scorer(model):
+    """Terima scorer atau model sklearn mentah, selalu kembalikan objek dengan `predict_codes`."""
+    if hasattr(model, "predict_codes"):
+        return model
+    return SklearnModelScorer(model)
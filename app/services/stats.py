@@ -0,0 +1,158 @@
+"""
+app/services/stats.py — Rollup analitik harian (hari × kota × level)
+
+prediction_daily_stats menyimpan jumlah (bukan rata-rata) sehingga bisa
+diperbarui secara inkremental dengan UPSERT "kolom = kolom + delta":
+
+- item prediksi baru  → prediction_count, predicted_salary_sum bertambah
+- feedback masuk      → kontribusi |actual - predicted| LAMA dikurangi,
+                        lalu kontribusi BARU ditambahkan (feedback bisa ditimpa)
+
+Semua delta dihitung set-based dari prediction_items di transaksi yang sama
+dengan penulisan datanya, jadi rollup selalu konsisten dengan histori.
+Baris UPSERT diurutkan berdasarkan primary key agar transaksi yang
+bersamaan mengunci baris dengan urutan yang sama (tanpa deadlock).
+
+/stats cukup membaca rollup: ukurannya sebanding dengan jumlah hari × kota ×
+level, bukan jumlah prediksi.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import PredictionDailyStats
+from app.db.telemetry import track_operation
+
+DEFAULT_STATS_DAYS = 30
+
+_DAY = "(i.created_at AT TIME ZONE 'UTC')::date"
+
+_UPSERT = """
+ON CONFLICT (day, city, job_level) DO UPDATE SET
+    prediction_count = prediction_daily_stats.prediction_count + excluded.prediction_count,
+    predicted_salary_sum = prediction_daily_stats.predicted_salary_sum + excluded.predicted_salary_sum,
+    feedback_count = prediction_daily_stats.feedback_count + excluded.feedback_count,
+    abs_error_sum = prediction_daily_stats.abs_error_sum + excluded.abs_error_sum
+"""
+
+ADD_ITEMS_SQL = f"""
+INSERT INTO prediction_daily_stats
+    (day, city, job_level, prediction_count, predicted_salary_sum, feedback_count, abs_error_sum)
+SELECT {_DAY}, coalesce(i.city, ''), coalesce(i.job_level, ''),
+       count(*), sum(i.predicted_salary), 0, 0
+FROM prediction_items i
+WHERE i.history_id = ANY(:history_ids)
+GROUP BY 1, 2, 3
+ORDER BY 1, 2, 3
+{_UPSERT}
+"""
+
+# :sign = -1 sebelum actual_salary ditimpa, +1 sesudahnya
+FEEDBACK_DELTA_SQL = f"""
+INSERT INTO prediction_daily_stats
+    (day, city, job_level, prediction_count, predicted_salary_sum, feedback_count, abs_error_sum)
+SELECT {_DAY}, coalesce(i.city, ''), coalesce(i.job_level, ''),
+       0, 0, CAST(:sign AS integer) * count(*),
+       CAST(:sign AS integer) * sum(abs(i.actual_salary - i.predicted_salary))
+FROM prediction_items i
+WHERE i.history_id = ANY(:history_ids) AND i.actual_salary IS NOT NULL
+GROUP BY 1, 2, 3
+ORDER BY 1, 2, 3
+{_UPSERT}
+"""
+
+# Bangun ulang seluruh rollup (migrasi / perbaikan). LOCK dulu agar UPSERT
+# dari transaksi tulis yang bersamaan menunggu, lalu diterapkan SETELAH rebuild
+REBUILD_SQL = [
+    "LOCK TABLE prediction_daily_stats IN EXCLUSIVE MODE",
+    "DELETE FROM prediction_daily_stats",
+    f"""
+    INSERT INTO prediction_daily_stats
+        (day, city, job_level, prediction_count, predicted_salary_sum, feedback_count, abs_error_sum)
+    SELECT {_DAY}, coalesce(i.city, ''), coalesce(i.job_level, ''),
+           count(*), sum(i.predicted_salary), count(i.actual_salary),
+           coalesce(sum(abs(i.actual_salary - i.predicted_salary)), 0)
+    FROM prediction_items i
+    GROUP BY 1, 2, 3
+    """,
+]
+
+
+async def add_items_to_rollup(session: AsyncSession, history_ids: list[int]) -> None:
+    """Tambahkan item milik history_ids (yang baru di-INSERT) ke rollup. Commit oleh pemanggil."""
+    if history_ids:
+        await session.execute(text(ADD_ITEMS_SQL), {"history_ids": list(history_ids)})
+
+
+async def apply_feedback_delta(session: AsyncSession, history_ids: list[int], sign: int) -> None:
+    """Kurangi (sign=-1) atau tambahkan (sign=+1) kontribusi feedback item ke rollup."""
+    await session.execute(text(FEEDBACK_DELTA_SQL), {"history_ids": list(history_ids), "sign": sign})
+
+
+def rebuild_rollup(sync_conn) -> None:
+    """Hitung ulang prediction_daily_stats dari prediction_items (satu transaksi)."""
+    for sql in REBUILD_SQL:
+        sync_conn.execute(text(sql))
+
+
+def _summarize(count: int, predicted_sum: float, feedback_count: int, abs_error_sum: float) -> dict:
+    return {
+        "prediction_count": count,
+        "mean_predicted_salary": predicted_sum / count if count else None,
+        "feedback_count": feedback_count,
+        "mean_absolute_error": abs_error_sum / feedback_count if feedback_count else None,
+    }
+
+
+@track_operation("get_stats")
+async def get_stats(
+    session: AsyncSession,
+    start: date | None = None,
+    end: date | None = None,
+    filter_city: str | None = None,
+    filter_level: str | None = None,
+) -> dict:
+    """
+    Baca rollup untuk rentang start <= hari <= end (default DEFAULT_STATS_DAYS
+    hari terakhir s/d hari ini, UTC).
+
+    Returns:
+        dict berisi rentang, ringkasan total, dan baris per (hari, kota, level)
+    """
+    if end is None:
+        end = datetime.now(timezone.utc).date()
+    if start is None:
+        start = end - timedelta(days=DEFAULT_STATS_DAYS - 1)
+    if start > end:
+        raise ValueError("Parameter 'start' harus <= 'end'")
+
+    query = (
+        select(PredictionDailyStats)
+        .where(PredictionDailyStats.day >= start, PredictionDailyStats.day <= end)
+        .order_by(PredictionDailyStats.day, PredictionDailyStats.city, PredictionDailyStats.job_level)
+    )
+    if filter_city:
+        query = query.where(PredictionDailyStats.city == filter_city.lower())
+    if filter_level:
+        query = query.where(PredictionDailyStats.job_level == filter_level.lower())
+
+    rows = (await session.execute(query)).scalars().all()
+
+    items = [
+        {
+            "day": row.day,
+            "city": row.city or None,
+            "job_level": row.job_level or None,
+            **_summarize(row.prediction_count, row.predicted_salary_sum, row.feedback_count, row.abs_error_sum),
+        }
+        for row in rows
+    ]
+    total = _summarize(
+        sum(row.prediction_count for row in rows),
+        sum(row.predicted_salary_sum for row in rows),
+        sum(row.feedback_count for row in rows),
+        sum(row.abs_error_sum for row in rows),
+    )
+    return {"start": start, "end": end, "total": total, "items": items}
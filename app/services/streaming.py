@@ -0,0 +1,233 @@
+"""
+app/services/streaming.py — Prediksi bulk streaming untuk /predict/stream
+
+Upload NDJSON atau CSV berukuran bebas diproses per chunk berukuran tetap:
+parse → validasi vektor → skor → kirim hasil chunk ke client. Memori tetap
+konstan berapa pun jumlah barisnya.
+
+Format input:
+    NDJSON : {"years_experience": 2.6, "city": "jakarta", "job_level": "mid"} per baris
+    CSV    : header wajib berisi years_experience,city,job_level (urutan bebas)
+
+Format output mengikuti input, satu baris per kandidat:
+    NDJSON : {"row": 0, "estimated_salary_million": 6.18} / {"row": 1, "error": "..."}
+    CSV    : row,estimated_salary_million,error
+
+Baris yang tidak valid tidak menghentikan stream — hanya diberi pesan error.
+"""
+
+import csv
+import io
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable
+
+import numpy as np
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from app.services.history import stage_prediction, invalidate_history_cache
+from app.services.validation import (
+    INPUT_COLUMNS, RowChunk, validate_rows, csv_column_index, pick_csv_columns,
+)
+
+logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_CONTENT_TYPES = ("text/csv",)
+
+OUTPUT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse untuk body yang DIBACA sambil response dikirim.
+
+    StreamingResponse bawaan (ASGI spec < 2.4, mis. uvicorn) menjalankan
+    listener disconnect yang ikut memanggil receive() — pesan body request
+    "dicuri" listener tersebut dan upload tidak pernah selesai dibaca.
+    Di sini disconnect cukup dideteksi oleh request.stream() itu sendiri.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+def detect_stream_format(content_type: str) -> str:
+    """Tentukan format stream dari header Content-Type ("ndjson" / "csv")."""
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in NDJSON_CONTENT_TYPES:
+        return "ndjson"
+    if media_type in CSV_CONTENT_TYPES:
+        return "csv"
+    raise LookupError(
+        f"Content-Type '{media_type}' tidak didukung. "
+        f"Gunakan salah satu: {NDJSON_CONTENT_TYPES + CSV_CONTENT_TYPES}"
+    )
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Pecah stream byte (chunked upload) menjadi baris teks, melewati baris kosong."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            text = line.decode("utf-8").rstrip("\r")
+            if text.strip():
+                yield text
+    if buffer.strip():
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+def _parse_ndjson(line: str) -> tuple:
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("Setiap baris NDJSON harus berupa object")
+    return tuple(record.get(name) for name in INPUT_COLUMNS)
+
+
+async def iter_chunks(lines: AsyncIterator[str], fmt: str, chunk_size: int) -> AsyncIterator[RowChunk]:
+    """Kumpulkan baris menjadi RowChunk berukuran maksimal chunk_size."""
+    raw_rows: list = []
+    start_row = 0
+    column_index: list[int] | None = None
+
+    async for line in lines:
+        if fmt == "csv":
+            fields = next(csv.reader([line]))
+            if column_index is None:
+                column_index = csv_column_index(fields)
+                continue
+            raw_rows.append(pick_csv_columns(fields, column_index))
+        else:
+            try:
+                raw_rows.append(_parse_ndjson(line))
+            except ValueError as e:
+                raw_rows.append(f"Baris NDJSON tidak valid: {e}")
+
+        if len(raw_rows) >= chunk_size:
+            yield validate_rows(start_row, raw_rows)
+            start_row += len(raw_rows)
+            raw_rows = []
+
+    if raw_rows:
+        yield validate_rows(start_row, raw_rows)
+
+
+def format_chunk(chunk: RowChunk, predictions: np.ndarray, fmt: str) -> bytes:
+    """Serialisasi hasil satu chunk ke NDJSON / CSV."""
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        for i, error in enumerate(chunk.errors):
+            salary = "" if error else round(float(predictions[i]), 2)
+            writer.writerow([chunk.start_row + i, salary, error or ""])
+        return out.getvalue().encode("utf-8")
+
+    lines = []
+    for i, error in enumerate(chunk.errors):
+        row = {"row": chunk.start_row + i}
+        if error:
+            row["error"] = error
+        else:
+            row["estimated_salary_million"] = round(float(predictions[i]), 2)
+        lines.append(json.dumps(row))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def stream_predictions(
+    body: AsyncIterator[bytes],
+    fmt: str,
+    score_fn: Callable[[np.ndarray, np.ndarray, np.ndarray], Awaitable[np.ndarray]],
+    session,
+    model_version: str,
+    chunk_size: int = 1000,
+    commit_chunks: int = 1,
+) -> AsyncIterator[bytes]:
+    """
+    Generator utama /predict/stream.
+
+    History ditulis dalam transaksi pendek: setiap chunk di-flush (lalu dilepas
+    dari session agar memori konstan) dan di-commit tiap `commit_chunks` chunk.
+    Koneksi pool hanya dipegang selama flush + commit, bukan selama client
+    mengirim upload (yang bisa lambat / tanpa batas), tidak ada transaksi
+    panjang yang menahan vacuum, dan kegagalan di akhir stream tidak
+    membatalkan chunk yang sudah di-commit.
+    Kegagalan DB hanya di-log (histori sisa stream tidak ditulis); prediksi
+    tetap dikirim ke client.
+    """
+    if fmt == "csv":
+        yield b"row,estimated_salary_million,error\n"
+
+    history_ok = True
+    total_rows = 0
+    staged_chunks = 0
+    cities, levels = set(), set()
+
+    async def commit_staged() -> None:
+        nonlocal history_ok, staged_chunks
+        try:
+            await session.commit()
+        except Exception as db_err:
+            history_ok = False
+            logger.error(f"Gagal commit histori stream ke DB: {db_err}")
+            await session.rollback()
+        else:
+            await invalidate_history_cache(cities, levels)
+        staged_chunks = 0
+        cities.clear()
+        levels.clear()
+
+    try:
+        async for chunk in iter_chunks(iter_lines(body), fmt, chunk_size):
+            predictions = np.full(len(chunk), np.nan)
+            valid = chunk.valid
+
+            if valid.any():
+                predictions[valid] = await score_fn(
+                    chunk.converted[valid], chunk.city_codes[valid], chunk.level_codes[valid],
+                )
+
+                if history_ok:
+                    chunk_cities = [c for c, ok in zip(chunk.cities, valid) if ok]
+                    chunk_levels = [l for l, ok in zip(chunk.levels, valid) if ok]
+                    try:
+                        await stage_prediction(session, {
+                            "input_years": chunk.years[valid].tolist(),
+                            "converted_years_decimal": chunk.converted[valid].tolist(),
+                            "city": chunk_cities,
+                            "job_level": chunk_levels,
+                            "estimated_salary_million": np.round(predictions[valid], 2).tolist(),
+                        }, model_version)
+                    except Exception as db_err:
+                        history_ok = False
+                        logger.error(f"Gagal menyimpan histori stream ke DB: {db_err}")
+                        await session.rollback()
+                    else:
+                        staged_chunks += 1
+                        cities.update(chunk_cities)
+                        levels.update(chunk_levels)
+                        if staged_chunks >= commit_chunks:
+                            await commit_staged()
+
+            total_rows += len(chunk)
+            yield format_chunk(chunk, predictions, fmt)
+
+    except ValueError as e:
+        # Error struktural (mis. header CSV salah) → dilaporkan di akhir stream
+        logger.warning(f"Stream prediksi dihentikan: {e}")
+        if fmt == "csv":
+            yield f"-1,,{e}\n".encode("utf-8")
+        else:
+            yield (json.dumps({"row": -1, "error": str(e)}) + "\n").encode("utf-8")
+
+    if history_ok and staged_chunks:
+        await commit_staged()
+
+    logger.info(f"Stream prediksi selesai: {total_rows} baris diproses")
@@ -0,0 +1,100 @@
+"""
+app/services/validation.py — Validasi baris kandidat per chunk (tanpa Pydantic, tanpa DB)
+
+Dipakai oleh jalur bulk (/predict/stream dan CLI app.batch_score) yang
+memproses ribuan baris: aturan bisnisnya sama dengan SalaryInputV2
+(format Y.M, maks MAX_YEARS_EXPERIENCE tahun, kota/level terdaftar,
+normalisasi strip + lowercase), tetapi baris yang tidak valid hanya diberi
+pesan error alih-alih menggagalkan seluruh batch.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.utils.constants import CITY_CODES, JOB_LEVEL_CODES, MAX_YEARS_EXPERIENCE
+from app.utils.converters import convert_ym_array
+
+INPUT_COLUMNS = ("years_experience", "city", "job_level")
+
+
+@dataclass
+class RowChunk:
+    """Satu chunk baris yang sudah di-parse dan divalidasi."""
+    start_row: int
+    years: np.ndarray
+    cities: list[str]
+    levels: list[str]
+    converted: np.ndarray
+    city_codes: np.ndarray
+    level_codes: np.ndarray
+    errors: list[str | None]
+
+    @property
+    def valid(self) -> np.ndarray:
+        return np.array([e is None for e in self.errors], dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.errors)
+
+
+def csv_column_index(header: list[str]) -> list[int]:
+    """Posisi kolom INPUT_COLUMNS di header CSV (urutan kolom bebas)."""
+    normalized = [f.strip().lower() for f in header]
+    missing = [c for c in INPUT_COLUMNS if c not in normalized]
+    if missing:
+        raise ValueError(f"Header CSV tidak lengkap, kolom hilang: {missing}")
+    return [normalized.index(c) for c in INPUT_COLUMNS]
+
+
+def pick_csv_columns(fields: list[str], column_index: list[int]) -> tuple | str:
+    """Ambil (years, city, level) dari satu baris CSV, atau pesan error."""
+    try:
+        return tuple(fields[i] for i in column_index)
+    except IndexError:
+        return f"Jumlah kolom CSV kurang: {','.join(fields)!r}"
+
+
+def validate_rows(start_row: int, raw_rows: list) -> RowChunk:
+    """
+    Validasi satu chunk. raw_rows berisi tuple (years, city, level) atau
+    string pesan error jika baris gagal di-parse.
+    """
+    n = len(raw_rows)
+    errors: list[str | None] = [row if isinstance(row, str) else None for row in raw_rows]
+    years = np.full(n, np.nan)
+    cities, levels = [""] * n, [""] * n
+    city_codes = np.zeros(n, dtype=np.intp)
+    level_codes = np.zeros(n, dtype=np.intp)
+
+    for i, row in enumerate(raw_rows):
+        if errors[i] is not None:
+            continue
+        raw_years, raw_city, raw_level = row
+        try:
+            years[i] = float(raw_years)
+        except (TypeError, ValueError):
+            errors[i] = f"years_experience tidak valid: {raw_years!r}"
+            continue
+
+        cities[i] = str(raw_city or "").strip().lower()
+        levels[i] = str(raw_level or "").strip().lower()
+        if cities[i] not in CITY_CODES:
+            errors[i] = f"Kota '{cities[i]}' tidak valid"
+        elif levels[i] not in JOB_LEVEL_CODES:
+            errors[i] = f"Level '{levels[i]}' tidak valid"
+        else:
+            city_codes[i] = CITY_CODES[cities[i]]
+            level_codes[i] = JOB_LEVEL_CODES[levels[i]]
+
+    # Validasi & konversi Y.M untuk seluruh chunk sekaligus
+    converted, valid_ym = convert_ym_array(years)
+    bad_ym = np.flatnonzero(~valid_ym | (years > MAX_YEARS_EXPERIENCE))
+    for i in bad_ym:
+        if errors[i] is None:
+            errors[i] = (
+                f"Pengalaman '{years[i]}' tidak valid "
+                f"(format Y.M, bulan 0-11, maks {MAX_YEARS_EXPERIENCE} tahun)"
+            )
+
+    return RowChunk(start_row, years, cities, levels, converted, city_codes, level_codes, errors)
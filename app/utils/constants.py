@@ -5,6 +5,9 @@
 VALID_CITIES = ["jakarta", "medan", "bandung", "surabaya", "yogyakarta", "binjai"]
 VALID_JOB_LEVELS = ["junior", "mid", "senior", "lead", "principal", "fresh graduate"]
 
+# Batas atas pengalaman kerja (tahun) yang diterima SalaryInputV2
+MAX_YEARS_EXPERIENCE = 50
+
 # Bobot gaji per kota (relatif terhadap bandung sebagai baseline)
 CITY_MULTIPLIER = {
     "jakarta"   : 1.35,    # Jakarta 35% lebih tinggi dari baseline
@@ -24,3 +27,8 @@ LEVEL_MULTIPLIER = {
     "principal": 2.20,
     "fresh graduate": 0.60,
 }
+
+# Tabel kode integer untuk fitur kategorik — urutannya mengikuti list VALID_* di atas.
+# Dipakai oleh scorer terkompilasi agar kota/level cukup direpresentasikan sebagai indeks
+CITY_CODES = {city: code for code, city in enumerate(VALID_CITIES)}
+JOB_LEVEL_CODES = {level: code for code, level in enumerate(VALID_JOB_LEVELS)}
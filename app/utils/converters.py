@@ -1,24 +1,75 @@
+import numpy as np
+
+# Toleransi untuk memutuskan apakah x × 10 / x × 100 "bulat".
+# 2.11 tersimpan sebagai 2.10999999999999988... → × 100 selisihnya ~1e-14 dari 211
+YM_DECIMAL_ATOL = 1e-9
+
+
+def _split_ym(values) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pecah array Y.M menjadi (tahun, bulan, mask valid) dalam satu pass vektor.
+
+    Semantik sama dengan parsing string lama (str(ym).split(".")):
+    digit desimal dibaca sebagai bilangan bulat bulan.
+        2.6  → 6 bulan     2.11 → 11 bulan
+        2.05 → 5 bulan     2.12 → ditolak (bulan >= 12)
+    Lebih dari 2 digit desimal, negatif, NaN dan inf → tidak valid.
+    """
+    arr = np.asarray(values, dtype=float)
+    finite = np.isfinite(arr) & (arr >= 0)
+    safe = np.where(finite, arr, 0.0)
+
+    years = np.floor(safe)
+    frac = safe - years
+
+    tenths = frac * 10
+    hundredths = frac * 100
+    one_digit = np.abs(tenths - np.rint(tenths)) < YM_DECIMAL_ATOL
+    two_digit = np.abs(hundredths - np.rint(hundredths)) < YM_DECIMAL_ATOL
+
+    months = np.where(one_digit, np.rint(tenths), np.rint(hundredths))
+    valid = finite & (one_digit | two_digit) & (months < 12)
+
+    return years, months, valid
+
+
+def convert_ym_array(values) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Versi array dari convert_ym_to_years().
+
+    Args:
+        values : array/list pengalaman format Y.M
+
+    Returns:
+        (tahun_desimal, mask_valid) — elemen yang tidak valid bernilai NaN
+    """
+    years, months, valid = _split_ym(values)
+    converted = np.round(years + months / 12, 4)
+    return np.where(valid, converted, np.nan), valid
+
+
 def convert_ym_to_years(ym: float) -> float:
     """
     Konversi format Y.M (TAHUN.BULAN) ke desimal murni.
     """
     if ym < 0:
         raise ValueError(f"Pengalaman tidak boleh negatif: '{ym}'.")
-    
-    # Parse via string untuk hindari floating point trap
-    # str(2.11) → "2.11" → split(".") → ["2", "11"]
-    parts = str(ym).split(".")
-    years = int(parts[0])
-    months_str = parts[1] if len(parts) > 1 else "0"
-    months = int(months_str)   # "06" → 6, "11" → 11
-
-    # Validasi hanya boleh 1 digit desimal
-    if months >= 12:
+
+    converted, valid = convert_ym_array([ym])
+    if not valid[0]:
         raise ValueError(
             f"Format tidak valid: '{ym}'. "
-            f"Bulan harus antara 0-11, dapat: {months}."
-            f"Contoh: 2.6 (6 bulan), bukan 2.11"
+            f"Bulan harus antara 0-11. "
+            f"Contoh: 2.6 (6 bulan), 2.11 (11 bulan), bukan 2.12"
         )
-    
+
     # Konversi ke desimal: tahun + (bulan / 12)
-    return round(years + months / 12, 4)
\ No newline at end of file
+    return float(converted[0])
+
+
+def encode_categories(values: list[str], codes: dict) -> np.ndarray:
+    """
+    Ubah list kota/level (sudah dinormalisasi oleh Pydantic) menjadi array kode integer.
+    Contoh: ["jakarta", "binjai"] dengan CITY_CODES → array([0, 5])
+    """
+    return np.fromiter((codes[v] for v in values), dtype=np.intp, count=len(values))
@@ -0,0 +1,44 @@
+"""
+app/utils/metrics.py — Metrik in-process sederhana (tanpa dependency eksternal)
+
+Histogram kumulatif ala Prometheus: setiap observasi masuk ke bucket pertama
+yang batas atasnya >= nilai. Snapshot dikembalikan sebagai dict agar bisa
+langsung di-serialize ke JSON oleh endpoint /admin/metrics.
+"""
+
+import bisect
+import threading
+
+
+class Histogram:
+    """Histogram bucket tetap, aman dipakai dari beberapa thread."""
+
+    def __init__(self, buckets: list[float]):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # +1 untuk bucket "+Inf"
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+            self._count += 1
+            self._max = max(self._max, value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count, maximum = self._sum, self._count, self._max
+
+        labels = [f"le_{b:g}" for b in self.buckets] + ["le_inf"]
+        return {
+            "count": count,
+            "sum": round(total, 4),
+            "mean": round(total / count, 4) if count else 0.0,
+            "max": round(maximum, 4),
+            "buckets": dict(zip(labels, counts)),
+        }
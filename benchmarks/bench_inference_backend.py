@@ -0,0 +1,113 @@
+"""
+benchmarks/bench_inference_backend.py — Bandingkan backend inferensi inline / thread / process
+
+Jalankan dari root project:
+    python benchmarks/bench_inference_backend.py
+    python benchmarks/bench_inference_backend.py --model ml/gaji_model_v3.pkl --workers 4
+
+Jika file model belum ada, model V2 dilatih sementara dari data sintetik.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+# Windows CMD Unicode patch
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding="utf-8")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.inference import InferenceBackend, INFERENCE_MODES
+from app.services.scorer import build_scorer
+from app.utils.constants import VALID_CITIES, VALID_JOB_LEVELS
+
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+
+
+def make_batch(n: int, rng: np.random.Generator):
+    years = np.round(rng.integers(0, 50 * 12 + 1, n) / 12, 4)
+    return years, rng.integers(0, len(VALID_CITIES), n), rng.integers(0, len(VALID_JOB_LEVELS), n)
+
+
+def resolve_model_path(path: str) -> str:
+    if os.path.exists(path):
+        return path
+
+    from ml.train_model_v2 import build_pipeline, generate_training_data
+
+    print(f"ℹ️  '{path}' tidak ditemukan, melatih model V2 sementara...")
+    X, y = generate_training_data()
+    tmp_path = os.path.join(tempfile.mkdtemp(), "gaji_model_v2.pkl")
+    joblib.dump(build_pipeline().fit(X, y), tmp_path)
+    return tmp_path
+
+
+async def run_mode(backend: InferenceBackend, batches: dict, concurrency: int) -> dict:
+    results = {}
+    for size, (batch, repeat) in batches.items():
+        await backend.score(*batch)  # warm-up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            await asyncio.gather(*(backend.score(*batch) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        calls = repeat * concurrency
+        results[size] = (elapsed / calls * 1000, size * calls / elapsed)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="ml/gaji_model_v2.pkl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--concurrency", type=int, default=4, help="Jumlah panggilan paralel per iterasi")
+    parser.add_argument("--lookup-table", action="store_true", help="Pakai tabel lookup (PREDICTION_LOOKUP_TABLE)")
+    args = parser.parse_args()
+
+    model_path = resolve_model_path(args.model)
+    scorer = build_scorer(joblib.load(model_path), use_lookup_table=args.lookup_table)
+
+    rng = np.random.default_rng(42)
+    # Batch besar diulang lebih sedikit agar total durasi benchmark wajar
+    batches = {size: (make_batch(size, rng), max(3, 2_000 // size)) for size in BATCH_SIZES}
+
+    print("=" * 72)
+    print(f"  BENCHMARK BACKEND INFERENSI — scorer: {type(scorer).__name__}")
+    print(f"  workers={args.workers}, concurrency={args.concurrency}")
+    print("=" * 72)
+
+    all_results = {}
+    for mode in INFERENCE_MODES:
+        backend = InferenceBackend(
+            mode,
+            get_scorer=lambda: scorer,
+            model_path=model_path,
+            use_lookup_table=args.lookup_table,
+            workers=args.workers,
+        )
+        backend.start()
+        try:
+            all_results[mode] = asyncio.run(run_mode(backend, batches, args.concurrency))
+        finally:
+            backend.shutdown()
+
+    header = f"   {'Batch':>8} " + "".join(f"| {mode:>10} ms {'rows/s':>12} " for mode in INFERENCE_MODES)
+    print(header)
+    print(f"   {'-' * (len(header) - 3)}")
+    for size in BATCH_SIZES:
+        row = f"   {size:>8} "
+        for mode in INFERENCE_MODES:
+            latency_ms, rows_per_sec = all_results[mode][size]
+            row += f"| {latency_ms:>13.3f} {rows_per_sec:>12,.0f} "
+        print(row)
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
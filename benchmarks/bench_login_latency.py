@@ -0,0 +1,113 @@
+"""
+benchmarks/bench_login_latency.py — Latensi /predict selama burst login
+
+Mensimulasikan satu worker uvicorn: request /predict kecil datang tiap
+--interval-ms sementara --logins login berjalan bersamaan. Dibandingkan:
+- inline : bcrypt dipanggil langsung di handler async (perilaku lama)
+- hasher : PasswordHasher (thread pool bcrypt + batas antrean)
+
+Latensi /predict diukur dari waktu request seharusnya dilayani sampai selesai,
+jadi event loop yang tertahan bcrypt langsung terlihat di p99.
+
+Jalankan dari root project:
+    python benchmarks/bench_login_latency.py
+    python benchmarks/bench_login_latency.py --rounds 12 --logins 32 --workers 2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+# Windows CMD Unicode patch
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding="utf-8")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.auth import hash_password, verify_password
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy
+
+PASSWORD = "rahasia123"
+
+
+async def predict_traffic(stop: asyncio.Event, interval: float) -> list[float]:
+    """Request /predict terjadwal; latensi = selesai - jadwal seharusnya (ms)."""
+    latencies = []
+    loop = asyncio.get_running_loop()
+    next_at = loop.time()
+    while not stop.is_set():
+        next_at += interval
+        await asyncio.sleep(max(0.0, next_at - loop.time()))
+        # Pekerjaan /predict kecil (validasi + scoring terkompilasi) ~ puluhan mikrodetik
+        np.round(np.arange(10, dtype=float) / 12, 4).sum()
+        latencies.append((loop.time() - next_at) * 1000)
+    return latencies
+
+
+async def run_mode(mode: str, hashed: str, args) -> dict:
+    hasher = PasswordHasher(rounds=args.rounds, workers=args.workers, max_pending=args.max_pending)
+    rejected = 0
+
+    async def login():
+        nonlocal rejected
+        if mode == "inline":
+            verify_password(PASSWORD, hashed)
+            return
+        try:
+            await hasher.verify(PASSWORD, hashed)
+        except PasswordHasherBusy:
+            rejected += 1
+
+    stop = asyncio.Event()
+    traffic = asyncio.create_task(predict_traffic(stop, args.interval_ms / 1000))
+    await asyncio.sleep(0.2)  # baseline sebelum burst
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.logins)))
+    login_seconds = time.perf_counter() - started
+    await asyncio.sleep(0.2)
+    stop.set()
+    latencies = np.array(await traffic)
+    hasher.shutdown()
+
+    return {
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99)),
+        "max": float(latencies.max()),
+        "requests": len(latencies),
+        "login_seconds": login_seconds,
+        "rejected": rejected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=12, help="Cost bcrypt")
+    parser.add_argument("--logins", type=int, default=16, help="Login bersamaan dalam burst")
+    parser.add_argument("--workers", type=int, default=2, help="Thread bcrypt (mode hasher)")
+    parser.add_argument("--max-pending", type=int, default=64, help="Batas antrean (mode hasher)")
+    parser.add_argument("--interval-ms", type=float, default=5, help="Jarak antar request /predict")
+    args = parser.parse_args()
+
+    hashed = hash_password(PASSWORD, args.rounds)
+
+    print("=" * 72)
+    print(f"  LATENSI /predict SELAMA BURST LOGIN — bcrypt cost {args.rounds}, {args.logins} login")
+    print(f"  hasher: workers={args.workers}, max_pending={args.max_pending}")
+    print("=" * 72)
+    print(f"   {'Mode':>8} | {'p50 ms':>9} | {'p99 ms':>9} | {'max ms':>9} | {'login s':>8} | {'503':>4}")
+    print(f"   {'-' * 62}")
+    for mode in ("inline", "hasher"):
+        r = asyncio.run(run_mode(mode, hashed, args))
+        print(
+            f"   {mode:>8} | {r['p50']:>9.2f} | {r['p99']:>9.2f} | {r['max']:>9.2f} | "
+            f"{r['login_seconds']:>8.2f} | {r['rejected']:>4}"
+        )
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+benchmarks/bench_predict_response.py — Bandingkan response /predict penuh vs ringkas (?compact=true)
+
+Jalankan dari root project:
+    python benchmarks/bench_predict_response.py
+    python benchmarks/bench_predict_response.py --rows 1 10 100 --repeat 5000
+
+Jalur penuh meniru FastAPI: validasi dict ke SalaryOutputV2 (response_model),
+jsonable_encoder, lalu JSONResponse. Jalur ringkas memakai encode_compact_result.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+
+# Windows CMD Unicode patch
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding="utf-8")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.schemas.models import SalaryOutputV2
+from app.services.predictor import build_prediction_result, encode_compact_result
+from app.utils.constants import VALID_CITIES, VALID_JOB_LEVELS
+from app.utils.converters import convert_ym_array
+
+
+def make_result(n: int, rng: np.random.Generator) -> dict:
+    years = (rng.integers(0, 30, n) + rng.integers(0, 12, n) / 100).round(2).tolist()
+    cities = rng.choice(VALID_CITIES, n).tolist()
+    levels = rng.choice(VALID_JOB_LEVELS, n).tolist()
+    converted, _ = convert_ym_array(years)
+    return build_prediction_result(years, cities, levels, converted, rng.uniform(4, 40, n))
+
+
+def full_response(result: dict) -> bytes:
+    validated = SalaryOutputV2.model_validate(result)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def compact_response(result: dict) -> bytes:
+    return encode_compact_result(uuid.uuid4().hex, result["estimated_salary_million"])
+
+
+def measure(fn, result: dict, repeat: int) -> tuple[int, float]:
+    size = len(fn(result))
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(result)
+    return size, (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)  # build_prediction_result mencatat log per panggilan
+
+    rng = np.random.default_rng(42)
+
+    print("=" * 72)
+    print("  BENCHMARK RESPONSE /predict — penuh vs ringkas (?compact=true)")
+    print("=" * 72)
+    print(f"   {'Baris':>6} | {'Penuh B':>9} {'µs':>8} | {'Ringkas B':>9} {'µs':>8} | {'Byte':>6} {'Waktu':>6}")
+    print(f"   {'-' * 66}")
+    for n in args.rows:
+        result = make_result(n, rng)
+        full_bytes, full_us = measure(full_response, result, args.repeat)
+        compact_bytes, compact_us = measure(compact_response, result, args.repeat)
+        print(
+            f"   {n:>6} | {full_bytes:>9,} {full_us:>8.1f} | {compact_bytes:>9,} {compact_us:>8.1f} "
+            f"| {full_bytes / compact_bytes:>5.1f}× {full_us / compact_us:>5.1f}×"
+        )
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
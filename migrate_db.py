@@ -1,45 +1,67 @@
 """
-migrate_db.py — Skrip migrasi mini untuk menambahkan kolom baru ke tabel yang sudah ada.
+migrate_db.py — CLI runner migrasi database berversi (lihat app/db/migrations.py)
 
-Jalankan sekali saja setelah update model database:
-    python migrate_db.py
+    python migrate_db.py                    # terapkan migrasi yang belum jalan + verifikasi plan
+    python migrate_db.py --status           # tampilkan versi skema & migrasi tertunda
+    python migrate_db.py --verify           # hanya cek EXPLAIN query utama
+    python migrate_db.py --chunk-size 2000  # ukuran batch backfill
 
-Aman dijalankan berkali-kali (idempotent) — jika kolom sudah ada, akan di-skip.
+Aman dijalankan berkali-kali — versi yang sudah tercatat di schema_version
+di-skip. Backfill dan CREATE INDEX CONCURRENTLY yang terhenti di tengah
+dilanjutkan saat dijalankan ulang.
 """
 
+import argparse
 import asyncio
 import sys
 
 if sys.platform == "win32":
     sys.stdout.reconfigure(encoding='utf-8')
 
-from sqlalchemy import text
 from app.db.database import engine
+from app.db.migrations import (
+    DEFAULT_CHUNK_SIZE, LATEST_VERSION, pending_migrations, run_migrations, verify_query_plans,
+)
 
-MIGRATIONS = [
-    {
-        "description": "Tambah kolom actual_salaries ke prediction_history",
-        "check": "SELECT column_name FROM information_schema.columns WHERE table_name='prediction_history' AND column_name='actual_salaries'",
-        "sql": "ALTER TABLE prediction_history ADD COLUMN actual_salaries FLOAT[] DEFAULT NULL",
-    },
-]
+async def print_status():
+    pending = await pending_migrations(engine)
+    print(f"📋 Versi terbaru: {LATEST_VERSION}, tertunda: {len(pending)}")
+    for migration in pending:
+        print(f"   ⏳ [{migration.version}] {migration.description}")
 
-async def run_migrations():
-    print("🔄 Menjalankan migrasi database...\n")
+async def print_verification() -> bool:
+    print("🔍 Verifikasi query plan (EXPLAIN):\n")
+    all_ok = True
+    for description, expected, ok, used in await verify_query_plans(engine):
+        all_ok &= ok
+        status = "✅" if ok else "⚠️ "
+        detail = "" if ok else f" (plan memakai: {sorted(used) or 'seq scan'})"
+        print(f"   {status} {description} → {expected}{detail}")
+    return all_ok
 
-    async with engine.begin() as conn:
-        for i, migration in enumerate(MIGRATIONS, 1):
-            # Cek apakah kolom sudah ada
-            result = await conn.execute(text(migration["check"]))
-            exists = result.fetchone()
+async def main(args) -> int:
+    try:
+        if args.status:
+            await print_status()
+            return 0
 
-            if exists:
-                print(f"   ✅ [{i}] SKIP — {migration['description']} (sudah ada)")
-            else:
-                await conn.execute(text(migration["sql"]))
-                print(f"   🆕 [{i}] OK — {migration['description']}")
+        if not args.verify:
+            print("🔄 Menjalankan migrasi database...\n")
+            applied = await run_migrations(engine, args.chunk_size)
+            if not applied:
+                print("   ✅ Skema sudah versi terbaru")
+            print("\n✅ Migrasi selesai!\n")
 
-    print("\n✅ Migrasi selesai!")
+        return 0 if await print_verification() else 1
+    finally:
+        await engine.dispose()
 
 if __name__ == "__main__":
-    asyncio.run(run_migrations())
+    parser = argparse.ArgumentParser(description="Migrasi database berversi.")
+    parser.add_argument("--status", action="store_true", help="Tampilkan migrasi yang tertunda")
+    parser.add_argument("--verify", action="store_true", help="Hanya verifikasi query plan")
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+        help="Jumlah baris sumber per transaksi backfill",
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -25,15 +25,15 @@ if sys.platform == "win32":
 # Pastikan root project ada di sys.path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import select
+from sqlalchemy import select, func, union_all
 from sklearn.linear_model import Ridge
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.compose import ColumnTransformer, TransformedTargetRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import mean_absolute_error, r2_score
 
-from app.db.database import AsyncSessionLocal
-from app.db.models import PredictionHistory
+from app.db.database import ReadSessionLocal
+from app.db.models import PredictionItem, RetainedFeedbackItem
 from app.utils.constants import VALID_CITIES, VALID_JOB_LEVELS
 
 logger = logging.getLogger(__name__)
@@ -44,31 +44,31 @@ MODEL_V3_PATH = "ml/gaji_model_v3.pkl"
 
 async def fetch_feedback_data() -> tuple[list, list]:
     """
-    Ambil semua histori prediksi yang sudah memiliki feedback (actual_salaries).
-    Kembalikan sebagai (X_rows, y_values) yang di-flatten.
+    Ambil semua kandidat yang sudah memiliki feedback (actual_salary)
+    langsung dari tabel prediction_items — satu baris per kandidat —
+    ditambah item ber-feedback dari partisi yang sudah diarsipkan (retensi).
+    Kembalikan sebagai (X_rows, y_values).
 
     Contoh:
-        1 record = 5 kandidat → jadi 5 baris training data
+        1 record histori = 5 kandidat → 5 baris item → 5 baris training data
     """
-    async with AsyncSessionLocal() as session:
-        query = select(PredictionHistory).where(
-            PredictionHistory.actual_salaries.is_not(None)
-        )
+    query = union_all(*(
+        select(
+            table.converted_years,
+            func.coalesce(table.city, "jakarta"),
+            func.coalesce(table.job_level, "mid"),
+            table.actual_salary,
+        ).where(table.actual_salary.is_not(None))
+        for table in (PredictionItem, RetainedFeedbackItem)
+    ))
+
+    # Full scan → engine baca (replica), tidak memakai pool primary
+    async with ReadSessionLocal() as session:
         result = await session.execute(query)
-        records = result.scalars().all()
+        rows = result.all()
 
-    X_rows = []
-    y_values = []
-
-    for record in records:
-        for i in range(record.data_count):
-            years = record.converted_years[i]
-            city = record.city[i] if record.city else "jakarta"
-            level = record.job_level[i] if record.job_level else "mid"
-            actual_salary = record.actual_salaries[i]
-
-            X_rows.append([years, city, level])
-            y_values.append(actual_salary)
+    X_rows = [[years, city, level] for years, city, level, _ in rows]
+    y_values = [actual_salary for *_, actual_salary in rows]
 
     return X_rows, y_values
 
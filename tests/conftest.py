@@ -0,0 +1,35 @@
+"""
+tests/conftest.py — Fixture bersama untuk test yang memakai TEST_DATABASE_URL
+
+Database test diperlakukan sebagai database sekali pakai: test migrasi dan
+retensi mulai dari skema histori yang kosong.
+"""
+
+import pytest
+from sqlalchemy import text
+
+# Tabel histori + catatan migrasi; partisi ikut terhapus lewat CASCADE
+HISTORY_TABLES = [
+    "prediction_history", "prediction_items", "retained_feedback_items",
+    "prediction_daily_stats", "schema_version", "schema_backfill_progress",
+]
+
+
+async def _drop_history_schema(engine) -> None:
+    async with engine.begin() as conn:
+        # Sisa partisi yang sudah ter-detach (retensi / migrasi 7) bukan partisi lagi
+        leftovers = (await conn.execute(text(
+            "SELECT relname FROM pg_class WHERE relkind IN ('r', 'p') "
+            "AND relnamespace = current_schema()::regnamespace "
+            "AND relname ~ '^prediction_(history|items)_(p[0-9]{6}|legacy)$'"
+        ))).scalars().all()
+        for name in [*HISTORY_TABLES, *leftovers]:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {name} CASCADE"))
+        for sequence in ("prediction_history_id_seq_legacy", "prediction_items_id_seq_legacy"):
+            await conn.execute(text(f"DROP SEQUENCE IF EXISTS {sequence}"))
+
+
+@pytest.fixture
+def drop_history_schema():
+    """Coroutine function (engine) → hapus seluruh tabel histori & catatan migrasi."""
+    return _drop_history_schema
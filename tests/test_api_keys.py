@@ -0,0 +1,112 @@
+"""
+tests/test_api_keys.py — Unit test API key service-to-service
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import hashlib
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+
+import app.services.auth as auth
+from app.services.api_keys import ApiKeyIndex, generate_api_key, hash_api_key, is_api_key
+from app.services.principal_cache import Principal
+
+
+class FakeKeyTable:
+    """Pengganti session factory: baris (key_hash, username, role) key yang aktif."""
+
+    def __init__(self):
+        self.rows = []
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query):
+        rows = list(self.rows)
+        return SimpleNamespace(all=lambda: rows)
+
+
+def _index_with(*keys: tuple[str, str, str]) -> tuple[ApiKeyIndex, FakeKeyTable]:
+    table = FakeKeyTable()
+    table.rows = [(hash_api_key(key), username, role) for key, username, role in keys]
+    index = ApiKeyIndex(table, refresh_seconds=60)
+    asyncio.run(index.refresh())
+    return index, table
+
+
+class TestApiKeyFormat:
+
+    def test_key_acak_dan_berprefix(self):
+        first, second = generate_api_key(), generate_api_key()
+        assert first != second
+        assert is_api_key(first)
+        assert len(first) > 40
+
+    def test_hash_sha256(self):
+        assert hash_api_key("sal_abc") == hashlib.sha256(b"sal_abc").hexdigest()
+
+    def test_jwt_bukan_api_key(self):
+        assert not is_api_key("eyJhbGciOiJIUzI1NiJ9.e30.abc")
+
+
+class TestApiKeyIndex:
+
+    def test_lookup(self):
+        key = generate_api_key()
+        index, _ = _index_with((key, "svc_batch", "user"))
+        assert index.lookup(key) == Principal("svc_batch", "user")
+        assert index.lookup(generate_api_key()) is None
+        assert index.hits == 1 and index.misses == 1
+
+    def test_pencabutan_berlaku_setelah_refresh(self):
+        key = generate_api_key()
+        index, table = _index_with((key, "svc_batch", "user"))
+        table.rows = []
+        asyncio.run(index.refresh())
+        assert index.lookup(key) is None
+        assert index.metrics()["active_keys"] == 0
+
+
+class TestGetCurrentUserApiKey:
+
+    @pytest.fixture
+    def key(self, monkeypatch):
+        key = generate_api_key()
+        index, _ = _index_with((key, "svc_batch", "admin"))
+        monkeypatch.setattr(auth, "api_key_index", index)
+        return key
+
+    def _current_user(self, token=None, api_key=None) -> Principal:
+        # db=None: jalur API key tidak boleh menyentuh DB
+        return asyncio.run(auth.get_current_user(token=token, api_key=api_key, db=None))
+
+    def test_header_x_api_key(self, key):
+        assert self._current_user(api_key=key) == Principal("svc_batch", "admin")
+
+    def test_bearer_api_key(self, key):
+        assert self._current_user(token=key) == Principal("svc_batch", "admin")
+
+    def test_key_tidak_dikenal_ditolak(self, key):
+        with pytest.raises(HTTPException) as exc:
+            self._current_user(api_key=generate_api_key())
+        assert exc.value.status_code == 401
+
+    def test_tanpa_kredensial_ditolak(self, key):
+        with pytest.raises(HTTPException) as exc:
+            self._current_user()
+        assert exc.value.status_code == 401
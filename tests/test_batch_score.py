@@ -0,0 +1,101 @@
+"""
+tests/test_batch_score.py — Unit test untuk CLI batch scoring offline (app.batch_score)
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import csv
+import pytest
+import sys
+import os
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.batch_score import count_data_rows, run_batch_score
+from app.services.predictor import predict_salaries_v2
+from ml.train_model_v2 import build_pipeline, generate_training_data
+
+ROWS = [
+    ("2.6", "jakarta", "mid"),
+    ("1.15", "jakarta", "mid"),   # bulan 15 → tidak valid
+    ("5.0", "Surabaya ", "SENIOR"),
+    ("3.0", "tokyo", "mid"),      # kota tidak terdaftar
+    ("0.3", "medan", "junior"),
+]
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    X, y = generate_training_data()
+    path = tmp_path_factory.mktemp("model") / "model.pkl"
+    joblib.dump(build_pipeline().fit(X, y), path)
+    return str(path)
+
+
+def _write_csv(path, newline: str = "\n") -> str:
+    # Urutan kolom berbeda dari default + baris kosong di tengah
+    lines = ["city,job_level,years_experience"]
+    lines += [f"{city},{level},{years}" for years, city, level in ROWS[:2]]
+    lines.append("")
+    lines += [f"{city},{level},{years}" for years, city, level in ROWS[2:]]
+    path.write_bytes((newline.join(lines) + newline).encode("utf-8"))
+    return str(path)
+
+
+@pytest.fixture
+def input_csv(tmp_path):
+    return _write_csv(tmp_path / "in.csv")
+
+
+def _expected(model_path):
+    model = joblib.load(model_path)
+    result = predict_salaries_v2(model, [2.6, 5.0, 0.3], ["jakarta", "surabaya", "medan"], ["mid", "senior", "junior"])
+    return np.round(result["estimated_salary_million"], 2)
+
+
+class TestBatchScore:
+
+    def test_count_data_rows(self, input_csv):
+        assert count_data_rows(input_csv) == len(ROWS)
+
+    @pytest.mark.parametrize("newline", ["\r\n", "\r"])
+    def test_npy_sesuai_baris_untuk_semua_pemisah_baris(self, model_path, tmp_path, newline):
+        # CR-only dulu terhitung 0 baris data sementara pembaca tetap menskor 5 baris
+        input_path = _write_csv(tmp_path / "in.csv", newline)
+        out = str(tmp_path / "out.npy")
+        summary = run_batch_score(input_path, out, model_path, workers=1, chunk_size=2)
+
+        result = np.load(out)
+        assert count_data_rows(input_path) == len(ROWS)
+        assert summary["rows"] == len(result) == len(ROWS)
+        np.testing.assert_allclose(result[[0, 2, 4]], _expected(model_path))
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_output_npy_urut_dan_nan_untuk_baris_invalid(self, model_path, input_csv, tmp_path, workers):
+        out = str(tmp_path / "out.npy")
+        summary = run_batch_score(input_csv, out, model_path, workers=workers, chunk_size=2)
+
+        result = np.load(out)
+        assert summary["rows"] == len(ROWS)
+        assert summary["invalid_rows"] == 2
+        assert np.isnan(result[[1, 3]]).all()
+        np.testing.assert_allclose(result[[0, 2, 4]], _expected(model_path))
+
+    def test_output_csv_berisi_kolom_error(self, model_path, input_csv, tmp_path):
+        out = str(tmp_path / "out.csv")
+        run_batch_score(input_csv, out, model_path, workers=1, chunk_size=2)
+
+        with open(out, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [int(r["row"]) for r in rows] == list(range(len(ROWS)))
+        assert rows[1]["error"] and rows[3]["error"]
+        assert rows[1]["estimated_salary_million"] == ""
+        salaries = [float(rows[i]["estimated_salary_million"]) for i in (0, 2, 4)]
+        np.testing.assert_allclose(salaries, _expected(model_path))
+
+    def test_format_output_tidak_didukung(self, model_path, input_csv, tmp_path):
+        with pytest.raises(ValueError):
+            run_batch_score(input_csv, str(tmp_path / "out.parquet"), model_path)
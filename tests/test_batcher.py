@@ -0,0 +1,84 @@
+"""
+tests/test_batcher.py — Unit test untuk micro-batching PredictionBatcher
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.batcher import PredictionBatcher
+
+
+def _request(years: list[float]):
+    n = len(years)
+    return np.array(years, dtype=float), np.zeros(n, dtype=np.intp), np.zeros(n, dtype=np.intp)
+
+
+class TestPredictionBatcher:
+
+    def test_request_bersamaan_digabung_satu_batch(self):
+        calls = []
+
+        async def score(years, city_codes, level_codes):
+            calls.append(len(years))
+            return years * 10
+
+        async def scenario():
+            batcher = PredictionBatcher(score, max_batch_rows=100, max_wait_ms=20)
+            await batcher.start()
+            results = await asyncio.gather(
+                batcher.submit(*_request([1.0])),
+                batcher.submit(*_request([2.0, 3.0])),
+                batcher.submit(*_request([4.0])),
+            )
+            await batcher.stop()
+            return batcher, results
+
+        batcher, results = asyncio.run(scenario())
+
+        assert calls == [4]
+        assert [r.tolist() for r in results] == [[10.0], [20.0, 30.0], [40.0]]
+        assert batcher.metrics()["batch_rows"]["count"] == 1
+        assert batcher.metrics()["queue_delay_ms"]["count"] == 3
+
+    def test_batch_dipotong_sesuai_max_rows(self):
+        calls = []
+
+        async def score(years, city_codes, level_codes):
+            calls.append(len(years))
+            return years
+
+        async def scenario():
+            batcher = PredictionBatcher(score, max_batch_rows=2, max_wait_ms=20)
+            await batcher.start()
+            await asyncio.gather(*(batcher.submit(*_request([float(i)])) for i in range(5)))
+            await batcher.stop()
+
+        asyncio.run(scenario())
+        assert calls == [2, 2, 1]
+
+    def test_error_diteruskan_ke_semua_request(self):
+        async def score(years, city_codes, level_codes):
+            raise RuntimeError("model rusak")
+
+        async def scenario():
+            batcher = PredictionBatcher(score, max_wait_ms=5)
+            await batcher.start()
+            results = await asyncio.gather(
+                batcher.submit(*_request([1.0])),
+                batcher.submit(*_request([2.0])),
+                return_exceptions=True,
+            )
+            await batcher.stop()
+            return batcher, results
+
+        batcher, results = asyncio.run(scenario())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert batcher.failed_batches == 1
@@ -0,0 +1,94 @@
+"""
+tests/test_columnar.py — Unit test untuk codec payload kolumnar /predict/columnar
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import io
+import pytest
+import sys
+import os
+import msgpack
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.columnar import (
+    MAX_COLUMNAR_ROWS, code_table, columnar_row_limit, decode_payload, validate_columns, encode_response,
+)
+from app.utils.constants import CITY_CODES, JOB_LEVEL_CODES
+
+
+def _msgpack_body(years, cities, levels) -> bytes:
+    return msgpack.packb({
+        "years_experience": np.array(years, dtype="<f4").tobytes(),
+        "city": np.array([CITY_CODES[c] for c in cities], dtype="u1").tobytes(),
+        "job_level": np.array([JOB_LEVEL_CODES[l] for l in levels], dtype="u1").tobytes(),
+    })
+
+
+class TestColumnarCodec:
+
+    def test_msgpack_buffer_float32(self):
+        body = _msgpack_body([2.11, 2.6, 50.0], ["jakarta", "binjai", "medan"], ["mid", "lead", "junior"])
+        years, city_codes, level_codes = decode_payload(body, "application/msgpack")
+        years_ym, converted = validate_columns(years, city_codes, level_codes)
+
+        assert years_ym.tolist() == [2.11, 2.6, 50.0]
+        assert converted.tolist() == pytest.approx([2 + 11 / 12, 2.5, 50.0], abs=1e-4)
+        assert city_codes.tolist() == [0, 5, 1]
+
+    def test_npz_payload(self):
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            years_experience=np.array([1.3], dtype=np.float32),
+            city=np.array([2], dtype=np.uint8),
+            job_level=np.array([1], dtype=np.uint8),
+        )
+        years, city_codes, level_codes = decode_payload(buffer.getvalue(), "application/x-npz")
+        _, converted = validate_columns(years, city_codes, level_codes)
+        assert converted.tolist() == [1.25]
+
+    def test_nilai_tidak_valid_ditolak(self):
+        years, city_codes, level_codes = decode_payload(
+            _msgpack_body([2.12, 1.0], ["jakarta", "jakarta"], ["mid", "mid"]), "application/msgpack",
+        )
+        with pytest.raises(ValueError, match="years_experience.*1 nilai tidak valid"):
+            validate_columns(years, city_codes, level_codes)
+
+        body = msgpack.packb({"years_experience": [1.0], "city": [6], "job_level": [0]})
+        with pytest.raises(ValueError, match="'city'"):
+            validate_columns(*decode_payload(body, "application/msgpack"))
+
+        body = msgpack.packb({"years_experience": [1.0], "city": [300], "job_level": [0]})
+        with pytest.raises(ValueError, match="di luar rentang"):
+            decode_payload(body, "application/msgpack")
+
+    @pytest.mark.parametrize("rate_limit_rows, expected", [
+        (2000, 2000),
+        (0, MAX_COLUMNAR_ROWS),
+        (50_000, MAX_COLUMNAR_ROWS),
+    ])
+    def test_batas_baris_dipotong_kuota_rate_limit(self, rate_limit_rows, expected):
+        assert columnar_row_limit(rate_limit_rows) == expected
+        assert code_table(columnar_row_limit(rate_limit_rows))["max_rows"] == expected
+
+    def test_payload_melebihi_batas_ditolak(self):
+        years, city_codes, level_codes = decode_payload(
+            _msgpack_body([1.0] * 3, ["jakarta"] * 3, ["mid"] * 3), "application/msgpack",
+        )
+        with pytest.raises(ValueError, match="Maksimal 2 baris"):
+            validate_columns(years, city_codes, level_codes, max_rows=2)
+        validate_columns(years, city_codes, level_codes, max_rows=3)
+
+    def test_content_type_tidak_didukung(self):
+        with pytest.raises(LookupError):
+            decode_payload(b"{}", "application/json")
+
+    def test_encode_response_msgpack(self):
+        body, media_type = encode_response(np.array([4.5, 10.25]), "application/msgpack")
+        payload = msgpack.unpackb(body)
+        assert media_type == "application/msgpack"
+        assert np.frombuffer(payload["estimated_salary_million"], dtype=payload["dtype"]).tolist() == [4.5, 10.25]
@@ -0,0 +1,114 @@
+"""
+tests/test_db_telemetry.py — Unit test telemetri pool koneksi & statement SQL
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import inspect
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.util import greenlet_spawn
+
+from app.db.telemetry import EngineTelemetry, track_operation
+from app.services.auth import get_current_user
+
+
+class FakeConnection:
+    """Koneksi DBAPI palsu — cukup untuk checkout / checkin pool."""
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _pool(telemetry: EngineTelemetry, pool_size: int, max_overflow: int, timeout: float = 30):
+    return telemetry.pool_class()(FakeConnection, pool_size=pool_size, max_overflow=max_overflow, timeout=timeout)
+
+
+def _execute(telemetry: EngineTelemetry) -> None:
+    context = SimpleNamespace()
+    telemetry._before_execute(None, None, "SELECT 1", {}, context, False)
+    telemetry._after_execute(None, None, "SELECT 1", {}, context, False)
+
+
+class TestStatementTelemetry:
+
+    def test_statement_dilabeli_fungsi_service(self):
+        telemetry = EngineTelemetry()
+
+        @track_operation("get_all_history")
+        async def service():
+            _execute(telemetry)
+            _execute(telemetry)
+
+        asyncio.run(service())
+        _execute(telemetry)
+
+        statements = telemetry.metrics()["statement_ms"]
+        assert statements["get_all_history"]["count"] == 2
+        assert statements["other"]["count"] == 1
+
+    def test_label_dikembalikan_setelah_error(self):
+        telemetry = EngineTelemetry()
+
+        @track_operation("save_prediction")
+        async def service():
+            raise ValueError("gagal")
+
+        async def scenario():
+            with pytest.raises(ValueError):
+                await service()
+            _execute(telemetry)
+
+        asyncio.run(scenario())
+        assert list(telemetry.metrics()["statement_ms"]) == ["other"]
+
+    def test_signature_dependency_tetap_terbaca(self):
+        # FastAPI membaca parameter Depends() dari signature fungsi asli
+        assert list(inspect.signature(get_current_user).parameters) == ["token", "api_key", "db"]
+
+
+class TestPoolTelemetry:
+
+    def test_checkout_overflow_dan_puncak(self):
+        telemetry = EngineTelemetry()
+        pool = _pool(telemetry, pool_size=1, max_overflow=1)
+
+        first = pool.connect()
+        second = pool.connect()  # pool_size habis → koneksi overflow
+        second.close()
+        first.close()
+
+        assert telemetry.overflow_checkouts == 1
+        assert telemetry.peak_checked_out == 2
+        assert telemetry.checkout_wait_ms.snapshot()["count"] == 2
+        assert pool.checkedout() == 0
+
+    def test_checkout_timeout_dihitung(self):
+        telemetry = EngineTelemetry()
+        pool = _pool(telemetry, pool_size=1, max_overflow=0, timeout=0.01)
+
+        async def scenario():
+            held = await greenlet_spawn(pool.connect)
+            with pytest.raises(PoolTimeoutError):
+                await greenlet_spawn(pool.connect)
+            held.close()
+
+        asyncio.run(scenario())
+        assert telemetry.checkout_timeouts == 1
+        assert telemetry.checkout_wait_ms.snapshot()["count"] == 2
+
+    def test_kelas_pool_terpisah_per_engine(self):
+        write, read = EngineTelemetry(), EngineTelemetry()
+        assert write.pool_class().telemetry is write
+        assert read.pool_class().telemetry is read
@@ -0,0 +1,111 @@
+"""
+tests/test_feedback_bulk.py — Unit test feedback bulk (/history/feedback/bulk)
+
+Test UPDATE set-based memerlukan PostgreSQL dan dilewati jika TEST_DATABASE_URL
+tidak di-set (lihat tests/test_database.py).
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base, build_engine
+from app.db.migrations import run_migrations
+from app.schemas.models import BulkFeedbackInput
+from app.services.history import bulk_update_actual_salaries, save_prediction
+from app.services.stats import rebuild_rollup
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+RESULT = {
+    "input_years": [2.6, 3.0],
+    "converted_years_decimal": [2.5, 3.0],
+    "city": ["jakarta", "bandung"],
+    "job_level": ["mid", "senior"],
+    "estimated_salary_million": [5.0, 7.0],
+}
+
+
+class TestBulkFeedbackInput:
+
+    def test_valid(self):
+        data = BulkFeedbackInput(items=[
+            {"history_id": 1, "actual_salaries": [5.0, 6.0]},
+            {"history_id": 2, "actual_salaries": [7.0]},
+        ])
+        assert [item.history_id for item in data.items] == [1, 2]
+
+    def test_id_duplikat_ditolak(self):
+        with pytest.raises(ValidationError, match="lebih dari sekali"):
+            BulkFeedbackInput(items=[
+                {"history_id": 1, "actual_salaries": [5.0]},
+                {"history_id": 1, "actual_salaries": [6.0]},
+            ])
+
+    def test_gaji_tidak_positif_ditolak(self):
+        with pytest.raises(ValidationError, match="positif"):
+            BulkFeedbackInput(items=[{"history_id": 1, "actual_salaries": [0.0]}])
+
+    def test_list_kosong_ditolak(self):
+        with pytest.raises(ValidationError):
+            BulkFeedbackInput(items=[])
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL tidak di-set")
+class TestBulkUpdate:
+
+    def test_hasil_per_id_dan_rollup_konsisten(self):
+        async def scenario():
+            engine = build_engine(TEST_DATABASE_URL, pool_size=1, max_overflow=0)
+            sessions = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+            try:
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+                await run_migrations(engine)
+                async with engine.begin() as conn:
+                    await conn.execute(text(
+                        "TRUNCATE prediction_history, prediction_items, prediction_daily_stats RESTART IDENTITY"
+                    ))
+
+                async with sessions() as session:
+                    ids = [(await save_prediction(session, RESULT, "v-test")).id for _ in range(3)]
+                    results = await bulk_update_actual_salaries(session, [
+                        (ids[0], [6.0, 8.0]),
+                        (999_999, [1.0]),
+                        (ids[1], [6.0]),
+                        (ids[2], [4.0, 9.0]),
+                    ], chunk_size=2)
+                    # Feedback ulang menimpa nilai lama (rollup dikoreksi, bukan ditambah)
+                    await bulk_update_actual_salaries(session, [(ids[0], [5.0, 7.0])])
+
+                async with engine.connect() as conn:
+                    items = (await conn.execute(text(
+                        "SELECT history_id, actual_salary FROM prediction_items "
+                        "WHERE actual_salary IS NOT NULL ORDER BY history_id, position"
+                    ))).all()
+                    incremental = (await conn.execute(text("SELECT * FROM prediction_daily_stats ORDER BY 1, 2, 3"))).all()
+                async with engine.begin() as conn:
+                    await conn.run_sync(rebuild_rollup)
+                    rebuilt = (await conn.execute(text("SELECT * FROM prediction_daily_stats ORDER BY 1, 2, 3"))).all()
+                return ids, results, items, incremental, rebuilt
+            finally:
+                await engine.dispose()
+
+        ids, results, items, incremental, rebuilt = asyncio.run(scenario())
+
+        assert [r["status"] for r in results] == ["updated", "not_found", "length_mismatch", "updated"]
+        assert [r["history_id"] for r in results] == [ids[0], 999_999, ids[1], ids[2]]
+        assert "(2)" in results[2]["detail"]
+        assert items == [(ids[0], 5.0), (ids[0], 7.0), (ids[2], 4.0), (ids[2], 9.0)]
+        assert incremental == rebuilt
@@ -0,0 +1,127 @@
+"""
+tests/test_history.py — Unit test untuk cursor paginasi /history dan request_id histori
+
+Test pencarian request_id memerlukan PostgreSQL dan dilewati jika
+TEST_DATABASE_URL tidak di-set (lihat tests/test_database.py).
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import base64
+import pytest
+import sys
+import os
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base, build_engine
+from app.db.migrations import run_migrations
+from app.services.history import (
+    _record_values, decode_cursor, encode_cursor, get_history_by_request_id, normalize_filters, save_prediction,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+RESULT = {
+    "input_years": [2.6],
+    "converted_years_decimal": [2.5],
+    "city": ["jakarta"],
+    "job_level": ["mid"],
+    "estimated_salary_million": [5.0],
+}
+
+CREATED_AT = datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+
+
+class TestHistoryCursor:
+
+    def test_roundtrip(self):
+        cursor = encode_cursor(CREATED_AT, 42)
+        assert decode_cursor(cursor) == (CREATED_AT, 42)
+
+    def test_cursor_aman_untuk_url(self):
+        cursor = encode_cursor(CREATED_AT, 42)
+        assert "=" not in cursor
+        assert "+" not in cursor and "/" not in cursor
+
+    def test_mikrodetik_dipertahankan(self):
+        # created_at yang sama di dua record dibedakan oleh id, bukan dibulatkan
+        created_at, _ = decode_cursor(encode_cursor(CREATED_AT, 1))
+        assert created_at.microsecond == 678901
+
+    @pytest.mark.parametrize("cursor", [
+        "bukan-cursor",
+        "",
+        base64.urlsafe_b64encode(b'{"c": "kemarin", "i": 1}').decode(),
+        base64.urlsafe_b64encode(b'{"i": 1}').decode(),
+        base64.urlsafe_b64encode(b'[1, 2]').decode(),
+    ])
+    def test_cursor_rusak(self, cursor):
+        with pytest.raises(ValueError, match="cursor"):
+            decode_cursor(cursor)
+
+
+class TestHistoryFilters:
+
+    def test_filter_dinormalisasi(self):
+        assert normalize_filters("Jakarta", "Fresh Graduate") == ("jakarta", "fresh graduate")
+        assert normalize_filters(None, "") == (None, None)
+
+    @pytest.mark.parametrize("city, level", [("atlantis", None), (None, "ceo"), ("jakarta", "x" * 1000)])
+    def test_filter_tidak_valid_ditolak(self, city, level):
+        # Nilai bebas tidak boleh masuk key cache total / halaman
+        with pytest.raises(ValueError, match="tidak valid"):
+            normalize_filters(city, level)
+
+
+class TestRequestId:
+
+    def test_request_id_ikut_disimpan(self):
+        values = _record_values({**RESULT, "request_id": "abc123"}, "v-test")
+        assert values["request_id"] == "abc123"
+
+    def test_tanpa_request_id(self):
+        # Penulis lain (CLI batch_score, /predict/stream) tidak membawa request_id
+        assert _record_values(RESULT, "v-test")["request_id"] is None
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL tidak di-set")
+class TestRequestIdLookup:
+
+    def test_cari_histori_dari_request_id(self):
+        request_id = uuid.uuid4().hex
+
+        async def scenario():
+            engine = build_engine(TEST_DATABASE_URL, pool_size=1, max_overflow=0)
+            sessions = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+            try:
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+                await run_migrations(engine)
+
+                async with sessions() as session:
+                    saved = await save_prediction(session, {**RESULT, "request_id": request_id}, "v-test")
+                async with sessions() as session:
+                    found = await get_history_by_request_id(session, request_id)
+                    missing = await get_history_by_request_id(session, uuid.uuid4().hex)
+                async with engine.begin() as conn:
+                    index_valid = (await conn.execute(text(
+                        "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+                        "WHERE c.relname = 'idx_prediction_history_request_id'"
+                    ))).scalar()
+                return saved, found, missing, index_valid
+            finally:
+                await engine.dispose()
+
+        saved, found, missing, index_valid = asyncio.run(scenario())
+        assert found is not None and found.id == saved.id
+        assert missing is None
+        assert index_valid
@@ -0,0 +1,145 @@
+"""
+tests/test_history_cache.py — Unit test cache /history dengan invalidasi tag + ETag
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+import uuid
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi_cache.backends.inmemory import InMemoryBackend
+
+from app.services.history_cache import HistoryCache, etag_for, etag_matches, history_tags, json_response
+
+
+def _cache(**kwargs) -> HistoryCache:
+    # InMemoryBackend berbagi satu dict antar instance → prefix unik per test
+    backend = InMemoryBackend()
+    return HistoryCache(lambda: backend, ttl_seconds=600, prefix=uuid.uuid4().hex, **kwargs)
+
+
+class Counter:
+    """compute() palsu: menghitung berapa kali halaman dihitung ulang dari DB."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        return f'{{"version": {self.calls}}}'
+
+
+def _get(cache: HistoryCache, compute: Counter, city=None, job_level=None, page=1) -> str:
+    return asyncio.run(cache.get_or_compute(
+        "page", cache.page_tags(city, job_level), {"page": page, "city": city, "job_level": job_level}, compute,
+    ))
+
+
+class TestHistoryCache:
+
+    def test_hit_tanpa_hitung_ulang(self):
+        cache, compute = _cache(), Counter()
+        assert _get(cache, compute) == _get(cache, compute)
+        assert compute.calls == 1
+        assert cache.hits == 1 and cache.misses == 1
+
+    def test_parameter_berbeda_entry_berbeda(self):
+        cache, compute = _cache(), Counter()
+        _get(cache, compute, page=1)
+        _get(cache, compute, page=2)
+        assert compute.calls == 2
+
+    def test_prediksi_baru_membuang_halaman_terdampak_saja(self):
+        cache, compute = _cache(), Counter()
+        _get(cache, compute)
+        _get(cache, compute, city="jakarta")
+        _get(cache, compute, city="surabaya")
+        _get(cache, compute, job_level="mid")
+
+        asyncio.run(cache.invalidate(history_tags(["Jakarta"], ["senior"])))
+
+        _get(cache, compute)                   # tanpa filter: selalu terdampak
+        _get(cache, compute, city="jakarta")   # terdampak
+        _get(cache, compute, city="surabaya")  # tetap dari cache
+        _get(cache, compute, job_level="mid")  # tetap dari cache
+        assert compute.calls == 6
+
+    def test_filter_gabungan_terdampak_salah_satu_tag(self):
+        cache, compute = _cache(), Counter()
+        _get(cache, compute, city="jakarta", job_level="mid")
+        asyncio.run(cache.invalidate(history_tags([], ["mid"])))
+        _get(cache, compute, city="jakarta", job_level="mid")
+        assert compute.calls == 2
+
+    def test_tag_all_membuang_semua(self):
+        cache, compute = _cache(), Counter()
+        _get(cache, compute, city="surabaya")
+        asyncio.run(cache.invalidate(["all"]))
+        _get(cache, compute, city="surabaya")
+        assert compute.calls == 2
+
+    def test_feedback_membuang_detail(self):
+        cache, compute = _cache(), Counter()
+
+        def detail():
+            return asyncio.run(cache.get_or_compute("item:7", ["all", "item:7"], {}, compute))
+
+        first = detail()
+        asyncio.run(cache.invalidate(history_tags(history_ids=[8])))
+        assert detail() == first
+        asyncio.run(cache.invalidate(history_tags(history_ids=[7])))
+        assert detail() != first
+
+    def test_backend_belum_init_tanpa_cache(self):
+        def not_initialised():
+            raise AssertionError("You must call init first!")
+
+        cache, compute = HistoryCache(not_initialised, ttl_seconds=600), Counter()
+        _get(cache, compute)
+        _get(cache, compute)
+        asyncio.run(cache.invalidate(["list"]))
+        assert compute.calls == 2
+        assert cache.backend_errors == 0
+
+    def test_invalidasi_kedua_setelah_lag_replica(self):
+        cache, compute = _cache(replica_lag_seconds=0.01), Counter()
+
+        async def scenario():
+            await cache.invalidate(["list"])
+            # Miss tepat setelah commit: anggap replica masih menyajikan data lama
+            await cache.get_or_compute("page", ["all", "list"], {}, compute)
+            await asyncio.sleep(0.05)
+            await cache.get_or_compute("page", ["all", "list"], {}, compute)
+
+        asyncio.run(scenario())
+        assert compute.calls == 2
+        assert cache.invalidations == 2
+
+
+class TestEtag:
+
+    def test_if_none_match(self):
+        etag = etag_for('{"id": 1}')
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"lain", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"lain"', etag)
+        assert not etag_matches(None, etag)
+
+    @pytest.mark.parametrize("if_none_match, status", [(None, 200), ("cocok", 304), ('"lain"', 200)])
+    def test_json_response(self, if_none_match, status):
+        body = '{"id": 1}'
+        if if_none_match == "cocok":
+            if_none_match = etag_for(body)
+        request = SimpleNamespace(headers={"if-none-match": if_none_match} if if_none_match else {})
+        response = json_response(request, body)
+        assert response.status_code == status
+        assert response.headers["etag"] == etag_for(body)
+        assert (response.body == body.encode()) == (status == 200)
@@ -0,0 +1,71 @@
+"""
+tests/test_history_export.py — Unit test untuk export histori streaming (CSV / Parquet)
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import csv
+import io
+import json
+import pytest
+import sys
+import os
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.history_export import EXPORT_COLUMNS, check_export_format, iter_csv, iter_parquet
+
+CREATED_AT = datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+def _row(i: int, actual=None) -> tuple:
+    return (
+        i, CREATED_AT, "salary-linear-v2", 2,
+        [2.6, 3.0], [2.5, 3.0], ["jakarta", "bandung"], ["mid", "senior"],
+        [6.18, 6.83], actual,
+    )
+
+
+async def _partitions():
+    # Dua partisi, seperti result.partitions() dari server-side cursor
+    yield [_row(1), _row(2, actual=[6.0, 7.0])]
+    yield [_row(3)]
+
+
+def _collect(stream) -> list[bytes]:
+    async def run():
+        return [part async for part in stream]
+    return asyncio.run(run())
+
+
+class TestHistoryExport:
+
+    def test_csv_per_partisi(self):
+        parts = _collect(iter_csv(_partitions()))
+        assert len(parts) == 3  # header + 2 partisi
+
+        rows = list(csv.DictReader(io.StringIO(b"".join(parts).decode("utf-8"))))
+        assert [int(r["id"]) for r in rows] == [1, 2, 3]
+        assert json.loads(rows[0]["city"]) == ["jakarta", "bandung"]
+        assert rows[0]["actual_salaries"] == ""
+        assert json.loads(rows[1]["actual_salaries"]) == [6.0, 7.0]
+        assert rows[0]["created_at"] == CREATED_AT.isoformat()
+
+    def test_parquet_per_row_group(self):
+        pq = pytest.importorskip("pyarrow.parquet")
+
+        parts = _collect(iter_parquet(_partitions()))
+        parquet = pq.ParquetFile(io.BytesIO(b"".join(parts)))
+
+        assert parquet.metadata.num_row_groups == 2
+        table = parquet.read()
+        assert table.column_names == list(EXPORT_COLUMNS)
+        assert table.column("id").to_pylist() == [1, 2, 3]
+        assert table.column("actual_salaries").to_pylist() == [None, [6.0, 7.0], None]
+
+    def test_format_tidak_didukung(self):
+        with pytest.raises(ValueError):
+            check_export_format("xlsx")
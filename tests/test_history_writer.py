@@ -0,0 +1,204 @@
+"""
+tests/test_history_writer.py — Unit test untuk penulis histori write-behind
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.history_writer import HistoryWriter
+
+
+class FakeResult:
+    def __init__(self, ids):
+        self.ids = ids
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.ids
+
+
+class FakeSessionFactory:
+    """
+    Pengganti AsyncSessionLocal: mencatat setiap INSERT multi-row yang di-commit.
+    inserts = INSERT ke prediction_history, item_inserts = INSERT ke prediction_items,
+    rollup_updates = parameter UPSERT rollup harian (SQL teks).
+    """
+
+    def __init__(self, fail: bool = False, fail_times: int = 0, commit_fail_times: int = 0, commit_lands: bool = False):
+        self.inserts = []
+        self.item_inserts = []
+        self.rollup_updates = []
+        self.next_id = 1
+        self.fail = fail
+        self.fail_times = fail_times
+        # commit_lands: server sudah meng-commit sebelum koneksi putus
+        self.commit_fail_times = commit_fail_times
+        self.commit_lands = commit_lands
+
+    def __call__(self):
+        factory = self
+
+        class Session:
+            async def __aenter__(self):
+                self.pending = []
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, statement, rows):
+                if factory.fail:
+                    raise ConnectionError("db down")
+                if factory.fail_times > 0:
+                    factory.fail_times -= 1
+                    raise ConnectionError("koneksi putus sesaat")
+                if not hasattr(statement, "table"):
+                    self.pending.append(("prediction_daily_stats", rows))
+                    return None
+                self.pending.append((statement.table.name, rows))
+                if statement.table.name != "prediction_history":
+                    return None
+                ids = list(range(factory.next_id, factory.next_id + len(rows)))
+                factory.next_id += len(rows)
+                return FakeResult(ids)
+
+            async def commit(self):
+                if factory.commit_fail_times > 0:
+                    factory.commit_fail_times -= 1
+                    if factory.commit_lands:
+                        self._apply()
+                    raise ConnectionError("koneksi putus saat COMMIT")
+                self._apply()
+
+            def _apply(self):
+                targets = {
+                    "prediction_history": factory.inserts,
+                    "prediction_items": factory.item_inserts,
+                    "prediction_daily_stats": factory.rollup_updates,
+                }
+                for table, rows in self.pending:
+                    targets[table].append(rows)
+
+        return Session()
+
+
+def _result(i: int, rows: int = 1) -> dict:
+    return {
+        "input_years": [float(i)] * rows,
+        "converted_years_decimal": [float(i)] * rows,
+        "city": ["jakarta"] * rows,
+        "job_level": ["mid"] * rows,
+        "estimated_salary_million": [5.0 + i] * rows,
+    }
+
+
+def _run(writer: HistoryWriter, count: int, pause: float = 0.0, rows: int = 1):
+    async def scenario():
+        await writer.start()
+        accepted = [writer.enqueue(_result(i, rows), "test") for i in range(count)]
+        await asyncio.sleep(pause)
+        depth_before_stop = writer.metrics()["queue_depth"]
+        await writer.stop()
+        return accepted, depth_before_stop
+
+    return asyncio.run(scenario())
+
+
+class TestHistoryWriter:
+
+    def test_record_digabung_menjadi_insert_multi_row(self):
+        factory = FakeSessionFactory()
+        writer = HistoryWriter(factory, flush_rows=4, flush_interval_ms=1000)
+        _run(writer, 10)
+
+        assert [len(rows) for rows in factory.inserts] == [4, 4, 2]
+        assert [row["predicted_salaries"] for rows in factory.inserts for row in rows] == [[5.0 + i] for i in range(10)]
+        assert factory.inserts[0][0]["data_count"] == 1
+        # Satu item per kandidat, terhubung ke ID parent hasil RETURNING
+        assert [row["history_id"] for rows in factory.item_inserts for row in rows] == list(range(1, 11))
+        assert factory.item_inserts[0][0]["city"] == "jakarta"
+        # Rollup harian diperbarui sekali per flush, di transaksi yang sama
+        assert [params["history_ids"] for params in factory.rollup_updates] == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10]]
+        assert writer.metrics()["written_records"] == 10
+
+    def test_flush_berdasarkan_waktu(self):
+        factory = FakeSessionFactory()
+        writer = HistoryWriter(factory, flush_rows=100, flush_interval_ms=5)
+        _, depth = _run(writer, 3, pause=0.05)
+
+        assert depth == 0
+        assert len(factory.inserts) == 1
+
+    def test_antrean_penuh_record_dibuang(self):
+        factory = FakeSessionFactory()
+        writer = HistoryWriter(factory, max_queue=5, flush_rows=100, flush_interval_ms=1000)
+        accepted, _ = _run(writer, 8)
+
+        assert accepted.count(False) == 3
+        assert writer.metrics()["dropped_records"] == 3
+        assert writer.metrics()["dropped_rows"] == 3
+        assert sum(len(rows) for rows in factory.inserts) == 5
+
+    def test_db_gagal_dihitung_sebagai_dibuang(self):
+        writer = HistoryWriter(
+            FakeSessionFactory(fail=True), flush_rows=2, flush_interval_ms=1000, retry_backoff_ms=1,
+        )
+        _run(writer, 3, rows=4)
+
+        metrics = writer.metrics()
+        assert metrics["retried_flushes"] == 2
+        assert metrics["failed_flushes"] == 2
+        assert metrics["dropped_records"] == 3
+        assert metrics["dropped_rows"] == 12
+        assert metrics["written_records"] == 0
+
+    def test_gagal_sesaat_berhasil_saat_dicoba_ulang(self):
+        factory = FakeSessionFactory(fail_times=1)
+        writer = HistoryWriter(factory, flush_rows=100, flush_interval_ms=1000, retry_backoff_ms=1)
+        _run(writer, 3)
+
+        metrics = writer.metrics()
+        assert metrics["retried_flushes"] == 1
+        assert metrics["failed_flushes"] == 0
+        assert metrics["dropped_records"] == 0
+        assert metrics["written_records"] == 3
+        # Percobaan pertama tidak ter-commit → tidak ada insert ganda
+        assert [len(rows) for rows in factory.inserts] == [3]
+
+    def test_commit_gagal_tidak_dicoba_ulang(self):
+        factory = FakeSessionFactory(commit_fail_times=1, commit_lands=True)
+        writer = HistoryWriter(factory, flush_rows=100, flush_interval_ms=1000, retry_backoff_ms=1)
+        _run(writer, 3, rows=2)
+
+        metrics = writer.metrics()
+        assert metrics["retried_flushes"] == 0
+        assert metrics["uncertain_flushes"] == 1
+        assert metrics["uncertain_records"] == 3
+        assert metrics["written_records"] == 0
+        assert metrics["dropped_records"] == 0
+        # COMMIT sebenarnya sampai di server → batch tidak boleh ditulis dua kali
+        assert [len(rows) for rows in factory.inserts] == [3]
+
+    def test_commit_gagal_setelah_retry(self):
+        factory = FakeSessionFactory(fail_times=1, commit_fail_times=1)
+        writer = HistoryWriter(factory, flush_rows=100, flush_interval_ms=1000, retry_backoff_ms=1)
+        _run(writer, 2)
+
+        metrics = writer.metrics()
+        assert metrics["retried_flushes"] == 1
+        assert metrics["failed_flushes"] == 0
+        assert metrics["uncertain_records"] == 2
+        assert factory.inserts == []
+
+    def test_enqueue_sebelum_start_ditolak(self):
+        with pytest.raises(RuntimeError):
+            HistoryWriter(FakeSessionFactory()).enqueue(_result(0), "test")
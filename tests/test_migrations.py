@@ -0,0 +1,262 @@
+"""
+tests/test_migrations.py — Unit test runner migrasi berversi (app/db/migrations.py)
+
+Test yang menjalankan migrasi memerlukan PostgreSQL dan dilewati jika
+TEST_DATABASE_URL tidak di-set (lihat tests/test_database.py). Database test
+dianggap sekali pakai: tabel histori di-drop dan dibuat ulang.
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import build_engine
+from app.db.migrations import (
+    LATEST_VERSION, Backfill, ConcurrentIndex, applied_versions,
+    _plan_indexes, _root_index, _run_backfill, _run_concurrent_index, run_migrations, verify_query_plans,
+)
+from app.services.history import save_prediction
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+# Bentuk prediction_history sebelum runner migrasi ada (create_all versi awal)
+BASELINE_HISTORY_SQL = [
+    """
+    CREATE TABLE prediction_history (
+        id SERIAL PRIMARY KEY,
+        input_years FLOAT[] NOT NULL,
+        converted_years FLOAT[] NOT NULL,
+        city VARCHAR[],
+        job_level VARCHAR[],
+        predicted_salaries FLOAT[] NOT NULL,
+        actual_salaries FLOAT[],
+        data_count INTEGER NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        model_version VARCHAR NOT NULL
+    )
+    """,
+    "CREATE INDEX idx_prediction_created_at ON prediction_history (created_at)",
+    """
+    INSERT INTO prediction_history (
+        input_years, converted_years, city, job_level, predicted_salaries,
+        actual_salaries, data_count, created_at, model_version
+    ) VALUES
+        ('{2.6}', '{2.5}', '{jakarta}', '{mid}', '{5.0}', NULL, 1, now() - interval '40 days', 'v1'),
+        ('{1.0,5.0}', '{1.0,5.0}', '{bandung,surabaya}', '{junior,senior}', '{4.0,9.0}',
+         '{4.5,8.5}', 2, now() - interval '10 days', 'v1'),
+        ('{3.0}', '{3.0}', '{medan}', '{lead}', '{8.0}', NULL, 1, now(), 'v1')
+    """,
+]
+
+RESULT = {
+    "input_years": [2.6],
+    "converted_years_decimal": [2.5],
+    "city": ["jakarta"],
+    "job_level": ["mid"],
+    "estimated_salary_million": [5.0],
+}
+
+# Potongan EXPLAIN (FORMAT JSON) query /history pada tabel partitioned
+PLAN = {
+    "Node Type": "Limit",
+    "Plans": [{
+        "Node Type": "Append",
+        "Plans": [
+            {"Node Type": "Index Scan", "Index Name": "prediction_history_p202501_created_at_idx"},
+            {"Node Type": "Index Only Scan", "Index Name": "prediction_history_legacy_created_at_idx"},
+            {"Node Type": "Seq Scan", "Relation Name": "prediction_history_p202502"},
+        ],
+    }],
+}
+
+
+class TestPlanParsing:
+
+    def test_index_dari_semua_level_plan(self):
+        assert _plan_indexes(PLAN) == {
+            "prediction_history_p202501_created_at_idx",
+            "prediction_history_legacy_created_at_idx",
+        }
+
+    def test_seq_scan_tanpa_index(self):
+        assert _plan_indexes({"Node Type": "Seq Scan", "Relation Name": "users"}) == set()
+
+
+def _with_engine(scenario):
+    async def run():
+        engine = build_engine(TEST_DATABASE_URL, pool_size=2, max_overflow=0)
+        try:
+            return await scenario(engine)
+        finally:
+            await engine.dispose()
+    return asyncio.run(run())
+
+
+async def _scalar(engine, sql: str, **params):
+    async with engine.connect() as conn:
+        return (await conn.execute(text(sql), params)).scalar()
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL tidak di-set")
+class TestMigrationRunner:
+
+    def test_upgrade_dari_skema_awal(self, drop_history_schema):
+        async def scenario(engine):
+            await drop_history_schema(engine)
+            async with engine.begin() as conn:
+                for sql in BASELINE_HISTORY_SQL:
+                    await conn.execute(text(sql))
+
+            applied = await run_migrations(engine)
+            sessions = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+            async with sessions() as session:
+                saved = await save_prediction(session, {**RESULT, "request_id": "r" * 32}, "v2")
+            # Sebaran item realistis: level saja tidak selektif, kota + level selektif
+            async with engine.begin() as conn:
+                await conn.execute(text(
+                    "INSERT INTO prediction_items (history_id, position, input_years, converted_years, "
+                    "city, job_level, predicted_salary, created_at) "
+                    "SELECT 1000 + g, 0, 1.0, 1.0, 'kota' || (g % 50), 'mid', 5.0, now() "
+                    "FROM generate_series(1, 5000) g"
+                ))
+                await conn.execute(text("ANALYZE prediction_items"))
+
+            return {
+                "applied": applied,
+                "relkind": await _scalar(engine, "SELECT relkind::text FROM pg_class WHERE oid = 'prediction_history'::regclass"),
+                "legacy_attached": await _scalar(
+                    engine,
+                    "SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass('prediction_history_legacy') "
+                    "AND inhparent = 'prediction_history'::regclass",
+                ),
+                "history_rows": await _scalar(engine, "SELECT count(*) FROM prediction_history"),
+                "feedback_items": await _scalar(
+                    engine, "SELECT count(*) FROM prediction_items WHERE actual_salary IS NOT NULL",
+                ),
+                "saved_id": saved.id,
+                "request_id_index_valid": await _scalar(
+                    engine,
+                    "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass('idx_prediction_history_request_id')",
+                ),
+                "plans": await verify_query_plans(engine),
+            }
+
+        result = _with_engine(scenario)
+        assert result["applied"] == list(range(1, LATEST_VERSION + 1))
+        assert result["relkind"] == "p"
+        assert result["legacy_attached"] == 1
+        assert result["history_rows"] == 4
+        assert result["feedback_items"] == 2
+        # Sequence id dilanjutkan dari tabel lama
+        assert result["saved_id"] == 4
+        assert result["request_id_index_valid"]
+        assert [(d, used) for d, _, ok, used in result["plans"] if not ok] == []
+
+    def test_index_partisi_dipetakan_ke_parent(self, drop_history_schema):
+        async def scenario(engine):
+            await drop_history_schema(engine)
+            async with engine.begin() as conn:
+                for sql in BASELINE_HISTORY_SQL:
+                    await conn.execute(text(sql))
+            await run_migrations(engine)
+            async with engine.connect() as conn:
+                child = (await conn.execute(text(
+                    "SELECT inhrelid::regclass::text FROM pg_inherits "
+                    "WHERE inhparent = 'idx_prediction_created_at'::regclass LIMIT 1"
+                ))).scalar()
+                return child, await _root_index(conn, child), await _root_index(conn, "users_pkey")
+
+        child, root, unpartitioned = _with_engine(scenario)
+        assert child != "idx_prediction_created_at"
+        assert root == "idx_prediction_created_at"
+        assert unpartitioned == "users_pkey"
+
+    def test_backfill_dilanjutkan_dari_progres(self):
+        version = 9000
+        step = Backfill(
+            "migration_test_source",
+            "INSERT INTO migration_test_target SELECT id FROM migration_test_source "
+            "WHERE id > :after_id AND id <= :until_id",
+        )
+
+        async def scenario(engine):
+            async with engine.begin() as conn:
+                for sql in (
+                    "DROP TABLE IF EXISTS migration_test_source, migration_test_target",
+                    "CREATE TABLE migration_test_source (id INTEGER PRIMARY KEY)",
+                    "CREATE TABLE migration_test_target (id INTEGER PRIMARY KEY)",
+                    "INSERT INTO migration_test_source SELECT generate_series(1, 10)",
+                    # Run sebelumnya terhenti setelah chunk id <= 4
+                    "INSERT INTO migration_test_target SELECT generate_series(1, 4)",
+                ):
+                    await conn.execute(text(sql))
+            await applied_versions(engine)  # membuat tabel schema_backfill_progress
+            async with engine.begin() as conn:
+                await conn.execute(text("DELETE FROM schema_backfill_progress WHERE version = :v"), {"v": version})
+                await conn.execute(text(
+                    "INSERT INTO schema_backfill_progress (version, last_id) VALUES (:v, 4)"
+                ), {"v": version})
+            try:
+                await _run_backfill(engine, version, step, chunk_size=3)
+                async with engine.connect() as conn:
+                    target = (await conn.execute(text(
+                        "SELECT id FROM migration_test_target ORDER BY id"
+                    ))).scalars().all()
+                    last_id = (await conn.execute(text(
+                        "SELECT last_id FROM schema_backfill_progress WHERE version = :v"
+                    ), {"v": version})).scalar()
+                return target, last_id
+            finally:
+                async with engine.begin() as conn:
+                    await conn.execute(text("DELETE FROM schema_backfill_progress WHERE version = :v"), {"v": version})
+                    await conn.execute(text("DROP TABLE migration_test_source, migration_test_target"))
+
+        # Primary key target: chunk yang sudah ditulis tidak boleh diulang
+        target, last_id = _with_engine(scenario)
+        assert target == list(range(1, 11))
+        assert last_id == 10
+
+    def test_index_invalid_dibuat_ulang(self):
+        step = ConcurrentIndex(
+            "migration_test_unique_value",
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS migration_test_unique_value "
+            "ON migration_test_values (value)",
+        )
+
+        async def scenario(engine):
+            async with engine.begin() as conn:
+                await conn.execute(text("DROP TABLE IF EXISTS migration_test_values"))
+                await conn.execute(text("CREATE TABLE migration_test_values (value INTEGER)"))
+                await conn.execute(text("INSERT INTO migration_test_values VALUES (1), (1), (2)"))
+            try:
+                # Build CONCURRENTLY gagal (duplikat) → index INVALID tertinggal
+                with pytest.raises(Exception):
+                    await _run_concurrent_index(engine, step)
+                invalid = await _scalar(
+                    engine, "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:n)", n=step.name,
+                )
+                async with engine.begin() as conn:
+                    await conn.execute(text("DELETE FROM migration_test_values WHERE ctid = (SELECT max(ctid) "
+                                            "FROM migration_test_values WHERE value = 1)"))
+                await _run_concurrent_index(engine, step)
+                valid = await _scalar(
+                    engine, "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:n)", n=step.name,
+                )
+                return invalid, valid
+            finally:
+                async with engine.begin() as conn:
+                    await conn.execute(text("DROP TABLE migration_test_values"))
+
+        invalid, valid = _with_engine(scenario)
+        assert invalid is False
+        assert valid is True
@@ -0,0 +1,231 @@
+"""
+tests/test_partitions.py — Unit test untuk helper partisi bulanan histori
+
+Test estimasi total dan retensi pada tabel partisi memerlukan PostgreSQL dan
+dilewati jika TEST_DATABASE_URL tidak di-set (lihat tests/test_database.py).
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import csv
+import gzip
+import pytest
+import sys
+import os
+from datetime import date, datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+import app.services.history as history
+from app.db.database import Base, build_engine
+from app.db.migrations import run_migrations
+from app.db.partitions import (
+    add_months, apply_retention, bound_literal, month_start, parse_bound, partition_name,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+RESULT = {
+    "input_years": [2.6],
+    "converted_years_decimal": [2.5],
+    "city": ["jakarta"],
+    "job_level": ["mid"],
+    "estimated_salary_million": [5.0],
+}
+
+
+class TestPartitionHelpers:
+
+    @pytest.mark.parametrize("day, months, expected", [
+        (date(2025, 1, 31), 1, date(2025, 2, 1)),
+        (date(2025, 11, 15), 2, date(2026, 1, 1)),
+        (date(2025, 3, 1), -3, date(2024, 12, 1)),
+        (date(2025, 1, 1), -12, date(2024, 1, 1)),
+        (date(2025, 6, 10), 0, date(2025, 6, 1)),
+    ])
+    def test_add_months(self, day, months, expected):
+        assert add_months(day, months) == expected
+
+    def test_month_start(self):
+        assert month_start(date(2025, 2, 28)) == date(2025, 2, 1)
+
+    def test_nama_partisi(self):
+        assert partition_name("prediction_history", date(2025, 3, 1)) == "prediction_history_p202503"
+
+    def test_bound_roundtrip(self):
+        # Format sama dengan pg_get_expr(relpartbound) pada sesi TimeZone UTC
+        assert parse_bound(bound_literal(date(2025, 3, 1))) == date(2025, 3, 1)
+        assert parse_bound("'2025-03-01 00:00:00+00'") == date(2025, 3, 1)
+
+    def test_bound_tak_terbatas(self):
+        assert parse_bound("MINVALUE") is None
+        assert parse_bound(" MAXVALUE ") is None
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL tidak di-set")
+class TestPartitionedCountEstimate:
+
+    def test_estimasi_dari_partisi_tanpa_count(self, monkeypatch):
+        async def exact_count_forbidden(session, conditions):
+            raise AssertionError("COUNT(*) penuh tidak boleh dijalankan")
+
+        monkeypatch.setattr(history, "EXACT_COUNT_THRESHOLD", 1)
+        monkeypatch.setattr(history, "_exact_count", exact_count_forbidden)
+
+        async def scenario():
+            engine = build_engine(TEST_DATABASE_URL, pool_size=1, max_overflow=0)
+            sessions = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+            try:
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+                await run_migrations(engine)
+                async with engine.begin() as conn:
+                    await conn.execute(text("TRUNCATE prediction_history, prediction_items RESTART IDENTITY"))
+
+                async with sessions() as session:
+                    for _ in range(3):
+                        await history.save_prediction(session, RESULT, "v-test")
+
+                # Seperti autovacuum: hanya partisi (leaf) yang di-ANALYZE, parent tidak
+                async with engine.begin() as conn:
+                    children = (await conn.execute(text(
+                        "SELECT inhrelid::regclass::text FROM pg_inherits "
+                        "WHERE inhparent = 'prediction_history'::regclass"
+                    ))).scalars().all()
+                    for child in children:
+                        await conn.execute(text(f"ANALYZE {child}"))
+                    parent_reltuples = (await conn.execute(text(
+                        "SELECT reltuples FROM pg_class WHERE oid = 'prediction_history'::regclass"
+                    ))).scalar()
+
+                async with sessions() as session:
+                    total = await history._cheap_count(session, [], ("total",))
+                return parent_reltuples, total
+            finally:
+                await engine.dispose()
+
+        parent_reltuples, total = asyncio.run(scenario())
+        assert parent_reltuples < 0
+        assert total == 3
+
+
+OLD_MONTHS = [date(2020, 1, 1), date(2020, 2, 1)]
+
+
+async def _old_month(conn, month: date) -> None:
+    """Partisi bulan lama + satu prediksi 2 kandidat, kandidat kedua punya feedback."""
+    for table in ("prediction_history", "prediction_items"):
+        await conn.execute(text(
+            f"CREATE TABLE {partition_name(table, month)} PARTITION OF {table} "
+            f"FOR VALUES FROM ({bound_literal(month)}) TO ({bound_literal(add_months(month, 1))})"
+        ))
+    created_at = datetime(month.year, month.month, 1, 12, tzinfo=timezone.utc)
+    history_id = (await conn.execute(text(
+        "INSERT INTO prediction_history (input_years, converted_years, city, job_level, "
+        "predicted_salaries, actual_salaries, data_count, created_at, model_version) "
+        "VALUES ('{2.6,5.0}', '{2.5,5.0}', '{jakarta,medan}', '{mid,senior}', '{5.0,9.0}', "
+        "'{NULL,9.5}', 2, :created_at, 'v-lama') RETURNING id"
+    ), {"created_at": created_at})).scalar()
+    await conn.execute(text(
+        "INSERT INTO prediction_items (history_id, position, input_years, converted_years, "
+        "city, job_level, predicted_salary, actual_salary, created_at) VALUES "
+        "(:id, 0, 2.6, 2.5, 'jakarta', 'mid', 5.0, NULL, :created_at), "
+        "(:id, 1, 5.0, 5.0, 'medan', 'senior', 9.0, 9.5, :created_at)"
+    ), {"id": history_id, "created_at": created_at})
+
+
+async def _interrupt_detach(engine, table: str, partition: str) -> None:
+    """DETACH CONCURRENTLY yang terputus saat menunggu snapshot lama → status detach pending."""
+    async with engine.connect() as reader:
+        await reader.execute(text(f"SELECT count(*) FROM {table}"))
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("SET statement_timeout = '300ms'"))
+            with pytest.raises(Exception, match="statement timeout"):
+                await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition} CONCURRENTLY"))
+            await conn.execute(text("SET statement_timeout = 0"))
+        await reader.rollback()
+
+
+def _read_archive(path: str) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL tidak di-set")
+class TestRetention:
+
+    def test_arsip_dan_lanjutkan_run_yang_terhenti(self, tmp_path, drop_history_schema):
+        archive_dir = str(tmp_path / "arsip")
+
+        async def state(engine) -> dict:
+            async with engine.connect() as conn:
+                names = [partition_name(t, m) for m in OLD_MONTHS for t in ("prediction_history", "prediction_items")]
+                return {
+                    "remaining": [
+                        name for name in names
+                        if (await conn.execute(text("SELECT to_regclass(:n)"), {"n": name})).scalar()
+                    ],
+                    "retained": (await conn.execute(text(
+                        "SELECT created_at::date, actual_salary FROM retained_feedback_items ORDER BY created_at"
+                    ))).all(),
+                    "pending": (await conn.execute(text(
+                        "SELECT inhdetachpending FROM pg_inherits "
+                        "WHERE inhrelid = to_regclass('prediction_history_p202002')"
+                    ))).scalar(),
+                }
+
+        async def scenario():
+            engine = build_engine(TEST_DATABASE_URL, pool_size=2, max_overflow=0)
+            try:
+                await drop_history_schema(engine)
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+                await run_migrations(engine)
+                async with engine.begin() as conn:
+                    for month in OLD_MONTHS:
+                        await _old_month(conn, month)
+
+                # Run 1: hanya Januari 2020 yang keluar dari jendela retensi
+                first = await apply_retention(engine, 1, archive_dir, today=date(2020, 3, 15))
+                after_first = await state(engine)
+
+                # Run berikutnya terhenti: histori Februari detach pending,
+                # item Februari sudah ter-detach tapi belum diarsipkan
+                await _interrupt_detach(engine, "prediction_history", "prediction_history_p202002")
+                async with engine.begin() as conn:
+                    await conn.execute(text("ALTER TABLE prediction_items DETACH PARTITION prediction_items_p202002"))
+                interrupted = await state(engine)
+
+                second = await apply_retention(engine, 1, archive_dir, today=date(2020, 4, 15))
+                return first, after_first, interrupted, second, await state(engine)
+            finally:
+                await engine.dispose()
+
+        first, after_first, interrupted, second, final = asyncio.run(scenario())
+
+        assert sorted(os.path.basename(p) for p in first) == [
+            "prediction_history_p202001.csv.gz", "prediction_items_p202001.csv.gz",
+        ]
+        history = _read_archive(os.path.join(archive_dir, "prediction_history_p202001.csv.gz"))
+        assert len(history) == 1
+        assert history[0]["model_version"] == "v-lama"
+        assert history[0]["predicted_salaries"] == "[5.0, 9.0]"
+        items = _read_archive(os.path.join(archive_dir, "prediction_items_p202001.csv.gz"))
+        assert [(row["city"], row["actual_salary"]) for row in items] == [("jakarta", ""), ("medan", "9.5")]
+
+        assert after_first["remaining"] == ["prediction_history_p202002", "prediction_items_p202002"]
+        assert after_first["retained"] == [(date(2020, 1, 1), 9.5)]
+
+        assert interrupted["pending"] is True
+        assert sorted(os.path.basename(p) for p in second) == [
+            "prediction_history_p202002.csv.gz", "prediction_items_p202002.csv.gz",
+        ]
+        assert final["remaining"] == []
+        assert final["retained"] == [(date(2020, 1, 1), 9.5), (date(2020, 2, 1), 9.5)]
@@ -0,0 +1,66 @@
+"""
+tests/test_password_hasher.py — Unit test hashing password di luar event loop
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.auth import hash_password
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy, bcrypt_rounds
+
+
+@pytest.fixture
+def hasher():
+    # Cost minimum agar test cepat
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=1)
+    yield hasher
+    hasher.shutdown()
+
+
+class TestPasswordHasher:
+
+    def test_hash_lalu_verify(self, hasher):
+        async def scenario():
+            hashed = await hasher.hash("rahasia123")
+            return hashed, await hasher.verify("rahasia123", hashed), await hasher.verify("salah", hashed)
+
+        hashed, valid, invalid = asyncio.run(scenario())
+        assert bcrypt_rounds(hashed) == 4
+        assert valid is True
+        assert invalid is False
+        assert hasher.metrics()["duration_ms"]["count"] == 3
+
+    def test_antrean_penuh_ditolak(self, hasher):
+        async def scenario():
+            return await asyncio.gather(
+                hasher.hash("rahasia123"), hasher.hash("rahasia456"), return_exceptions=True,
+            )
+
+        first, second = asyncio.run(scenario())
+        assert isinstance(first, str)
+        assert isinstance(second, PasswordHasherBusy)
+        assert hasher.rejected == 1
+        assert hasher.metrics()["pending"] == 0
+
+    def test_needs_rehash_saat_cost_berubah(self, hasher):
+        assert hasher.needs_rehash(hash_password("rahasia123", rounds=5))
+        assert not hasher.needs_rehash(hash_password("rahasia123", rounds=4))
+
+    def test_cost_di_luar_batas(self):
+        with pytest.raises(ValueError, match="BCRYPT_ROUNDS"):
+            PasswordHasher(rounds=3)
+
+    @pytest.mark.parametrize("hashed, expected", [
+        ("$2b$12$abcdefghijklmnopqrstuu", 12),
+        ("$2a$04$abcdefghijklmnopqrstuu", 4),
+        ("bukan-hash", None),
+    ])
+    def test_bcrypt_rounds(self, hashed, expected):
+        assert bcrypt_rounds(hashed) == expected
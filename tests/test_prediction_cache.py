@@ -0,0 +1,172 @@
+"""
+tests/test_prediction_cache.py — Unit test untuk cache respons /predict (single-flight)
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.prediction_cache import PredictionCache, model_fingerprint
+
+
+class DictBackend:
+    """Pengganti backend FastAPICache berbasis dict."""
+
+    def __init__(self, fail: bool = False):
+        self.store = {}
+        self.fail = fail
+
+    async def get(self, key):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return self.store.get(key)
+
+    async def set(self, key, value, expire=None):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.store[key] = value
+
+
+ROWS = (np.array([2.5, 3.0]), np.array([0, 2]), np.array([1, 2]))
+
+
+def _cache(backend):
+    return PredictionCache(lambda: backend, ttl_seconds=60)
+
+
+def _counting_compute(result=(6.18, 6.83), delay=0.0):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return list(result)
+
+    return compute, calls
+
+
+class TestPredictionCache:
+
+    def test_miss_lalu_hit(self):
+        cache = _cache(DictBackend())
+        key = cache.make_key("v2:abc", *ROWS)
+        compute, calls = _counting_compute()
+
+        async def run():
+            return [await cache.get_or_compute(key, compute, request_id) for request_id in ("req-1", "req-2")]
+
+        first, second = asyncio.run(run())
+        assert first == ([6.18, 6.83], False, "req-1")
+        # Hit merujuk record histori request yang menghitung
+        assert second == ([6.18, 6.83], True, "req-1")
+        assert len(calls) == 1
+        assert cache.metrics()["hits"] == 1
+
+    def test_request_bersamaan_digabung(self):
+        cache = _cache(DictBackend())
+        key = cache.make_key("v2:abc", *ROWS)
+        compute, calls = _counting_compute(delay=0.01)
+
+        async def run():
+            return await asyncio.gather(*(cache.get_or_compute(key, compute, f"req-{i}") for i in range(10)))
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert [from_cache for _, from_cache, _ in results].count(False) == 1
+        assert all(predictions == [6.18, 6.83] for predictions, _, _ in results)
+        assert {request_id for _, _, request_id in results} == {"req-0"}
+        assert cache.metrics()["coalesced"] == 9
+
+    def test_request_pertama_dibatalkan_penunggu_tetap_dapat_hasil(self):
+        backend = DictBackend()
+        cache = _cache(backend)
+        key = cache.make_key("v2:abc", *ROWS)
+        compute, calls = _counting_compute(delay=0.02)
+
+        async def run():
+            first = asyncio.create_task(cache.get_or_compute(key, compute, "req-0"))
+            await asyncio.sleep(0)
+            waiters = [asyncio.create_task(cache.get_or_compute(key, compute, f"req-{i}")) for i in (1, 2)]
+            await asyncio.sleep(0)
+            # Client request pertama memutus koneksi di tengah komputasi
+            first.cancel()
+            results = await asyncio.gather(*waiters)
+            return first, results
+
+        first, results = asyncio.run(run())
+        assert first.cancelled()
+        assert results == [([6.18, 6.83], True, "req-0")] * 2
+        assert len(calls) == 1
+        # Komputasi bersama selesai → tetap tersimpan di cache
+        assert key in backend.store
+        assert cache.metrics()["inflight"] == 0
+
+    def test_dibatalkan_tanpa_penunggu_komputasi_tetap_selesai(self):
+        backend = DictBackend()
+        cache = _cache(backend)
+        key = cache.make_key("v2:abc", *ROWS)
+        compute, calls = _counting_compute(delay=0.01)
+
+        async def run():
+            first = asyncio.create_task(cache.get_or_compute(key, compute, "req-0"))
+            await asyncio.sleep(0)
+            first.cancel()
+            await asyncio.sleep(0.05)
+            return await cache.get_or_compute(key, compute, "req-1")
+
+        assert asyncio.run(run()) == ([6.18, 6.83], True, "req-0")
+        assert len(calls) == 1
+
+    def test_key_berubah_saat_model_berganti(self):
+        cache = _cache(DictBackend())
+        assert cache.make_key("v2:abc", *ROWS) == cache.make_key("v2:abc", *(r.tolist() for r in ROWS))
+        assert cache.make_key("v2:abc", *ROWS) != cache.make_key("v2:def", *ROWS)
+        assert cache.make_key("v2:abc", *ROWS) != cache.make_key("v2:abc", ROWS[0][::-1], ROWS[1], ROWS[2])
+
+    def test_error_diteruskan_ke_semua_dan_tidak_di_cache(self):
+        backend = DictBackend()
+        cache = _cache(backend)
+        key = cache.make_key("v2:abc", *ROWS)
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("scorer error")
+
+        async def run():
+            return await asyncio.gather(*(cache.get_or_compute(key, failing) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert backend.store == {}
+        assert cache.metrics()["inflight"] == 0
+
+    def test_backend_mati_tetap_menghitung(self):
+        cache = _cache(DictBackend(fail=True))
+        key = cache.make_key("v2:abc", *ROWS)
+        compute, calls = _counting_compute()
+
+        predictions, from_cache, _ = asyncio.run(cache.get_or_compute(key, compute))
+        assert predictions == [6.18, 6.83] and from_cache is False
+        assert cache.metrics()["backend_errors"] == 2
+
+    def test_entry_format_lama_dianggap_miss(self):
+        backend = DictBackend()
+        cache = _cache(backend)
+        key = cache.make_key("v2:abc", *ROWS)
+        backend.store[key] = "[6.18, 6.83]"  # list tanpa request_id
+        compute, calls = _counting_compute()
+
+        result = asyncio.run(cache.get_or_compute(key, compute, "req-1"))
+        assert result == ([6.18, 6.83], False, "req-1")
+        assert len(calls) == 1
+
+    def test_fingerprint_model(self):
+        assert model_fingerprint({"coef": [1.0]}) == model_fingerprint({"coef": [1.0]})
+        assert model_fingerprint({"coef": [1.0]}) != model_fingerprint({"coef": [2.0]})
@@ -0,0 +1,160 @@
+"""
+tests/test_predictor.py — Unit test untuk scorer terkompilasi dan predict_salaries_v2
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+from app.services.inference import InferenceBackend
+from app.services.predictor import predict_salaries_v2, encode_compact_result
+from app.services.scorer import (
+    CompiledLinearModel, SklearnModelScorer, LookupTableScorer, LOOKUP_MONTHS,
+    compile_model, build_scorer, verify_lookup_table,
+)
+from app.utils.constants import VALID_CITIES, VALID_JOB_LEVELS
+from ml.train_model_v2 import build_pipeline, generate_training_data
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    return generate_training_data()
+
+
+@pytest.fixture(scope="module")
+def model_v2(training_data):
+    X, y = training_data
+    return build_pipeline().fit(X, y)
+
+
+@pytest.fixture(scope="module")
+def model_v3(training_data):
+    """Arsitektur sama dengan ml/auto_retrain.build_retrain_pipeline (Ridge)."""
+    X, y = training_data
+    model = build_pipeline()
+    model.set_params(regressor__model=Ridge(alpha=1.0))
+    return model.fit(X, y)
+
+
+def _all_cells(years: list[float]):
+    rows = [
+        [y, city, level]
+        for y in years
+        for city in VALID_CITIES
+        for level in VALID_JOB_LEVELS
+    ]
+    codes = np.array([
+        [VALID_CITIES.index(r[1]), VALID_JOB_LEVELS.index(r[2])] for r in rows
+    ])
+    return rows, np.array([r[0] for r in rows], dtype=float), codes[:, 0], codes[:, 1]
+
+
+class TestCompiledScorer:
+    """Parity scorer terkompilasi terhadap model.predict."""
+
+    @pytest.mark.parametrize("fixture_name", ["model_v2", "model_v3"])
+    def test_parity_dengan_sklearn(self, request, fixture_name):
+        model = request.getfixturevalue(fixture_name)
+        compiled = compile_model(model)
+        assert isinstance(compiled, CompiledLinearModel)
+
+        rows, years, city_codes, level_codes = _all_cells([0.0, 0.5, 2.5, 7.9167, 50.0])
+        expected = model.predict(np.array(rows, dtype=object))
+        actual = compiled.predict_codes(years, city_codes, level_codes)
+
+        np.testing.assert_allclose(actual, expected, rtol=1e-12)
+
+    def test_fallback_untuk_pipeline_non_linear(self, training_data):
+        X, y = training_data
+        model = build_pipeline()
+        model.set_params(regressor__model=RandomForestRegressor(n_estimators=5, random_state=0))
+        model.fit(X, y)
+
+        assert compile_model(model) is None
+        scorer = build_scorer(model)
+        assert isinstance(scorer, SklearnModelScorer)
+
+        rows, years, city_codes, level_codes = _all_cells([1.0, 3.5])
+        np.testing.assert_allclose(
+            scorer.predict_codes(years, city_codes, level_codes),
+            model.predict(np.array(rows, dtype=object)),
+        )
+
+    def test_predict_salaries_v2_sama_untuk_semua_jalur(self, model_v2):
+        args = ([1.0, 2.6, 5.0], ["jakarta", "bandung", "surabaya"], ["junior", "mid", "senior"])
+        via_sklearn = predict_salaries_v2(model_v2, *args)
+        via_compiled = predict_salaries_v2(build_scorer(model_v2), *args)
+
+        assert via_compiled == via_sklearn
+        assert via_compiled["converted_years_decimal"] == [1.0, 2.5, 5.0]
+
+    def test_response_ringkas_tanpa_field_echo(self, model_v2):
+        result = predict_salaries_v2(model_v2, [1.0, 2.6], ["jakarta", "bandung"], ["junior", "mid"])
+        body = encode_compact_result("abc123", result["estimated_salary_million"])
+
+        assert json.loads(body) == {"id": "abc123", "estimated_salary_million": result["estimated_salary_million"]}
+        assert b" " not in body
+
+
+class TestLookupTableScorer:
+    """Tabel lookup full-domain harus identik (dalam presisi float32) dengan model.predict."""
+
+    def test_tabel_cocok_dengan_model(self, model_v2):
+        scorer = build_scorer(model_v2, use_lookup_table=True)
+        assert isinstance(scorer, LookupTableScorer)
+        assert scorer.table.shape == (LOOKUP_MONTHS, len(VALID_CITIES), len(VALID_JOB_LEVELS))
+        assert scorer.table.dtype == np.float32
+
+        years = [round(m / 12, 4) for m in range(0, LOOKUP_MONTHS, 7)]
+        rows, years, city_codes, level_codes = _all_cells(years)
+        np.testing.assert_allclose(
+            scorer.predict_codes(years, city_codes, level_codes),
+            model_v2.predict(np.array(rows, dtype=object)),
+            rtol=1e-6,
+        )
+        assert verify_lookup_table(scorer, model_v2)
+
+    def test_di_luar_grid_pakai_fallback(self, model_v2):
+        scorer = build_scorer(model_v2, use_lookup_table=True)
+        years = np.array([2.123, 60.0])
+        codes = np.array([0, 1])
+        np.testing.assert_allclose(
+            scorer.predict_codes(years, codes, codes),
+            scorer.fallback.predict_codes(years, codes, codes),
+        )
+
+
+class TestInferenceBackend:
+    """Ketiga mode eksekusi harus menghasilkan prediksi yang sama."""
+
+    @pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+    def test_hasil_sama_untuk_semua_mode(self, mode, model_v2, tmp_path):
+        model_path = tmp_path / "model.pkl"
+        joblib.dump(model_v2, model_path)
+        scorer = build_scorer(model_v2)
+
+        backend = InferenceBackend(mode, get_scorer=lambda: scorer, model_path=str(model_path), workers=1)
+        backend.start()
+        try:
+            _, years, city_codes, level_codes = _all_cells([0.5, 12.25])
+            actual = asyncio.run(backend.score(years, city_codes, level_codes))
+        finally:
+            backend.shutdown()
+
+        np.testing.assert_allclose(actual, scorer.predict_codes(years, city_codes, level_codes))
+
+    def test_mode_tidak_valid_ditolak(self):
+        with pytest.raises(ValueError, match="tidak valid"):
+            InferenceBackend("gpu")
@@ -0,0 +1,132 @@
+"""
+tests/test_principal_cache.py — Unit test cache principal per token (get_current_user)
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+
+import app.services.auth as auth
+from app.services.principal_cache import Principal, PrincipalCache
+
+
+class FakeSession:
+    """Tabel users palsu: mencatat jumlah query."""
+
+    def __init__(self, users: dict[str, str]):
+        self.users = users
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        username = query.whereclause.right.value
+        role = self.users.get(username)
+        row = SimpleNamespace(username=username, role=role) if role is not None else None
+        return SimpleNamespace(one_or_none=lambda: row)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    cache = PrincipalCache(ttl_seconds=60, max_size=100)
+    monkeypatch.setattr(auth, "principal_cache", cache)
+    return cache
+
+
+def _current_user(token: str, db: FakeSession) -> Principal:
+    return asyncio.run(auth.get_current_user(token=token, api_key=None, db=db))
+
+
+class TestPrincipalCache:
+
+    def test_lru_membuang_entry_terlama(self):
+        cache = PrincipalCache(ttl_seconds=60, max_size=2)
+        far = time.time() + 3600
+        cache.put("a", Principal("a", "user"), far)
+        cache.put("b", Principal("b", "user"), far)
+        cache.get("a")  # a jadi yang terbaru dipakai
+        cache.put("c", Principal("c", "user"), far)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+
+    def test_entry_tidak_melewati_exp_token(self):
+        cache = PrincipalCache(ttl_seconds=60)
+        cache.put("t", Principal("a", "user"), time.time() - 1)
+        assert cache.get("t") is None
+
+    def test_ttl_nol_nonaktif(self):
+        cache = PrincipalCache(ttl_seconds=0)
+        cache.put("t", Principal("a", "user"), time.time() + 3600)
+        assert cache.get("t") is None
+
+    def test_invalidate_user(self):
+        cache = PrincipalCache(ttl_seconds=60)
+        far = time.time() + 3600
+        cache.put("t1", Principal("budi", "admin"), far)
+        cache.put("t2", Principal("sari", "user"), far)
+        cache.invalidate_user("budi")
+        assert cache.get("t1") is None
+        assert cache.get("t2") is not None
+        assert cache.issued_before_revocation("budi", time.time() - 10)
+        assert not cache.issued_before_revocation("budi", time.time() + 10)
+        assert not cache.issued_before_revocation("sari", time.time() - 10)
+
+
+class TestGetCurrentUser:
+
+    def test_request_kedua_tanpa_query_db(self, cache):
+        db = FakeSession({"budi": "user"})
+        token = auth.create_access_token({"sub": "budi", "role": "user"})
+
+        assert _current_user(token, db) == Principal("budi", "user")
+        assert _current_user(token, db) == Principal("budi", "user")
+        assert db.queries == 1
+        assert cache.hits == 1
+
+    def test_role_dari_db_bukan_dari_klaim(self, cache):
+        # Default: klaim role tidak dipercaya, DB yang menentukan
+        db = FakeSession({"budi": "user"})
+        token = auth.create_access_token({"sub": "budi", "role": "admin"})
+        assert _current_user(token, db).role == "user"
+
+    def test_klaim_role_dipercaya_tanpa_db(self, cache, monkeypatch):
+        monkeypatch.setattr(auth, "AUTH_TRUST_ROLE_CLAIM", True)
+        db = FakeSession({})
+        token = auth.create_access_token({"sub": "budi", "role": "admin"})
+        assert _current_user(token, db) == Principal("budi", "admin")
+        assert db.queries == 0
+
+    def test_invalidasi_memaksa_cek_ulang_db(self, cache, monkeypatch):
+        monkeypatch.setattr(auth, "AUTH_TRUST_ROLE_CLAIM", True)
+        db = FakeSession({"budi": "user"})
+        token = auth.create_access_token({"sub": "budi", "role": "admin"})
+        assert _current_user(token, db).role == "admin"
+
+        # Role diturunkan lalu user dihapus: token lama tidak lagi dipercaya klaimnya
+        cache.invalidate_user("budi")
+        assert _current_user(token, db).role == "user"
+        cache.invalidate_user("budi")
+        del db.users["budi"]
+        with pytest.raises(HTTPException) as exc:
+            _current_user(token, db)
+        assert exc.value.status_code == 401
+
+    def test_payload_diubah_tidak_kena_cache(self, cache):
+        db = FakeSession({"budi": "user"})
+        token = auth.create_access_token({"sub": "budi"})
+        _current_user(token, db)
+
+        header, payload, signature = token.split(".")
+        forged = auth.create_access_token({"sub": "admin"}).split(".")[1]
+        with pytest.raises(HTTPException):
+            _current_user(f"{header}.{forged}.{signature}", db)
@@ -0,0 +1,155 @@
+"""
+tests/test_rate_limiter.py — Unit test rate limit baris per user (RowRateLimiter)
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import math
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.rate_limiter import RowRateLimiter, RateLimitExceeded
+
+
+class FakeClock:
+    def __init__(self, now: float = 600.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRedis:
+    """Redis bersama beberapa worker: mengeksekusi RESERVE_SCRIPT versi Python."""
+
+    def __init__(self):
+        self.counters: dict[str, int] = {}
+        self.calls = 0
+        self.down = False
+
+    def register_script(self, script):
+        async def reserve(keys, args):
+            self.calls += 1
+            if self.down:
+                raise ConnectionError("redis mati")
+            limit, want, prev_weight, _ = args
+            current = self.counters.get(keys[0], 0)
+            previous = self.counters.get(keys[1], 0)
+            grant = min(want, math.floor(limit - current - previous * prev_weight))
+            if grant <= 0:
+                return 0
+            self.counters[keys[0]] = current + grant
+            return grant
+        return reserve
+
+
+def _acquire(limiter: RowRateLimiter, key: str, rows: int) -> None:
+    asyncio.run(limiter.acquire(key, rows))
+
+
+def _limiter(clock, redis=None, **kwargs) -> RowRateLimiter:
+    limiter = RowRateLimiter(window_seconds=60, clock=clock, **kwargs)
+    if redis is not None:
+        limiter.attach_redis(redis)
+    return limiter
+
+
+class TestLocal:
+
+    def test_dihitung_per_baris(self):
+        limiter = _limiter(FakeClock(), limit=100)
+        _acquire(limiter, "budi", 60)
+        with pytest.raises(RateLimitExceeded) as exc:
+            _acquire(limiter, "budi", 60)
+        assert 1 <= exc.value.retry_after <= 60
+        _acquire(limiter, "budi", 40)
+
+    def test_kuota_per_user(self):
+        limiter = _limiter(FakeClock(), limit=100)
+        _acquire(limiter, "budi", 100)
+        _acquire(limiter, "sari", 100)
+
+    def test_sliding_window_memperhitungkan_window_sebelumnya(self):
+        clock = FakeClock(600.0)
+        limiter = _limiter(clock, limit=100)
+        _acquire(limiter, "budi", 100)
+
+        # Seperempat window berikutnya: 75% pemakaian lama masih terhitung
+        clock.now = 675.0
+        with pytest.raises(RateLimitExceeded):
+            _acquire(limiter, "budi", 30)
+        _acquire(limiter, "budi", 25)
+
+    def test_limit_nol_nonaktif(self):
+        limiter = _limiter(FakeClock(), limit=0)
+        _acquire(limiter, "budi", 10**6)
+
+
+class TestRedis:
+
+    def test_kuota_dibagi_lintas_worker(self):
+        clock, redis = FakeClock(), FakeRedis()
+        workers = [_limiter(clock, redis, limit=300, block_size=100) for _ in range(3)]
+        for worker in workers:
+            _acquire(worker, "budi", 100)
+        for worker in workers:
+            with pytest.raises(RateLimitExceeded):
+                _acquire(worker, "budi", 1)
+
+    def test_reservasi_blok_menghemat_round_trip(self):
+        redis = FakeRedis()
+        limiter = _limiter(FakeClock(), redis, limit=1000, block_size=100)
+        for _ in range(100):
+            _acquire(limiter, "budi", 1)
+        assert redis.calls == 1
+        assert limiter.metrics()["redis_calls"] == 1
+
+    def test_batch_besar_meminta_lebih_dari_satu_blok(self):
+        redis = FakeRedis()
+        limiter = _limiter(FakeClock(), redis, limit=1000, block_size=10)
+        _acquire(limiter, "budi", 250)
+        assert redis.calls == 1
+
+    def test_blok_hangus_saat_window_berganti(self):
+        clock, redis = FakeClock(600.0), FakeRedis()
+        limiter = _limiter(clock, redis, limit=1000, block_size=100)
+        _acquire(limiter, "budi", 1)
+        clock.now = 660.0
+        _acquire(limiter, "budi", 1)
+        assert redis.calls == 2
+
+    def test_fallback_in_process_saat_redis_mati(self):
+        clock, redis = FakeClock(), FakeRedis()
+        limiter = _limiter(clock, redis, limit=100, block_size=10, retry_seconds=5)
+        redis.down = True
+
+        _acquire(limiter, "budi", 60)
+        with pytest.raises(RateLimitExceeded):
+            _acquire(limiter, "budi", 60)
+        assert limiter.redis_errors == 1
+        assert limiter.metrics()["backend"] == "local (redis fallback)"
+
+        # Redis dicoba lagi setelah retry_seconds
+        redis.down = False
+        clock.now += 5
+        _acquire(limiter, "budi", 60)
+        assert limiter.metrics()["backend"] == "redis"
+
+    def test_redis_dicoba_lagi_setelah_ping_startup_gagal(self):
+        clock, redis = FakeClock(), FakeRedis()
+        limiter = RowRateLimiter(limit=100, window_seconds=60, block_size=10, retry_seconds=5, clock=clock)
+        limiter.attach_redis(redis, available=False)
+
+        _acquire(limiter, "budi", 1)
+        assert redis.calls == 0
+        assert limiter.metrics()["backend"] == "local (redis fallback)"
+
+        clock.now += 5
+        _acquire(limiter, "budi", 1)
+        assert redis.calls == 1
+        assert limiter.metrics()["backend"] == "redis"
@@ -0,0 +1,75 @@
+"""
+tests/test_stats.py — Unit test untuk pembacaan rollup /stats
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from datetime import date
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.stats import DEFAULT_STATS_DAYS, get_stats
+
+
+def _row(day, city, level, count, predicted_sum, feedback_count=0, abs_error_sum=0.0):
+    return SimpleNamespace(
+        day=day, city=city, job_level=level,
+        prediction_count=count, predicted_salary_sum=predicted_sum,
+        feedback_count=feedback_count, abs_error_sum=abs_error_sum,
+    )
+
+
+class FakeSession:
+    """Mengembalikan baris rollup tetap untuk query apa pun."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def execute(self, query):
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.rows))
+
+
+def _stats(rows, **kwargs):
+    return asyncio.run(get_stats(FakeSession(rows), **kwargs))
+
+
+class TestStats:
+
+    def test_rata_rata_dari_jumlah(self):
+        rows = [
+            _row(date(2025, 1, 1), "jakarta", "mid", 4, 40.0, feedback_count=2, abs_error_sum=3.0),
+            _row(date(2025, 1, 2), "bandung", "senior", 1, 20.0),
+        ]
+        result = _stats(rows, start=date(2025, 1, 1), end=date(2025, 1, 2))
+
+        first, second = result["items"]
+        assert first["mean_predicted_salary"] == pytest.approx(10.0)
+        assert first["mean_absolute_error"] == pytest.approx(1.5)
+        assert second["mean_absolute_error"] is None  # belum ada feedback
+
+        total = result["total"]
+        assert total["prediction_count"] == 5
+        assert total["mean_predicted_salary"] == pytest.approx(12.0)
+        assert total["feedback_count"] == 2
+        assert total["mean_absolute_error"] == pytest.approx(1.5)
+
+    def test_kota_level_kosong_jadi_none(self):
+        result = _stats([_row(date(2025, 1, 1), "", "", 1, 5.0)], start=date(2025, 1, 1), end=date(2025, 1, 1))
+        assert result["items"][0]["city"] is None
+        assert result["items"][0]["job_level"] is None
+
+    def test_tanpa_data(self):
+        result = _stats([])
+        assert result["items"] == []
+        assert result["total"]["mean_predicted_salary"] is None
+        assert (result["end"] - result["start"]).days == DEFAULT_STATS_DAYS - 1
+
+    def test_rentang_terbalik(self):
+        with pytest.raises(ValueError, match="start"):
+            _stats([], start=date(2025, 2, 1), end=date(2025, 1, 1))
@@ -0,0 +1,141 @@
+"""
+tests/test_streaming.py — Unit test untuk prediksi bulk streaming (/predict/stream)
+
+Cara jalankan:
+    pytest tests/ -v
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.streaming import detect_stream_format, stream_predictions
+
+
+class FakeSession:
+    """Pengganti AsyncSession: mencatat record yang di-flush, item, UPSERT rollup, dan jumlah commit."""
+
+    def __init__(self):
+        self.flushed = []
+        self.items = []
+        self.rollup_updates = []
+        self.commits = 0
+        self.fail_commit_at = None
+
+    def add(self, record):
+        self.flushed.append(record)
+
+    def expunge(self, record):
+        pass
+
+    async def flush(self):
+        for i, record in enumerate(self.flushed):
+            record.id = i + 1
+
+    async def execute(self, statement, rows):
+        if hasattr(statement, "table"):
+            self.items.extend(rows)
+        else:
+            self.rollup_updates.append(rows)
+
+    async def commit(self):
+        if self.fail_commit_at == self.commits + 1:
+            raise ConnectionError("koneksi DB putus")
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+
+async def _body(data: bytes, piece: int = 7):
+    # Potong body di posisi acak agar baris terbelah antar chunk upload
+    for i in range(0, len(data), piece):
+        yield data[i:i + piece]
+
+
+async def _score(years, city_codes, level_codes):
+    return years * 2
+
+
+def _run(data: bytes, fmt: str, chunk_size: int = 2, session: FakeSession | None = None, **kwargs):
+    session = session or FakeSession()
+
+    async def collect():
+        return b"".join([
+            part async for part in stream_predictions(
+                _body(data), fmt, _score, session, model_version="test", chunk_size=chunk_size, **kwargs,
+            )
+        ])
+
+    return asyncio.run(collect()).decode(), session
+
+
+class TestStreamPredictions:
+
+    def test_ndjson_per_chunk_dan_commit_per_chunk(self):
+        rows = [
+            {"years_experience": 2.6, "city": "Jakarta", "job_level": "mid"},
+            {"years_experience": 2.12, "city": "jakarta", "job_level": "mid"},
+            {"years_experience": 1.0, "city": "wakanda", "job_level": "mid"},
+            {"years_experience": 3.0, "city": "bandung", "job_level": "senior"},
+        ]
+        data = ("\n".join(json.dumps(r) for r in rows) + "\n\n{rusak\n").encode()
+        output, session = _run(data, "ndjson")
+        results = [json.loads(line) for line in output.splitlines()]
+
+        assert [r["row"] for r in results] == [0, 1, 2, 3, 4]
+        assert results[0]["estimated_salary_million"] == 5.0
+        assert "error" in results[1] and "error" in results[2] and "error" in results[4]
+        assert results[3]["estimated_salary_million"] == 6.0
+
+        # 3 chunk (2+2+1 baris); chunk terakhir tidak punya baris valid → tidak ditulis
+        assert [r.data_count for r in session.flushed] == [1, 1]
+        assert [(item["history_id"], item["position"]) for item in session.items] == [(1, 0), (2, 0)]
+        assert [params["history_ids"] for params in session.rollup_updates] == [[1], [2]]
+        # Transaksi pendek: satu commit per chunk yang ditulis
+        assert session.commits == 2
+
+    def test_commit_tiap_n_chunk(self):
+        data = "".join(
+            json.dumps({"years_experience": 1.0, "city": "jakarta", "job_level": "mid"}) + "\n" for _ in range(5)
+        ).encode()
+        _, session = _run(data, "ndjson", chunk_size=1, commit_chunks=2)
+        # 5 chunk: commit setelah chunk 2 dan 4, sisa 1 chunk di akhir stream
+        assert session.commits == 3
+
+    def test_commit_gagal_tidak_membatalkan_chunk_sebelumnya(self):
+        data = "".join(
+            json.dumps({"years_experience": 1.0, "city": "jakarta", "job_level": "mid"}) + "\n" for _ in range(4)
+        ).encode()
+        session = FakeSession()
+        session.fail_commit_at = 2
+        output, _ = _run(data, "ndjson", chunk_size=1, session=session)
+
+        # Prediksi tetap terkirim semua; histori berhenti ditulis setelah commit gagal
+        assert len(output.splitlines()) == 4
+        assert session.commits == 1
+        assert len(session.flushed) == 2
+
+    def test_csv_header_urutan_bebas(self):
+        data = b"city,job_level,years_experience\r\njakarta,mid,1.6\r\nmedan,junior,0.0\r\n"
+        output, session = _run(data, "csv")
+        lines = output.splitlines()
+
+        assert lines[0] == "row,estimated_salary_million,error"
+        assert lines[1:] == ["0,3.0,", "1,0.0,"]
+        assert session.flushed[0].city == ["jakarta", "medan"]
+
+    def test_csv_header_tidak_lengkap(self):
+        output, _ = _run(b"years,city\n1.0,jakarta\n", "csv")
+        assert "Header CSV tidak lengkap" in output
+
+    def test_detect_format(self):
+        assert detect_stream_format("application/x-ndjson; charset=utf-8") == "ndjson"
+        assert detect_stream_format("text/csv") == "csv"
+        with pytest.raises(LookupError):
+            detect_stream_format("application/json")
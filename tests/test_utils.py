@@ -11,7 +11,9 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.utils.converters import convert_ym_to_years
+import numpy as np
+
+from app.utils.converters import convert_ym_to_years, convert_ym_array
 from app.schemas.models import SalaryInputV2
 from pydantic import ValidationError
 
@@ -49,6 +51,22 @@ class TestConvertYMToYears:
             convert_ym_to_years(-1.0)
 
 
+class TestConvertYMArray:
+    """Test untuk versi vektor convert_ym_array."""
+
+    def test_sama_dengan_versi_skalar(self):
+        values = [0.0, 0.6, 1.3, 2.11, 2.05, 3.0, 49.11, 50.0]
+        converted, valid = convert_ym_array(values)
+        assert valid.all()
+        assert converted.tolist() == [convert_ym_to_years(v) for v in values]
+
+    def test_mask_nilai_tidak_valid(self):
+        converted, valid = convert_ym_array([2.6, 2.12, -1.0, 1.15, float("nan"), 2.123])
+        assert valid.tolist() == [True, False, False, False, False, False]
+        assert converted[0] == 2.5
+        assert np.isnan(converted[1:]).all()
+
+
 class TestSalaryInputV2Validator:
     """Test untuk Pydantic validators di SalaryInputV2."""
 
@@ -59,6 +77,7 @@ class TestSalaryInputV2Validator:
             job_level=["junior", "senior"]
         )
         assert len(data.years_experience) == 2
+        assert data.converted_years.tolist() == [1.0, 2.5]
         assert data.city == ["jakarta", "bandung"]
         assert data.job_level == ["junior", "senior"]
 